@@ -40,6 +40,49 @@ class ECAutomationConfig:
         self.log_level = os.getenv('LOG_LEVEL', 'INFO')
         self.database_path = os.getenv('DATABASE_PATH', './data/ec_automation.db')
         
+        # 自動化エンジン常駐モードの実行間隔（秒）
+        self.automation_interval = float(os.getenv('AUTOMATION_INTERVAL', '60'))
+        
+        # ダッシュボードスナップショットキャッシュ（秒）
+        self.dashboard_cache_ttl = float(os.getenv('DASHBOARD_CACHE_TTL', '30'))
+        self.dashboard_cache_stale_ttl = float(os.getenv('DASHBOARD_CACHE_STALE_TTL', '300'))
+        
+        # ダッシュボードサーバーのポート（python main.py dashboard / realtime）
+        self.dashboard_port = int(os.getenv('DASHBOARD_PORT', '8080'))
+        
+        # 差分注文同期で前回到達点から遡って再取得する時間（分）
+        self.sync_overlap_minutes = float(os.getenv('SYNC_OVERLAP_MINUTES', '10'))
+        
+        # 外部API呼び出しのタイムアウト（秒）・再試行回数・サーキットブレーカー
+        self.http_connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+        self.http_read_timeout = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+        self.http_max_retries = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+        self.circuit_failure_threshold = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+        self.circuit_reset_timeout = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+        
+        # AI応答キャッシュ: 有効期間（秒、0で無効）と最大件数（超過分は最終利用が古い順に削除）
+        self.ai_cache_ttl = float(os.getenv('AI_CACHE_TTL', '21600'))
+        self.ai_cache_max_entries = int(os.getenv('AI_CACHE_MAX_ENTRIES', '500'))
+        
+        # Notion一括同期: API上限（リクエスト/秒、インテグレーション単位）と同時に処理する日数
+        self.notion_requests_per_second = float(os.getenv('NOTION_REQUESTS_PER_SECOND', '3'))
+        self.notion_batch_concurrency = int(os.getenv('NOTION_BATCH_CONCURRENCY', '5'))
+        
+        # Notion送信待ちキュー: 1回に取り出す件数と、失敗時の再送間隔（秒、失敗ごとに倍・上限あり）、
+        # 常駐モードでキューを送信する間隔（秒）
+        self.notion_outbox_batch_size = int(os.getenv('NOTION_OUTBOX_BATCH_SIZE', '50'))
+        self.notion_outbox_retry_base = float(os.getenv('NOTION_OUTBOX_RETRY_BASE', '60'))
+        self.notion_outbox_retry_max = float(os.getenv('NOTION_OUTBOX_RETRY_MAX', '3600'))
+        self.notion_outbox_drain_interval = float(os.getenv('NOTION_OUTBOX_DRAIN_INTERVAL', '30'))
+        
+        # 外部APIベースURL（負荷試験ではフェイクサービスに向ける）
+        self.amazon_sp_api_base_url = os.getenv('AMAZON_SP_API_BASE_URL', 'https://sellingpartnerapi-fe.amazon.com')
+        self.amazon_auth_base_url = os.getenv('AMAZON_AUTH_BASE_URL', 'https://api.amazon.com/auth/o2')
+        self.rakuten_rms_base_url = os.getenv('RAKUTEN_RMS_BASE_URL', 'https://api.rms.rakuten.co.jp/es/2.0')
+        self.notion_api_base_url = os.getenv('NOTION_API_BASE_URL', 'https://api.notion.com/v1')
+        self.gemini_api_base_url = os.getenv('GEMINI_API_BASE_URL', 'https://generativelanguage.googleapis.com')
+        self.anthropic_api_base_url = os.getenv('ANTHROPIC_API_BASE_URL', 'https://api.anthropic.com')
+        
         # バリデーション実行
         self.validate_config()
     
@@ -44,6 +44,15 @@ def setup_environment():
     for dir_path in directories:
         Path(dir_path).mkdir(parents=True, exist_ok=True)
     
+    # データベーススキーマ・インデックス作成
+    try:
+        from src.database.schema import initialize_database
+        result = initialize_database()
+        print(f"✅ データベース準備完了: {result['db_path']} "
+              f"(スキーマv{result['version']}, {result['journal_mode']})")
+    except Exception as e:
+        print(f"❌ データベース初期化エラー: {e}")
+    
     print("✅ 環境セットアップ完了")
 
 def show_status():
@@ -107,16 +116,19 @@ async def run_ai_analysis():
     """AI分析実行"""
     try:
         from src.ai_integration.ai_engine import ECAIIntegrationEngine
-        engine = ECAIIntegrationEngine()
-        results = await engine.run_integration_test()
+        async with ECAIIntegrationEngine() as engine:
+            results = await engine.run_integration_test()
         engine.save_results(results)
         return results
     except Exception as e:
         print(f"❌ AI分析エラー: {e}")
         return None
 
-async def run_notion_sync():
-    """EC統合Notion同期実行"""
+async def run_notion_sync(backfill_days=None, force=False, drain=False):
+    """EC統合Notion同期実行（backfill_days指定時は履歴データから期間一括同期、force: 変更なしでも書き込む）
+
+    同期内容は送信待ちキューに登録してから再送で反映する。drain=True の場合は送信待ちキューの再送のみ行う。
+    """
     try:
         # 新しい統合システムを優先使用
         from src.ec_notion_integration import ECAutomationNotionManager
@@ -128,9 +140,22 @@ async def run_notion_sync():
             print("💡 docs/NOTION_SETUP_GUIDE.md を参照してセットアップしてください")
             return False
         
+        if drain:
+            counts = await manager.flush_outbox()
+            return counts is not None and counts["failed"] == 0
+        
+        if backfill_days:
+            print(f"📅 過去{backfill_days}日間を履歴データからNotionに一括同期中...")
+            success_count = await manager.batch_sync_period(backfill_days, force=force)
+            return success_count > 0
+        
         # 包括的データ同期
         print("📊 EC自動化システム統合データをNotionに同期中...")
-        success = await manager.sync_to_notion_database()
+        success = await manager.sync_to_notion_database(force=force)
+        counts = await manager.flush_outbox()
+        # 送信待ち経由の書き込みは再送結果で成否を判定（失敗分はキューに残り次回再送）
+        if counts is not None and counts["failed"]:
+            success = False
         
         if success:
             print("\n🎉 EC統合Notion同期完了！")
@@ -152,19 +177,48 @@ async def run_notion_sync():
                 return False
             
             print("📊 基本Notion同期を実行中...")
-            success = await notion.sync_daily_report()
+            success = await notion.sync_daily_report(force=force)
             return success
             
         except Exception as fallback_e:
             print(f"❌ フォールバック同期エラー: {fallback_e}")
             return False
 
+async def run_order_sync():
+    """Amazon・楽天 注文差分同期実行"""
+    results = {}
+    
+    try:
+        # 定期実行されるため、スキーマが古い場合のみマイグレーション（最新ならANALYZE等も行わない）
+        from src.database.schema import ensure_database
+        ensure_database()
+    except Exception as e:
+        print(f"❌ データベース初期化エラー: {e}")
+        return None
+    
+    from src.amazon_connector.amazon_api import AmazonSPAPIConnector
+    from src.rakuten_connector.rakuten_api import RakutenAPIConnector
+    
+    for name, connector_class in [("amazon", AmazonSPAPIConnector), ("rakuten", RakutenAPIConnector)]:
+        connector = connector_class()
+        try:
+            if not connector.check_connection_status()["ready_for_api_calls"]:
+                print(f"⚠️ {name}: API設定が未完了のため同期をスキップします")
+                continue
+            results[name] = await connector.sync_orders_incremental()
+        except Exception as e:
+            print(f"❌ {name} 注文同期エラー: {e}")
+        finally:
+            await connector.close()
+    
+    return results
+
 def generate_dashboard_data():
     """ダッシュボード用データ生成"""
     try:
-        from src.automation_engine_24h import fetch_dashboard_data
+        from src.automation_engine_24h import get_dashboard_snapshot
         print("📊 ダッシュボードデータを生成中...")
-        data = fetch_dashboard_data()
+        data = get_dashboard_snapshot()
         print("✅ ダッシュボードデータ生成完了")
         return data
     except Exception as e:
@@ -172,8 +226,8 @@ def generate_dashboard_data():
         print("💡 デモデータでダッシュボードを表示します")
         return None
 
-def run_dashboard(realtime=False):
-    """ダッシュボード起動"""
+async def run_dashboard(realtime=False):
+    """ダッシュボード起動（APIサーバーは実行中のイベントループ上で動かす）"""
     import webbrowser
     import http.server
     import socketserver
@@ -192,30 +246,53 @@ def run_dashboard(realtime=False):
     if realtime:
         generate_dashboard_data()
     
-    # 簡易HTTPサーバー起動
-    PORT = 8080
+    from config.settings import get_config
+    PORT = get_config().dashboard_port
+    dashboard_type = "リアルタイム" if realtime else "標準"
+    dashboard_url = f"http://localhost:{PORT}/src/dashboard/{dashboard_file}"
+    
+    def open_browser():
+        import time
+        time.sleep(1)  # サーバー起動待ち
+        webbrowser.open(dashboard_url)
+    
+    # ブラウザを別スレッドで開く（APIサーバー起動失敗後のフォールバックでも1回だけ）
+    browser_thread = threading.Thread(target=open_browser)
+    browser_thread.daemon = True
+    
+    def start_browser():
+        if browser_thread.ident is None:
+            browser_thread.start()
+    
+    # APIサーバー（FastAPI/uvicorn）を優先使用、起動できなければ簡易HTTPサーバー
+    try:
+        from src.dashboard.api_server import serve_api
+        
+        print(f"🌐 {dashboard_type}ダッシュボードサーバー起動中: http://localhost:{PORT}")
+        print(f"📊 ダッシュボードURL: {dashboard_url}")
+        print(f"🔌 JSON API: http://localhost:{PORT}/api/dashboard")
+        if realtime:
+            print(f"📡 プッシュ配信(SSE): http://localhost:{PORT}/api/stream")
+        print("🛑 終了するには Ctrl+C を押してください")
+        start_browser()
+        await serve_api(port=PORT, realtime=realtime)
+        print("\n🛑 ダッシュボードサーバーを停止しました")
+        return
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\n🛑 ダッシュボードサーバーを停止しました")
+        return
+    except Exception as e:
+        print(f"⚠️ APIサーバーを起動できません（{e}）。簡易HTTPサーバーで起動します")
     
+    # 簡易HTTPサーバー起動（フォールバック）
     class CustomHandler(http.server.SimpleHTTPRequestHandler):
         def __init__(self, *args, **kwargs):
             super().__init__(*args, directory=str(project_root), **kwargs)
     
     try:
-        with socketserver.TCPServer(("", PORT), CustomHandler) as httpd:
-            dashboard_type = "リアルタイム" if realtime else "標準"
+        with socketserver.ThreadingTCPServer(("", PORT), CustomHandler) as httpd:
             print(f"🌐 {dashboard_type}ダッシュボードサーバー起動中: http://localhost:{PORT}")
-            
-            # ブラウザでダッシュボードを開く
-            dashboard_url = f"http://localhost:{PORT}/src/dashboard/{dashboard_file}"
-            
-            def open_browser():
-                import time
-                time.sleep(1)  # サーバー起動待ち
-                webbrowser.open(dashboard_url)
-            
-            # ブラウザを別スレッドで開く
-            browser_thread = threading.Thread(target=open_browser)
-            browser_thread.daemon = True
-            browser_thread.start()
+            start_browser()
             
             print(f"📊 ダッシュボードURL: {dashboard_url}")
             print("🛑 終了するには Ctrl+C を押してください")
@@ -228,11 +305,23 @@ def run_dashboard(realtime=False):
     except Exception as e:
         print(f"❌ サーバー起動エラー: {e}")
 
-def run_automation_engine():
+def run_automation_engine(daemon=False, interval=None):
     """24時間自動化エンジン実行"""
     try:
         print("🤖 24時間自動化エンジンを開始します...")
         
+        if daemon:
+            # 常駐モード: 1プロセス・1接続で定期実行（変更がなければ再集計しない）
+            from src.automation_engine_24h import AutomationDaemon
+            engine = AutomationDaemon(interval=interval)
+            try:
+                data = engine.run()
+            except KeyboardInterrupt:
+                print("\n🛑 自動化エンジン常駐モードを停止しました")
+                data = engine.data
+            print(f"📊 実行回数: {engine.tick_count}回 / 再集計: {engine.refresh_count}回")
+            return data
+        
         # データ生成
         data = generate_dashboard_data()
         
@@ -256,7 +345,7 @@ async def main():
     
     parser.add_argument(
         "command",
-        choices=["test", "ai", "dashboard", "setup", "status", "automation", "realtime", "notion"],
+        choices=["test", "ai", "dashboard", "setup", "status", "automation", "realtime", "notion", "sync"],
         help="実行するコマンド"
     )
     
@@ -266,6 +355,39 @@ async def main():
         help="デバッグモードで実行"
     )
     
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="自動化エンジンを常駐モードで実行（automation コマンド用）"
+    )
+    
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="常駐モードの実行間隔（秒）。未指定時は AUTOMATION_INTERVAL"
+    )
+    
+    parser.add_argument(
+        "--backfill",
+        type=int,
+        default=None,
+        metavar="DAYS",
+        help="過去DAYS日分を履歴データからNotionに一括同期（notion コマンド用）"
+    )
+    
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="前回と同じ内容でもNotionに書き込む（notion コマンド用）"
+    )
+    
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Notion送信待ちキューの再送のみ実行（notion コマンド用）"
+    )
+    
     args = parser.parse_args()
     
     # バナー表示
@@ -298,7 +420,7 @@ async def main():
                 
         elif args.command == "notion":
             print("📊 EC統合Notion同期を実行します...")
-            success = await run_notion_sync()
+            success = await run_notion_sync(args.backfill, args.force, args.drain)
             
             if success:
                 print("\n🎉 EC統合Notion同期が完了しました！")
@@ -307,17 +429,26 @@ async def main():
             else:
                 print("\n❌ Notion同期でエラーが発生しました。")
                 
+        elif args.command == "sync":
+            print("🔄 Amazon・楽天 注文差分同期を実行します...")
+            results = await run_order_sync()
+            
+            if results:
+                print("\n🎉 注文差分同期が完了しました！")
+            else:
+                print("\n⚠️ 同期対象の注文データがありません（API設定を確認してください）")
+                
         elif args.command == "dashboard":
             print("📊 標準ダッシュボードを起動します...")
-            run_dashboard(realtime=False)
+            await run_dashboard(realtime=False)
             
         elif args.command == "realtime":
             print("📊 リアルタイムダッシュボードを起動します...")
-            run_dashboard(realtime=True)
+            await run_dashboard(realtime=True)
             
         elif args.command == "automation":
             print("🤖 24時間自動化エンジンを実行します...")
-            data = run_automation_engine()
+            data = run_automation_engine(daemon=args.daemon, interval=args.interval)
             
             if data:
                 print("\n🎉 自動化エンジン実行完了！")
@@ -351,10 +482,20 @@ def show_help():
   
 自動化・連携:
   python main.py automation # 24時間自動化エンジン実行
+  python main.py automation --daemon  # 常駐モードで定期実行
   python main.py notion     # EC統合Notion同期（新機能）
+  python main.py notion --backfill 90  # 過去90日分を履歴データから一括同期
+  python main.py notion --force        # 変更がなくてもNotionに書き込む
+  python main.py notion --drain        # 書き込みに失敗した日を送信待ちキューから再送
+  python main.py sync       # Amazon・楽天 注文差分同期（前回同期以降のみ）
 
 オプション:
   --debug                   # デバッグモードで実行
+  --daemon                  # 自動化エンジンを常駐モードで実行
+  --interval 秒             # 常駐モードの実行間隔（既定: AUTOMATION_INTERVAL）
+  --backfill 日数           # Notion同期を過去日数分の履歴から一括実行
+  --force                   # Notion同期で変更なしの日も書き込む
+  --drain                   # Notion送信待ちキューの再送のみ実行
 
 例:
   python main.py setup                    # 初回セットアップ
@@ -7,20 +7,74 @@ Amazon・楽天 × Gemini・Claude AI 完全連携システム
 
 import json
 import asyncio
+import sqlite3
 import aiohttp
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
+from typing import Optional
 
 # プロジェクトルートをパスに追加
 project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from config.settings import get_config
+from src.ai_integration.response_cache import AIResponseCache
+from src.database.schema import has_table
+from src.resilience import stream_with_retry
+
+GEMINI_MODEL = "gemini-pro"
+CLAUDE_MODEL = "claude-3-sonnet-20240229"
+
+# LLMは最初の断片を返すまで時間がかかるため読み取りタイムアウトを長めに取る
+AI_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_read=90)
+# 共有セッションの最大同時接続数（Gemini・Claudeで共用）
+AI_MAX_CONNECTIONS = 10
+# 分析結果に載せるAI応答の文字数（超えた分は受信せず打ち切る）
+ANALYSIS_PREVIEW_CHARS = 200
+
+
+class AIAPIError(Exception):
+    """AI API応答エラー"""
+
+
+async def _iter_sse_events(response):
+    """Server-Sent Events を (event, data) 単位で読み出す"""
+    event, data_lines = None, []
+    async for raw_line in response.content:
+        line = raw_line.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event, data_lines = None, []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].lstrip(" "))
+    if data_lines:
+        yield event, "\n".join(data_lines)
+
+
+def _gemini_chunk_text(event, data):
+    """streamGenerateContent の1チャンクから本文を取り出す"""
+    chunk = json.loads(data)
+    candidates = chunk.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts", [])
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _claude_chunk_text(event, data):
+    """Messages API ストリームの1イベントから本文を取り出す"""
+    chunk = json.loads(data)
+    if chunk.get("type") == "error":
+        raise AIAPIError(f"API応答エラー: {chunk.get('error', {}).get('message')}")
+    if chunk.get("type") == "content_block_delta" and chunk["delta"].get("type") == "text_delta":
+        return chunk["delta"]["text"]
+    return ""
 
 class ECAIIntegrationEngine:
-    def __init__(self):
-        """EC AI統合エンジン初期化"""
+    def __init__(self, cache: Optional[AIResponseCache] = None):
+        """EC AI統合エンジン初期化（cache未指定時は設定に従いSQLiteキャッシュを使用）"""
         self.config = get_config()
         
         self.status = {
@@ -29,72 +83,164 @@ class ECAIIntegrationEngine:
             "ec_apis_connected": False,
             "automation_running": False
         }
+        self._session = None
+        self._cache = cache
+        self._owns_cache = False
+        self._cache_enabled = cache is not None or self.config.ai_cache_ttl > 0
         
         print("🚀 EC AI統合エンジン初期化完了")
     
-    async def test_gemini_connection(self):
-        """Gemini AI接続テスト"""
+    async def __aenter__(self):
+        """async with 対応"""
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        """終了時にセッションクローズ"""
+        await self.close()
+    
+    def _get_session(self):
+        """共有セッション取得（TCP/TLS接続をkeep-aliveで再利用）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=AI_MAX_CONNECTIONS, keepalive_timeout=60, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=AI_REQUEST_TIMEOUT)
+        return self._session
+    
+    async def close(self):
+        """セッション・キャッシュ接続クローズ"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._owns_cache and self._cache is not None:
+            self._cache.close()
+            self._cache = None
+            self._owns_cache = False
+    
+    def _get_cache(self) -> Optional[AIResponseCache]:
+        """AI応答キャッシュ取得（無効設定・DB未初期化時はNone）"""
+        if self._cache is None and self._cache_enabled:
+            try:
+                cache = AIResponseCache()
+                if not has_table(cache.conn, "ai_response_cache"):
+                    cache.close()
+                    raise sqlite3.OperationalError("ai_response_cache テーブル未作成（python main.py setup で作成）")
+                self._cache = cache
+                self._owns_cache = True
+            except sqlite3.Error as e:
+                print(f"⚠️ AI応答キャッシュ無効: {e}")
+                self._cache_enabled = False
+        return self._cache
+    
+    def cache_stats(self):
+        """AI応答キャッシュのヒット・ミス状況"""
+        cache = self._get_cache()
+        return cache.stats() if cache is not None else None
+    
+    async def _stream_text(self, url, endpoint, extract, max_chars=None, **kwargs):
+        """SSE応答のテキストを逐次返す（max_chars到達で接続を閉じて生成を打ち切り）"""
+        received = 0
+        async with stream_with_retry(
+            self._get_session(), "POST", url, endpoint, timeout=AI_REQUEST_TIMEOUT, **kwargs
+        ) as response:
+            if response.status != 200:
+                raise AIAPIError(f"API応答エラー: {response.status} - {await response.text()}")
+            
+            async for event, data in _iter_sse_events(response):
+                text = extract(event, data)
+                if not text:
+                    continue
+                if max_chars is not None and received + len(text) >= max_chars:
+                    yield text[:max_chars - received]
+                    return
+                received += len(text)
+                yield text
+    
+    def stream_gemini(self, prompt, max_chars=None):
+        """Gemini応答をストリーミング取得（async for で受信順に断片を返す）"""
+        url = (f"{self.config.gemini_api_base_url}/v1beta/models/{GEMINI_MODEL}:streamGenerateContent"
+               f"?alt=sse&key={self.config.gemini_api_key}")
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }]
+        }
+        return self._stream_text(url, "gemini.streamGenerateContent", _gemini_chunk_text, max_chars, json=payload)
+    
+    def stream_claude(self, prompt, max_chars=None, max_tokens=1024):
+        """Claude応答をストリーミング取得（async for で受信順に断片を返す）"""
+        url = f"{self.config.anthropic_api_base_url}/v1/messages"
+        headers = {
+            'x-api-key': self.config.claude_api_key,
+            'Content-Type': 'application/json',
+            'anthropic-version': '2023-06-01'
+        }
+        payload = {
+            'model': CLAUDE_MODEL,
+            'max_tokens': max_tokens,
+            'stream': True,
+            'messages': [{
+                'role': 'user',
+                'content': prompt
+            }]
+        }
+        return self._stream_text(
+            url, "anthropic.messages", _claude_chunk_text, max_chars, headers=headers, json=payload
+        )
+    
+    async def test_gemini_connection(self, data=None, max_chars=None):
+        """Gemini AI接続テスト（data: 分析対象データ、max_chars: 受信打ち切り文字数）"""
         try:
             if not self.config.gemini_api_key:
                 return False, "Gemini APIキーが設定されていません"
             
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={self.config.gemini_api_key}"
+            prompt = "ECサイトの売上を20%向上させる具体的な施策を3つ提案してください。"
+            # 途中で打ち切った応答は全文と区別して保存
+            cache_data = data if max_chars is None else {"data": data, "max_chars": max_chars}
+            cache = self._get_cache()
+            cached = cache.get("gemini", GEMINI_MODEL, prompt, cache_data) if cache is not None else None
+            if cached is not None:
+                print("✅ Gemini AI応答（キャッシュ）")
+                return True, cached
             
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": "ECサイトの売上を20%向上させる具体的な施策を3つ提案してください。"
-                    }]
-                }]
-            }
+            text = "".join([chunk async for chunk in self.stream_gemini(prompt, max_chars)])
+            if not text:
+                return False, "API応答が空です"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if 'candidates' in data:
-                            print("✅ Gemini AI接続成功")
-                            return True, data['candidates'][0]['content']['parts'][0]['text']
-                    else:
-                        error_text = await response.text()
-                        return False, f"API応答エラー: {response.status} - {error_text}"
+            print("✅ Gemini AI接続成功")
+            if cache is not None:
+                cache.set("gemini", GEMINI_MODEL, prompt, text, cache_data)
+            return True, text
             
         except Exception as e:
             print(f"❌ Gemini AI接続エラー: {e}")
             return False, str(e)
     
-    async def test_claude_connection(self):
-        """Claude AI接続テスト"""
+    async def test_claude_connection(self, data=None, max_chars=None):
+        """Claude AI接続テスト（data: 分析対象データ、max_chars: 受信打ち切り文字数）"""
         try:
             if not self.config.claude_api_key:
                 return False, "Claude APIキーが設定されていません"
             
-            url = "https://api.anthropic.com/v1/messages"
-            headers = {
-                'x-api-key': self.config.claude_api_key,
-                'Content-Type': 'application/json',
-                'anthropic-version': '2023-06-01'
-            }
+            prompt = 'Amazon・楽天出店者の利益最大化戦略を具体的に3つ提案してください。'
+            # 途中で打ち切った応答は全文と区別して保存
+            cache_data = data if max_chars is None else {"data": data, "max_chars": max_chars}
+            cache = self._get_cache()
+            cached = cache.get("claude", CLAUDE_MODEL, prompt, cache_data) if cache is not None else None
+            if cached is not None:
+                print("✅ Claude AI応答（キャッシュ）")
+                return True, cached
             
-            payload = {
-                'model': 'claude-3-sonnet-20240229',
-                'max_tokens': 200,
-                'messages': [{
-                    'role': 'user',
-                    'content': 'Amazon・楽天出店者の利益最大化戦略を具体的に3つ提案してください。'
-                }]
-            }
+            text = "".join([chunk async for chunk in self.stream_claude(prompt, max_chars, max_tokens=200)])
+            if not text:
+                return False, "API応答が空です"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if 'content' in data:
-                            print("✅ Claude AI接続成功")
-                            return True, data['content'][0]['text']
-                    else:
-                        error_text = await response.text()
-                        return False, f"API応答エラー: {response.status} - {error_text}"
+            print("✅ Claude AI接続成功")
+            if cache is not None:
+                cache.set("claude", CLAUDE_MODEL, prompt, text, cache_data)
+            return True, text
             
         except Exception as e:
             print(f"❌ Claude AI接続エラー: {e}")
@@ -120,9 +266,11 @@ class ECAIIntegrationEngine:
             }
         }
         
-        # AI分析実行
-        gemini_success, gemini_analysis = await self.test_gemini_connection()
-        claude_success, claude_analysis = await self.test_claude_connection()
+        # AI分析実行（Gemini・Claudeを並行実行し、所要時間を遅い方に揃える）
+        (gemini_success, gemini_analysis), (claude_success, claude_analysis) = await asyncio.gather(
+            self.test_gemini_connection(sample_data, ANALYSIS_PREVIEW_CHARS),
+            self.test_claude_connection(sample_data, ANALYSIS_PREVIEW_CHARS)
+        )
         
         analysis_result = {
             "timestamp": datetime.now().isoformat(),
@@ -130,11 +278,11 @@ class ECAIIntegrationEngine:
             "ai_insights": {
                 "gemini": {
                     "connected": gemini_success,
-                    "analysis": gemini_analysis[:200] if gemini_success else "接続失敗"
+                    "analysis": gemini_analysis if gemini_success else "接続失敗"
                 },
                 "claude": {
                     "connected": claude_success,
-                    "analysis": claude_analysis[:200] if claude_success else "接続失敗"
+                    "analysis": claude_analysis if claude_success else "接続失敗"
                 }
             },
             "recommendations": self.generate_recommendations(sample_data),
@@ -218,6 +366,9 @@ class ECAIIntegrationEngine:
         print("\n🤖 AI分析状況:")
         print(f"Gemini AI: {'✅ 接続済み' if analysis_result['ai_insights']['gemini']['connected'] else '❌ 接続失敗'}")
         print(f"Claude AI: {'✅ 接続済み' if analysis_result['ai_insights']['claude']['connected'] else '❌ 接続失敗'}")
+        cache_stats = self.cache_stats()
+        if cache_stats:
+            print(f"💾 AI応答キャッシュ: ヒット{cache_stats['hits']}件 / ミス{cache_stats['misses']}件 (保存{cache_stats['entries']}件)")
         
         print("\n💡 推奨アクション:")
         for i, rec in enumerate(analysis_result['recommendations'], 1):
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC AI統合エンジン - AI応答キャッシュ
+プロバイダー・モデル・プロンプト＋分析データのハッシュをキーにSQLiteへ保存
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+import sys
+from typing import Any, Dict, Optional
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.settings import get_config
+from src.database.schema import connect
+
+
+def make_cache_key(provider: str, model: str, prompt: str, data: Any = None) -> str:
+    """キャッシュキー生成（分析データはキー順を固定してハッシュ）"""
+    content = json.dumps(
+        {"prompt": prompt, "data": data}, ensure_ascii=False, sort_keys=True, default=str
+    )
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"{provider}:{model}:{digest}"
+
+
+class AIResponseCache:
+    """AI応答キャッシュ（TTL付き・件数上限超過時はLRUで削除）"""
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None,
+                 ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """初期化（接続未指定時は DATABASE_PATH に接続）"""
+        config = get_config()
+        self._owns_connection = conn is None
+        self.conn = conn or connect()
+        self.ttl = ttl if ttl is not None else config.ai_cache_ttl
+        self.max_entries = max_entries if max_entries is not None else config.ai_cache_max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, provider: str, model: str, prompt: str, data: Any = None) -> Optional[str]:
+        """キャッシュ済み応答取得（期限切れ・未登録はNone）"""
+        key = make_cache_key(provider, model, prompt, data)
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT response FROM ai_response_cache WHERE cache_key = ? AND created_at > ?",
+            (key, now - self.ttl)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self.conn:
+            self.conn.execute(
+                "UPDATE ai_response_cache SET last_used_at = ?, hit_count = hit_count + 1 "
+                "WHERE cache_key = ?",
+                (now, key)
+            )
+        return row[0]
+
+    def set(self, provider: str, model: str, prompt: str, response: str, data: Any = None):
+        """応答保存（期限切れ削除と件数上限の追い出しも行う）"""
+        key = make_cache_key(provider, model, prompt, data)
+        now = time.time()
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO ai_response_cache (cache_key, provider, model, response, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET
+                    response = excluded.response,
+                    created_at = excluded.created_at,
+                    last_used_at = excluded.last_used_at,
+                    hit_count = 0
+            """, (key, provider, model, response, now, now))
+            self.conn.execute(
+                "DELETE FROM ai_response_cache WHERE created_at <= ?", (now - self.ttl,)
+            )
+            self.conn.execute("""
+                DELETE FROM ai_response_cache WHERE cache_key IN (
+                    SELECT cache_key FROM ai_response_cache
+                    ORDER BY last_used_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def clear(self):
+        """全件削除"""
+        with self.conn:
+            self.conn.execute("DELETE FROM ai_response_cache")
+
+    def stats(self) -> Dict:
+        """ヒット・ミス件数と保存件数"""
+        entries = self.conn.execute("SELECT COUNT(*) FROM ai_response_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries
+        }
+
+    def close(self):
+        """自前で開いた接続をクローズ"""
+        if self._owns_connection:
+            self.conn.close()
@@ -7,7 +7,7 @@ Amazon SP-API 接続モジュール - セキュア版
 import requests
 import json
 import webbrowser
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import sys
 
@@ -24,12 +24,15 @@ class AmazonSPAPIConnector:
         self.amazon_config = self.config.amazon_config
         
         # SP-API エンドポイント
-        self.api_base_url = "https://sellingpartnerapi-fe.amazon.com"
-        self.auth_base_url = "https://api.amazon.com/auth/o2"
+        self.api_base_url = self.config.amazon_sp_api_base_url
+        self.auth_base_url = self.config.amazon_auth_base_url
         
         # 日本マーケットプレイスID
         self.marketplace_id = "A1VC38T7YXB528"
         
+        # SP-API非同期クライアント（初回利用時に生成）
+        self._client = None
+        
         print("🔍 Amazon SP-API コネクター初期化完了")
     
     def get_authorization_url(self):
@@ -73,6 +76,115 @@ class AmazonSPAPIConnector:
             "data_source": "mock"
         }
     
+    async def get_sales_data_async(self, days=7):
+        """売上データ取得（SP-API実データ・未設定時はモック）"""
+        if not self.check_connection_status()["ready_for_api_calls"]:
+            return self.get_sales_data(days)
+        
+        try:
+            client = self.get_client()
+            return await client.get_sales_data(days)
+        except Exception as e:
+            print(f"❌ SP-API売上データ取得エラー: {e}")
+            return self.get_sales_data(days)
+    
+    async def iter_orders(self, days=7):
+        """直近N日の注文をページ単位で返す（非同期ジェネレーター）"""
+        created_after = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        async for orders in self.get_client().iter_order_pages(created_after=created_after):
+            yield orders
+    
+    async def ingest_orders(self, days=7):
+        """直近N日の注文をページ単位でDBに取り込み"""
+        from src.amazon_connector.sp_api_client import order_to_sales_rows
+        from src.database.sales_writer import SalesWriter
+        
+        writer = SalesWriter()
+        try:
+            stats = await writer.consume(self.iter_orders(days), order_to_sales_rows)
+        finally:
+            writer.close()
+        print(f"✅ Amazon注文取り込み完了: {stats['pages']}ページ / {stats['upserted']}件")
+        return stats
+    
+    async def sync_orders_incremental(self, overlap_minutes=None, initial_days=7):
+        """前回同期以降に更新された注文のみ取り込み（LastUpdatedAfter）"""
+        from src.amazon_connector.sp_api_client import order_to_sales_rows
+        from src.database.sales_writer import SalesWriter
+        from src.database.sync_state import SyncStateStore, format_utc
+        
+        if overlap_minutes is None:
+            overlap_minutes = self.config.sync_overlap_minutes
+        account = self.amazon_config['seller_id'] or self.amazon_config['client_id']
+        
+        writer = SalesWriter()
+        state = SyncStateStore(writer.conn)
+        try:
+            start = state.get_sync_start(
+                self.marketplace_id, account, timedelta(minutes=overlap_minutes), initial_days
+            )
+            # SP-APIは直近2分以内の更新を保証しないため、その手前を到達点とする
+            cutoff = datetime.now(timezone.utc) - timedelta(minutes=2)
+            
+            pages = self.get_client().iter_order_pages(last_updated_after=format_utc(start))
+            stats = await writer.consume(pages, order_to_sales_rows)
+            
+            # 全ページ取り込み成功後にのみ到達点を進める（途中失敗時は次回再取得）
+            state.set(self.marketplace_id, account, cutoff, stats['upserted'] + stats['deleted'])
+        finally:
+            writer.close()
+        
+        print(f"✅ Amazon差分同期完了: {format_utc(start)} 以降 {stats['upserted']}件更新 / {stats['deleted']}件キャンセル")
+        return stats
+    
+    async def ingest_order_report(self, days=30, poll_interval=15.0):
+        """注文フラットファイルレポートで直近N日を一括取り込み（バックフィル・日次照合用）"""
+        from src.amazon_connector.reports import ORDER_REPORT_TYPE, ReportBulkLoader, SPAPIReportsClient
+        from src.database.sync_state import format_utc
+        
+        reports = SPAPIReportsClient(self.get_client(), poll_interval=poll_interval)
+        start = format_utc(datetime.now(timezone.utc) - timedelta(days=days))
+        
+        loader = ReportBulkLoader()
+        try:
+            stats = await loader.load_orders(reports.iter_report_rows(ORDER_REPORT_TYPE, data_start_time=start))
+        finally:
+            loader.close()
+        print(f"✅ Amazon注文レポート取り込み完了: {stats['lines']}明細 / {stats['upserted']}件更新 / {stats['deleted']}件キャンセル")
+        return stats
+    
+    async def ingest_inventory_report(self, poll_interval=15.0):
+        """出品レポートで在庫数を一括反映"""
+        from src.amazon_connector.reports import INVENTORY_REPORT_TYPE, ReportBulkLoader, SPAPIReportsClient
+        
+        reports = SPAPIReportsClient(self.get_client(), poll_interval=poll_interval)
+        
+        loader = ReportBulkLoader()
+        try:
+            stats = await loader.load_inventory(reports.iter_report_rows(INVENTORY_REPORT_TYPE))
+        finally:
+            loader.close()
+        print(f"✅ Amazon在庫レポート取り込み完了: {stats['rows']}SKU（新規 {stats['inserted']}件）")
+        return stats
+    
+    def get_client(self):
+        """SP-API非同期クライアント取得（接続・トークンを使い回す）"""
+        if self._client is None:
+            from src.amazon_connector.sp_api_client import AmazonSPAPIClient
+            self._client = AmazonSPAPIClient(
+                amazon_config=self.amazon_config,
+                api_base_url=self.api_base_url,
+                auth_base_url=self.auth_base_url,
+                marketplace_id=self.marketplace_id
+            )
+        return self._client
+    
+    async def close(self):
+        """SP-APIクライアントのセッションクローズ"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
     def check_connection_status(self):
         """接続状況確認"""
         config_check = {
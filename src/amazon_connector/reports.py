@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Amazon SP-API Reports API 一括取り込み
+レポート作成→完了待ち→gzipフラットファイルをストリーム展開→executemanyで一括投入
+"""
+
+import asyncio
+import codecs
+import sqlite3
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.amazon_connector.sp_api_client import AmazonSPAPIClient, SPAPIError, parse_order_date
+from src.database.schema import connect
+
+REPORTS_API_PATH = "/reports/2021-06-30"
+ORDER_REPORT_TYPE = "GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_GENERAL"
+INVENTORY_REPORT_TYPE = "GET_MERCHANT_LISTINGS_ALL_DATA"
+
+# 日本マーケットプレイスのフラットファイルはWindows-31J（Content-Typeにcharsetがあればそちらを優先）
+DEFAULT_REPORT_ENCODING = "cp932"
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# 注文合計（getOrders の OrderTotal 相当）を構成する列（割引列は負数で出力される）
+ORDER_AMOUNT_COLUMNS = (
+    "item-price", "shipping-price", "gift-wrap-price",
+    "item-promotion-discount", "ship-promotion-discount"
+)
+CANCELED_STATUS = "Cancelled"
+
+
+class SPAPIReportsClient:
+    """Reports API クライアント（AmazonSPAPIClient のセッション・レート制限を共有）"""
+
+    def __init__(self, client: AmazonSPAPIClient, poll_interval: float = 15.0, max_wait: float = 1800.0):
+        """初期化"""
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+
+    async def create_report(self, report_type: str, data_start_time: Optional[str] = None,
+                            data_end_time: Optional[str] = None) -> str:
+        """レポート作成依頼（createReport）"""
+        body = {"reportType": report_type, "marketplaceIds": [self.client.marketplace_id]}
+        if data_start_time:
+            body["dataStartTime"] = data_start_time
+        if data_end_time:
+            body["dataEndTime"] = data_end_time
+
+        result = await self.client.request(
+            "POST", f"{REPORTS_API_PATH}/reports", "createReport", json_body=body, idempotent=False
+        )
+        return result["reportId"]
+
+    async def get_report(self, report_id: str) -> Dict:
+        """レポート状態取得（getReport）"""
+        return await self.client.request(
+            "GET", f"{REPORTS_API_PATH}/reports/{report_id}", "getReport"
+        )
+
+    async def get_report_document(self, document_id: str) -> Dict:
+        """レポートドキュメント情報取得（getReportDocument）"""
+        return await self.client.request(
+            "GET", f"{REPORTS_API_PATH}/documents/{document_id}", "getReportDocument"
+        )
+
+    async def wait_for_report(self, report_id: str) -> Optional[str]:
+        """レポート完了待ち（完了時はドキュメントID、データなしはNone）"""
+        deadline = time.monotonic() + self.max_wait
+
+        while True:
+            report = await self.get_report(report_id)
+            status = report.get("processingStatus")
+
+            if status == "DONE":
+                return report["reportDocumentId"]
+            if status == "CANCELLED":
+                # 対象期間にデータがない場合もCANCELLEDになる
+                return None
+            if status == "FATAL":
+                raise SPAPIError(500, f"レポート生成失敗: {report_id}", "getReport")
+            if time.monotonic() >= deadline:
+                raise SPAPIError(504, f"レポート生成待ちタイムアウト: {report_id}", "getReport")
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def iter_document_rows(self, document: Dict) -> AsyncIterator[Dict[str, str]]:
+        """レポート本体をダウンロードしながら1行ずつ返す（全体をメモリに載せない）"""
+        decompressor = None
+        if document.get("compressionAlgorithm") == "GZIP":
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        # 署名付きURLのためSP-APIの認証ヘッダーは付けない・大容量のため全体タイムアウトなし
+        session = self.client._get_session()
+        timeout = aiohttp.ClientTimeout(total=None, connect=10, sock_read=60)
+        async with session.get(document["url"], timeout=timeout) as response:
+            if response.status >= 400:
+                raise SPAPIError(response.status, await response.text(), "reportDownload")
+
+            decoder = codecs.getincrementaldecoder(_report_encoding(response.charset))("replace")
+            header: Optional[List[str]] = None
+            pending = ""
+
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+                lines = (pending + decoder.decode(chunk)).split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    header, row = _parse_line(header, line)
+                    if row is not None:
+                        yield row
+
+            tail = decompressor.flush() if decompressor is not None else b""
+            pending += decoder.decode(tail, final=True)
+            if pending:
+                header, row = _parse_line(header, pending)
+                if row is not None:
+                    yield row
+
+    async def iter_report_rows(self, report_type: str, data_start_time: Optional[str] = None,
+                               data_end_time: Optional[str] = None) -> AsyncIterator[Dict[str, str]]:
+        """レポート作成から行の読み出しまで一括実行"""
+        report_id = await self.create_report(report_type, data_start_time, data_end_time)
+        document_id = await self.wait_for_report(report_id)
+        if document_id is None:
+            return
+
+        document = await self.get_report_document(document_id)
+        async for row in self.iter_document_rows(document):
+            yield row
+
+
+def _report_encoding(charset: Optional[str]) -> str:
+    """レスポンスのcharsetをPythonのコーデック名に変換（Windows-31J等の未登録名はcp932扱い）"""
+    if charset:
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            pass
+    return DEFAULT_REPORT_ENCODING
+
+
+def _parse_line(header: Optional[List[str]], line: str):
+    """TSV1行を解析（1行目はヘッダー）"""
+    line = line.rstrip("\r")
+    if not line:
+        return header, None
+    values = line.split("\t")
+    if header is None:
+        return values, None
+    return header, dict(zip(header, values))
+
+
+def _to_int(value: Optional[str]) -> int:
+    """フラットファイルの数値列を整数化（空欄は0）"""
+    try:
+        return int(float(value)) if value else 0
+    except ValueError:
+        return 0
+
+
+class ReportBulkLoader:
+    """レポート行をsales/inventoryテーブルへ一括投入"""
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None, batch_size: int = 10000):
+        """初期化（接続未指定時は DATABASE_PATH に接続）"""
+        self._owns_connection = conn is None
+        self.conn = conn or connect()
+        self.batch_size = batch_size
+
+    async def load_orders(self, rows: AsyncIterator[Dict[str, str]]) -> Dict:
+        """注文レポート（明細単位）を注文単位に集約してupsert"""
+        # 同一注文の明細が連続する保証はないため、一時テーブルに貯めてから集約する
+        self.conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS report_order_lines (
+                order_id TEXT NOT NULL,
+                date TEXT NOT NULL,
+                amount INTEGER NOT NULL,
+                canceled INTEGER NOT NULL
+            )
+        """)
+        with self.conn:
+            self.conn.execute("DELETE FROM report_order_lines")
+
+        line_count = 0
+        batch: List[tuple] = []
+        async for row in rows:
+            order_id = row.get("amazon-order-id")
+            if not order_id or not row.get("purchase-date"):
+                continue
+            item_canceled = row.get("item-status") == CANCELED_STATUS
+            batch.append((
+                order_id,
+                parse_order_date(row["purchase-date"]),
+                0 if item_canceled else sum(_to_int(row.get(col)) for col in ORDER_AMOUNT_COLUMNS),
+                1 if row.get("order-status") == CANCELED_STATUS else 0
+            ))
+            if len(batch) >= self.batch_size:
+                line_count += self._stage_order_lines(batch)
+                batch = []
+        if batch:
+            line_count += self._stage_order_lines(batch)
+
+        with self.conn:
+            # total_changes はロールアップトリガー分も数えるため rowcount を使う
+            upserted = self.conn.execute("""
+                INSERT INTO sales (date, amount, platform, order_id, sku)
+                SELECT MIN(date), SUM(amount), 'amazon', order_id, ''
+                FROM report_order_lines
+                GROUP BY order_id
+                HAVING MAX(canceled) = 0
+                ON CONFLICT(platform, order_id, sku) WHERE order_id IS NOT NULL
+                DO UPDATE SET date = excluded.date, amount = excluded.amount
+                WHERE date IS NOT excluded.date OR amount IS NOT excluded.amount
+            """).rowcount
+
+            deleted = self.conn.execute("""
+                DELETE FROM sales
+                WHERE platform = 'amazon' AND order_id IN (
+                    SELECT order_id FROM report_order_lines GROUP BY order_id HAVING MAX(canceled) = 1
+                )
+            """).rowcount
+
+            self.conn.execute("DELETE FROM report_order_lines")
+
+        if upserted or deleted:
+            from src.automation_engine_24h import invalidate_dashboard_snapshot
+            invalidate_dashboard_snapshot()
+
+        return {"lines": line_count, "upserted": upserted, "deleted": deleted}
+
+    def _stage_order_lines(self, batch: List[tuple]) -> int:
+        """注文明細を一時テーブルへ投入"""
+        with self.conn:
+            self.conn.executemany("INSERT INTO report_order_lines VALUES (?, ?, ?, ?)", batch)
+        return len(batch)
+
+    async def load_inventory(self, rows: AsyncIterator[Dict[str, str]]) -> Dict:
+        """出品レポートの在庫数をSKU単位で反映"""
+        updated_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        result = {"rows": 0, "inserted": 0}
+
+        batch: List[Dict] = []
+        async for row in rows:
+            sku = row.get("seller-sku")
+            # FBA出品は quantity が空欄（出品者在庫のみ対象）
+            if not sku or not row.get("quantity"):
+                continue
+            batch.append({"sku": sku, "stock": _to_int(row["quantity"]), "updated_at": updated_at})
+            if len(batch) >= self.batch_size:
+                self._write_inventory(batch, result)
+                batch = []
+        if batch:
+            self._write_inventory(batch, result)
+
+        if result["rows"]:
+            from src.automation_engine_24h import invalidate_dashboard_snapshot
+            invalidate_dashboard_snapshot()
+
+        return result
+
+    def _write_inventory(self, batch: List[Dict], result: Dict):
+        """在庫行を1トランザクションで更新・追加"""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE inventory SET stock = :stock, updated_at = :updated_at WHERE sku = :sku",
+                batch
+            )
+            result["inserted"] += self.conn.executemany("""
+                INSERT INTO inventory (sku, stock, updated_at)
+                SELECT :sku, :stock, :updated_at
+                WHERE NOT EXISTS (SELECT 1 FROM inventory WHERE sku = :sku)
+            """, batch).rowcount
+        result["rows"] += len(batch)
+
+    def close(self):
+        """自前で開いた接続をクローズ"""
+        if self._owns_connection:
+            self.conn.close()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Amazon SP-API 非同期クライアント
+共有aiohttpセッション（keep-alive）＋ LWAアクセストークンキャッシュ
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.settings import get_config
+from src.rate_limiter import SPAPIRateLimiter
+from src.resilience import (
+    RetryPolicy, default_timeout, get_circuit_breaker, parse_retry_after, request_with_retry
+)
+
+SP_API_BASE_URL = "https://sellingpartnerapi-fe.amazon.com"
+LWA_AUTH_BASE_URL = "https://api.amazon.com/auth/o2"
+JP_MARKETPLACE_ID = "A1VC38T7YXB528"
+JST = timezone(timedelta(hours=9))
+
+# 有効期限のこの秒数前にトークンを更新する
+TOKEN_REFRESH_MARGIN = 300
+
+
+class SPAPIError(Exception):
+    """SP-API呼び出しエラー"""
+
+    def __init__(self, status: int, message: str, operation: Optional[str] = None):
+        """初期化"""
+        super().__init__(f"{operation or 'SP-API'} {status}: {message}")
+        self.status = status
+        self.operation = operation
+
+
+class LWATokenCache:
+    """LWAアクセストークンキャッシュ（メモリ＋ディスク）"""
+
+    def __init__(self, cache_path: Optional[Path], credential_key: str):
+        """初期化（credential_keyで認証情報ごとにトークンを区別）"""
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.credential_key = credential_key
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+
+    def _is_valid(self, expires_at: float) -> bool:
+        """更新マージンを残して有効か"""
+        return expires_at - TOKEN_REFRESH_MARGIN > time.time()
+
+    def get(self) -> Optional[str]:
+        """有効なトークン取得（メモリ→ディスクの順）"""
+        if self._token and self._is_valid(self._expires_at):
+            return self._token
+
+        if not self.cache_path or not self.cache_path.exists():
+            return None
+
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get("credential_key") != self.credential_key:
+            return None
+        if not self._is_valid(cached.get("expires_at", 0)):
+            return None
+
+        self._token = cached["access_token"]
+        self._expires_at = cached["expires_at"]
+        return self._token
+
+    def store(self, access_token: str, expires_in: int):
+        """トークン保存"""
+        self._token = access_token
+        self._expires_at = time.time() + expires_in
+
+        if not self.cache_path:
+            return
+
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            # アクセストークンのため所有者のみ読み書き可能にする
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({
+                    "credential_key": self.credential_key,
+                    "access_token": access_token,
+                    "expires_at": self._expires_at
+                }, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠️ LWAトークンキャッシュ保存エラー: {e}")
+
+    def clear(self):
+        """トークン破棄（401受信時など）"""
+        self._token = None
+        self._expires_at = 0.0
+        if self.cache_path:
+            try:
+                self.cache_path.unlink()
+            except OSError:
+                pass
+
+
+class AmazonSPAPIClient:
+    """Amazon SP-API 非同期クライアント"""
+
+    def __init__(self, amazon_config: Optional[Dict] = None,
+                 api_base_url: str = SP_API_BASE_URL,
+                 auth_base_url: str = LWA_AUTH_BASE_URL,
+                 marketplace_id: str = JP_MARKETPLACE_ID,
+                 token_cache_path: Optional[Path] = None,
+                 max_connections: int = 20,
+                 rate_limiter: Optional[SPAPIRateLimiter] = None,
+                 max_throttle_retries: int = 5,
+                 retry_policy: Optional[RetryPolicy] = None):
+        """初期化"""
+        config = get_config()
+        self.amazon_config = amazon_config or config.amazon_config
+        self.api_base_url = api_base_url.rstrip("/")
+        self.auth_base_url = auth_base_url.rstrip("/")
+        self.marketplace_id = marketplace_id
+        self.max_connections = max_connections
+        self.rate_limiter = rate_limiter or SPAPIRateLimiter()
+        self.max_throttle_retries = max_throttle_retries
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        if token_cache_path is None:
+            token_cache_path = config.get_database_path().parent / "amazon_lwa_token.json"
+        credential_key = hashlib.sha256(
+            f"{self.amazon_config.get('client_id')}:{self.amazon_config.get('refresh_token')}".encode("utf-8")
+        ).hexdigest()
+        self.token_cache = LWATokenCache(token_cache_path, credential_key)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._token_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        """async with 対応"""
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """終了時にセッションクローズ"""
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """共有セッション取得（TCP/TLS接続をkeep-aliveで再利用）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, keepalive_timeout=60, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=default_timeout()
+            )
+        return self._session
+
+    async def close(self):
+        """セッションクローズ"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get_access_token(self, force_refresh: bool = False) -> str:
+        """LWAアクセストークン取得（期限切れ前のみ再発行）"""
+        if not force_refresh:
+            token = self.token_cache.get()
+            if token:
+                return token
+
+        # 同時に期限切れを検知した複数リクエストで1回だけ発行する
+        async with self._token_lock:
+            if not force_refresh:
+                token = self.token_cache.get()
+                if token:
+                    return token
+
+            data = {
+                "grant_type": "refresh_token",
+                "refresh_token": self.amazon_config["refresh_token"],
+                "client_id": self.amazon_config["client_id"],
+                "client_secret": self.amazon_config["client_secret"]
+            }
+            response = await request_with_retry(
+                self._get_session(), "POST", f"{self.auth_base_url}/token", "amazon.lwa_token",
+                policy=self.retry_policy, data=data
+            )
+            if response.status != 200:
+                raise SPAPIError(response.status, response.text, "LWA token")
+            result = response.json()
+
+            self.token_cache.store(result["access_token"], int(result.get("expires_in", 3600)))
+            return result["access_token"]
+
+    async def request(self, method: str, path: str, operation: str,
+                      params: Optional[Dict] = None, json_body: Optional[Dict] = None,
+                      idempotent: bool = True) -> Dict:
+        """SP-API呼び出し（オペレーション別レート制限・429再試行・障害時バックオフ付き）
+
+        idempotent=False（createReport等の作成操作）では5xx・通信エラーを再送しない
+        （処理済みか不明なまま再送すると重複作成になるため）。
+        """
+        session = self._get_session()
+        breaker = get_circuit_breaker(f"sp_api.{operation}")
+        auth_retried = False
+        throttle_retries = 0
+        error_retries = 0
+
+        while True:
+            token = await self.get_access_token()
+            headers = {
+                "x-amz-access-token": token,
+                "Accept": "application/json"
+            }
+            await self.rate_limiter.acquire(operation)
+            breaker.before_call()
+            retry_after = None
+            try:
+                async with session.request(
+                    method, f"{self.api_base_url}{path}",
+                    params=params, json=json_body, headers=headers
+                ) as response:
+                    self.rate_limiter.on_response(operation, response.status, response.headers)
+
+                    # 失効済みトークン（キャッシュ破損・取り消し）は1回だけ再発行して再試行
+                    if response.status in (401, 403) and not auth_retried:
+                        auth_retried = True
+                        self.token_cache.clear()
+                        continue
+                    # スロットリングはリミッターが待機時間を調整済みのため再送する
+                    if response.status == 429 and throttle_retries < self.max_throttle_retries:
+                        throttle_retries += 1
+                        continue
+                    if response.status < 500:
+                        breaker.record_success()
+                        if response.status >= 400:
+                            raise SPAPIError(response.status, await response.text(), operation)
+                        return await response.json()
+
+                    breaker.record_failure()
+                    if error_retries >= self.retry_policy.max_retries or not idempotent:
+                        raise SPAPIError(response.status, await response.text(), operation)
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                breaker.record_failure()
+                if error_retries >= self.retry_policy.max_retries or not idempotent:
+                    raise
+
+            # 5xx・通信エラーは指数バックオフで再試行
+            await asyncio.sleep(self.retry_policy.backoff(error_retries, retry_after))
+            error_retries += 1
+
+    async def get_orders(self, created_after: Optional[str] = None,
+                         last_updated_after: Optional[str] = None,
+                         next_token: Optional[str] = None) -> Dict:
+        """注文一覧1ページ取得（getOrders）"""
+        params = {"MarketplaceIds": self.marketplace_id}
+        if next_token:
+            params["NextToken"] = next_token
+        elif last_updated_after:
+            params["LastUpdatedAfter"] = last_updated_after
+        else:
+            params["CreatedAfter"] = created_after
+
+        result = await self.request("GET", "/orders/v0/orders", "getOrders", params=params)
+        return result.get("payload", {})
+
+    async def iter_order_pages(self, created_after: Optional[str] = None,
+                               last_updated_after: Optional[str] = None) -> AsyncIterator[List[Dict]]:
+        """注文をページ単位で返す（処理中に次ページを先読み、保持は最大2ページ）"""
+        fetch = asyncio.ensure_future(
+            self.get_orders(created_after=created_after, last_updated_after=last_updated_after)
+        )
+        try:
+            while fetch is not None:
+                payload = await fetch
+                next_token = payload.get("NextToken")
+                fetch = asyncio.ensure_future(self.get_orders(next_token=next_token)) if next_token else None
+
+                orders = payload.get("Orders", [])
+                if orders:
+                    yield orders
+        finally:
+            if fetch is not None and not fetch.done():
+                fetch.cancel()
+
+    async def get_sales_data(self, days: int = 7) -> Dict:
+        """売上データ取得（get_sales_data と同じ形式）"""
+        created_after = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        daily_sales: Dict[str, int] = {}
+        total_sales = 0
+        total_orders = 0
+
+        async for orders in self.iter_order_pages(created_after=created_after):
+            for order in orders:
+                if order.get("OrderStatus") == "Canceled":
+                    continue
+                amount = int(float(order.get("OrderTotal", {}).get("Amount", 0) or 0))
+                order_date = parse_order_date(order["PurchaseDate"])
+                daily_sales[order_date] = daily_sales.get(order_date, 0) + amount
+                total_sales += amount
+                total_orders += 1
+
+        return {
+            "total_sales": total_sales,
+            "total_orders": total_orders,
+            "avg_order_value": int(total_sales / total_orders) if total_orders else 0,
+            "daily_sales": dict(sorted(daily_sales.items())),
+            "period_days": days,
+            "data_source": "sp_api"
+        }
+
+
+def parse_order_date(timestamp: str) -> str:
+    """SP-APIのUTC日時を日本時間の日付に変換"""
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).astimezone(JST).date().isoformat()
+
+
+def order_to_sales_rows(order: Dict) -> List[Dict]:
+    """SP-API注文を売上テーブル行に変換（注文単位）"""
+    return [{
+        "platform": "amazon",
+        "order_id": order["AmazonOrderId"],
+        "sku": "",
+        "date": parse_order_date(order["PurchaseDate"]),
+        "amount": int(float((order.get("OrderTotal") or {}).get("Amount", 0) or 0)),
+        "canceled": order.get("OrderStatus") == "Canceled"
+    }]
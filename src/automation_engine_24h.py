@@ -2,10 +2,16 @@
 # -*- coding: utf-8 -*-
 """24時間自動化エンジン - ダッシュボード用データ生成スクリプト"""
 
+import asyncio
+import copy
+import os
 import sqlite3
-import json
+import threading
+import time
+import traceback
 from datetime import date, timedelta, datetime
 from pathlib import Path
+from typing import Callable, Optional, Tuple
 import sys
 
 # プロジェクトルートをパスに追加
@@ -13,101 +19,402 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from config.settings import get_config
+from src.database.schema import connect, has_table
+from src.dashboard.snapshot_writer import get_snapshot_writer
 
 
-def fetch_dashboard_data():
-    """SQLiteデータベースから売上・在庫・利益情報を取得しJSON出力"""
-    config = get_config()
-    db_path = config.get_database_path()
+class DashboardQueryEngine:
+    """ダッシュボード集計クエリエンジン（テーブルごとに1パスで集計）"""
 
-    if not db_path.exists():
-        raise FileNotFoundError(f"データベースが見つかりません: {db_path}")
+    # 売上: 日次ロールアップから期間分の日数行だけを読む
+    SALES_QUERY = """
+        SELECT date, amount AS total, order_count AS orders
+        FROM sales_daily
+        WHERE date BETWEEN ? AND ?
+        ORDER BY date
+    """
+
+    # 売上（ロールアップ未作成DB用）: 期間内の行を1回だけ走査
+    SALES_RAW_QUERY = """
+        WITH window_sales AS (
+            SELECT date, amount FROM sales WHERE date BETWEEN ? AND ?
+        )
+        SELECT date, SUM(amount) AS total, COUNT(*) AS orders
+        FROM window_sales
+        GROUP BY date
+        ORDER BY date
+    """
+
+    # 在庫: 件数・平均充足率は1回の走査、要補充数は部分インデックス idx_inventory_low_stock のみ参照
+    # （WHERE句を部分インデックスの条件と一致させ、要補充行だけを数える）
+    INVENTORY_QUERY = """
+        SELECT
+            COUNT(*) AS total_items,
+            (SELECT COUNT(*) FROM inventory WHERE stock <= reorder_level) AS low_stock,
+            AVG(stock * 1.0 / CASE WHEN capacity = 0 THEN NULL ELSE capacity END) AS stock_ratio
+        FROM inventory
+    """
+
+    # 利益: 今日分と週間分を1回の走査で取得（{source} は profit_daily または profit）
+    PROFIT_QUERY = """
+        WITH window_profit AS (
+            SELECT date, profit FROM {source} WHERE date BETWEEN ? AND ?
+        )
+        SELECT
+            SUM(CASE WHEN date = ? THEN profit END) AS today_profit,
+            SUM(profit) AS week_profit
+        FROM window_profit
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """集計対象のDB接続を保持"""
+        self.conn = conn
+        # `python main.py setup` 前のDBでは生テーブルを直接集計する
+        self.use_rollups = has_table(conn, "sales_daily") and has_table(conn, "profit_daily")
+
+    def fetch_sales_summary(self, start_date: date, today: date) -> dict:
+        """売上サマリー取得"""
+        query = self.SALES_QUERY if self.use_rollups else self.SALES_RAW_QUERY
+        cur = self.conn.execute(query, (start_date.isoformat(), today.isoformat()))
 
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
-
-    today = date.today()
-    start_date = today - timedelta(days=6)
-
-    def fetch_one(query: str, params=()):
-        cur.execute(query, params)
-        row = cur.fetchone()
-        return row[0] if row and row[0] is not None else 0
-
-    # 売上データ
-    today_sales = fetch_one(
-        "SELECT SUM(amount) FROM sales WHERE date = ?",
-        (today.isoformat(),),
-    )
-    week_sales = fetch_one(
-        "SELECT SUM(amount) FROM sales WHERE date BETWEEN ? AND ?",
-        (start_date.isoformat(), today.isoformat()),
-    )
-    order_count = fetch_one(
-        "SELECT COUNT(*) FROM sales WHERE date BETWEEN ? AND ?",
-        (start_date.isoformat(), today.isoformat()),
-    )
-    avg_order = int(week_sales / order_count) if order_count else 0
-
-    cur.execute(
-        "SELECT date, SUM(amount) AS total FROM sales WHERE date BETWEEN ? AND ? "
-        "GROUP BY date ORDER BY date",
-        (start_date.isoformat(), today.isoformat()),
-    )
-    daily_sales = {row["date"]: row["total"] for row in cur.fetchall()}
-
-    # 在庫データ
-    total_items = fetch_one("SELECT COUNT(*) FROM inventory")
-    low_stock = fetch_one(
-        "SELECT COUNT(*) FROM inventory WHERE stock <= reorder_level"
-    )
-    stock_ratio = fetch_one(
-        "SELECT AVG(stock_ratio) FROM (SELECT stock * 1.0 / CASE WHEN capacity = 0 THEN NULL ELSE capacity END AS stock_ratio FROM inventory)"
-    )
-
-    # 利益データ
-    today_profit = fetch_one(
-        "SELECT SUM(profit) FROM profit WHERE date = ?",
-        (today.isoformat(),),
-    )
-    week_profit = fetch_one(
-        "SELECT SUM(profit) FROM profit WHERE date BETWEEN ? AND ?",
-        (start_date.isoformat(), today.isoformat()),
-    )
-    profit_rate = (week_profit / week_sales) if week_sales else 0
-
-    conn.close()
-
-    data = {
-        "sales": {
+        daily_sales = {}
+        week_sales = 0
+        order_count = 0
+        for row in cur.fetchall():
+            total = row[1] if row[1] is not None else 0
+            daily_sales[row[0]] = row[1]
+            week_sales += total
+            order_count += row[2]
+
+        today_sales = daily_sales.get(today.isoformat()) or 0
+        avg_order = int(week_sales / order_count) if order_count else 0
+
+        return {
             "today": today_sales,
             "week_total": week_sales,
             "order_count": order_count,
             "avg_order_value": avg_order,
             "daily_sales": daily_sales,
-        },
-        "inventory": {
+        }
+
+    def fetch_inventory_summary(self) -> dict:
+        """在庫サマリー取得"""
+        row = self.conn.execute(self.INVENTORY_QUERY).fetchone()
+        total_items, low_stock, stock_ratio = row if row else (0, 0, None)
+
+        return {
             "stock_ratio": round(stock_ratio * 100, 1) if stock_ratio else 0,
-            "low_stock": low_stock,
-            "total_items": total_items,
-        },
-        "profit": {
+            "low_stock": low_stock or 0,
+            "total_items": total_items or 0,
+        }
+
+    def fetch_profit_summary(self, start_date: date, today: date, week_sales) -> dict:
+        """利益サマリー取得"""
+        source = "profit_daily" if self.use_rollups else "profit"
+        row = self.conn.execute(
+            self.PROFIT_QUERY.format(source=source),
+            (start_date.isoformat(), today.isoformat(), today.isoformat()),
+        ).fetchone()
+        today_profit = row[0] if row and row[0] is not None else 0
+        week_profit = row[1] if row and row[1] is not None else 0
+        profit_rate = (week_profit / week_sales) if week_sales else 0
+
+        return {
             "today_profit": today_profit,
             "week_profit": week_profit,
             "profit_rate": round(profit_rate, 3),
-        },
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    }
+        }
+
+    def build_dashboard_data(self, today: Optional[date] = None) -> dict:
+        """ダッシュボード用の全集計値を取得"""
+        today = today or date.today()
+        start_date = today - timedelta(days=6)
+
+        sales = self.fetch_sales_summary(start_date, today)
+        inventory = self.fetch_inventory_summary()
+        profit = self.fetch_profit_summary(start_date, today, sales["week_total"])
+
+        return {
+            "sales": sales,
+            "inventory": inventory,
+            "profit": profit,
+            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
 
-    output_path = Path("src/dashboard/dashboard_data.json")
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
 
-    print(f"✅ Dashboard data updated: {output_path}")
+def write_dashboard_json(data: dict) -> Path:
+    """ダッシュボード用JSONを出力（アトミック書き込み・差分ファイル付き）"""
+    result = get_snapshot_writer().write(data)
+
+    if result["written"]:
+        print(f"✅ Dashboard data updated: {result['path']} (v{result['version']})")
+    return result["path"]
+
+
+def fetch_dashboard_data(conn: Optional[sqlite3.Connection] = None):
+    """SQLiteデータベースから売上・在庫・利益情報を取得しJSON出力"""
+    if conn is not None:
+        # 呼び出し元（常駐デーモン等）の接続を再利用
+        data = DashboardQueryEngine(conn).build_dashboard_data()
+        write_dashboard_json(data)
+        return data
+
+    config = get_config()
+    db_path = config.get_database_path()
+
+    if not db_path.exists():
+        raise FileNotFoundError(f"データベースが見つかりません: {db_path}")
+
+    conn = connect(db_path)
+    try:
+        data = DashboardQueryEngine(conn).build_dashboard_data()
+    finally:
+        conn.close()
+
+    write_dashboard_json(data)
     return data
 
 
+class DashboardSnapshotCache:
+    """プロセス内ダッシュボードスナップショットキャッシュ（stale-while-revalidate）"""
+
+    def __init__(self, loader: Optional[Callable[[], dict]] = None,
+                 ttl: Optional[float] = None, stale_ttl: Optional[float] = None):
+        """初期化（ttl秒までは新鮮、stale_ttl秒までは古い値を返しつつ裏で更新）"""
+        config = get_config()
+        self.loader = loader or fetch_dashboard_data
+        self.ttl = ttl if ttl is not None else config.dashboard_cache_ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else config.dashboard_cache_stale_ttl
+        # (データ, 計算時刻) を1つのタプルで保持し、更新時は丸ごと差し替える
+        # （ロックなしで読む get() がデータと時刻の食い違った組を見ないため）
+        self._snapshot: Tuple[Optional[dict], float] = (None, 0.0)
+        self._lock = threading.Lock()
+        self._refreshing = False
+        # invalidate() ごとに進める世代（無効化前に始まった再計算の結果を捨てるため）
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _data(self) -> Optional[dict]:
+        """保持中のスナップショット"""
+        return self._snapshot[0]
+
+    @staticmethod
+    def _age(loaded_at: float) -> float:
+        """計算時刻からの経過秒数"""
+        return time.monotonic() - loaded_at
+
+    def _store(self, data: dict, generation: Optional[int] = None) -> bool:
+        """計算結果を保持（generation指定時は計算開始後に無効化されていれば捨てる）"""
+        if generation is not None and generation != self._generation:
+            return False
+        self._snapshot = (data, time.monotonic())
+        return True
+
+    def _load(self) -> dict:
+        """同期再計算（同時呼び出しは1回の計算を共有）"""
+        with self._lock:
+            # ロック待ちの間に他スレッドが更新済みなら再計算しない
+            data, loaded_at = self._snapshot
+            if data is not None and self._age(loaded_at) < self.ttl:
+                return data
+            data = self.loader()
+            self._store(data)
+            return data
+
+    def _refresh_in_background(self):
+        """バックグラウンド再計算"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            generation = self._generation
+
+        def worker():
+            try:
+                data = self.loader()
+                with self._lock:
+                    self._store(data, generation)
+            except Exception as e:
+                print(f"⚠️ ダッシュボードデータ再計算エラー（前回値を継続使用）: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def get(self) -> dict:
+        """スナップショット取得（呼び出し元が変更しても共有値に影響しないよう複製）"""
+        data, loaded_at = self._snapshot
+        age = self._age(loaded_at)
+
+        if data is not None and age < self.ttl:
+            self.hits += 1
+        elif data is not None and age < self.stale_ttl:
+            # 古い値を即返し、裏で更新
+            self.hits += 1
+            self._refresh_in_background()
+        else:
+            self.misses += 1
+            data = self._load()
+
+        return copy.deepcopy(data)
+
+    def prime(self, data: dict):
+        """計算済みスナップショットを登録（常駐エンジン等から）"""
+        with self._lock:
+            self._store(data)
+
+    def invalidate(self):
+        """キャッシュ無効化（データ取り込み後に呼ぶ: 次回取得時に同期再計算）"""
+        with self._lock:
+            self._generation += 1
+            self._snapshot = (None, 0.0)
+
+
+_snapshot_cache: Optional[DashboardSnapshotCache] = None
+
+
+def _get_snapshot_cache() -> DashboardSnapshotCache:
+    """プロセス共通キャッシュ取得"""
+    global _snapshot_cache
+    if _snapshot_cache is None:
+        _snapshot_cache = DashboardSnapshotCache()
+    return _snapshot_cache
+
+
+def get_dashboard_snapshot() -> dict:
+    """キャッシュ経由でダッシュボードデータ取得（同一プロセス内で計算結果を共有）"""
+    return _get_snapshot_cache().get()
+
+
+def invalidate_dashboard_snapshot():
+    """ダッシュボードスナップショット無効化フック"""
+    if _snapshot_cache is not None:
+        _snapshot_cache.invalidate()
+
+
+class AutomationDaemon:
+    """24時間自動化エンジン常駐モード（1プロセス・1接続で定期実行）"""
+
+    # 再集計ごとにNotion送信待ちへ登録する日数（当日＋遅れて確定する前日分）
+    NOTION_QUEUE_DAYS = 2
+
+    def __init__(self, interval: Optional[float] = None):
+        """初期化"""
+        self.config = get_config()
+        self.interval = interval if interval is not None else self.config.automation_interval
+        self.db_path = self.config.get_database_path()
+
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"データベースが見つかりません: {self.db_path}")
+
+        self.conn = connect(self.db_path)
+        self.data = None
+        self.tick_count = 0
+        self.refresh_count = 0
+        self._last_data_version = None
+        self._last_date = None
+        # Notion連携（NOTION_TOKEN設定時のみ）: 集計時は登録だけ行い、送信は別スレッドのドレイナーが担う
+        self.notion = self._create_notion_manager()
+        self._drain_stop = threading.Event()
+        self._drainer: Optional[threading.Thread] = None
+
+    def _create_notion_manager(self):
+        """Notion統合マネージャー作成（未設定時はNone）"""
+        if not os.getenv("NOTION_TOKEN"):
+            return None
+        from src.ec_notion_integration import ECAutomationNotionManager
+        return ECAutomationNotionManager()
+
+    def _data_version(self) -> int:
+        """他接続からのコミット検知用カウンタ取得"""
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def has_changes(self) -> bool:
+        """前回集計以降にDB更新または日付変更があったか"""
+        if self.data is None:
+            return True
+        if date.today() != self._last_date:
+            return True
+        return self._data_version() != self._last_data_version
+
+    def tick(self) -> bool:
+        """1回分の処理（変更がなければ再集計しない）"""
+        self.tick_count += 1
+
+        if not self.has_changes():
+            return False
+
+        # 集計前に取得しておき、集計中のコミットは次回tickで拾う
+        self._last_data_version = self._data_version()
+        self._last_date = date.today()
+        self.data = fetch_dashboard_data(conn=self.conn)
+        _get_snapshot_cache().prime(self.data)
+        self.refresh_count += 1
+        if self.notion is not None:
+            # Notionへは送信しない（同じ日付は送信待ちの1件にまとまる）
+            self.notion.queue_daily_pages(self.NOTION_QUEUE_DAYS)
+        return True
+
+    def start_notion_drainer(self, interval: Optional[float] = None) -> bool:
+        """Notion送信待ちキューを定期送信するスレッドを開始（Notion未設定・起動済みなら何もしない）"""
+        if self.notion is None or self._drainer is not None:
+            return False
+        interval = interval if interval is not None else self.config.notion_outbox_drain_interval
+        self._drain_stop.clear()
+
+        def drain_loop():
+            while not self._drain_stop.wait(interval):
+                try:
+                    asyncio.run(self.notion.flush_outbox())
+                except Exception as e:
+                    print(f"❌ Notion送信待ち再送エラー: {e}")
+                    traceback.print_exc()
+
+        self._drainer = threading.Thread(target=drain_loop, name="notion-outbox-drainer", daemon=True)
+        self._drainer.start()
+        return True
+
+    def run(self, max_ticks: Optional[int] = None):
+        """定期実行ループ"""
+        print(f"🔄 常駐モード開始: {self.interval}秒間隔 (DB: {self.db_path})")
+
+        try:
+            if self.start_notion_drainer():
+                print(f"📮 Notion送信待ちキューを{self.config.notion_outbox_drain_interval}秒ごとに送信します")
+            while max_ticks is None or self.tick_count < max_ticks:
+                started = time.monotonic()
+                try:
+                    refreshed = self.tick()
+                    if not refreshed and self.config.debug_mode:
+                        print(f"⏭️ 変更なし: 再集計をスキップ ({datetime.now().strftime('%H:%M:%S')})")
+                except Exception as e:
+                    # 1回の失敗で常駐を止めない（原因追跡用にトレースバックを残し、次の周期で再試行）
+                    print(f"❌ 集計エラー: {e}")
+                    traceback.print_exc()
+
+                if max_ticks is not None and self.tick_count >= max_ticks:
+                    break
+
+                elapsed = time.monotonic() - started
+                time.sleep(max(0.0, self.interval - elapsed))
+        finally:
+            self.close()
+
+        return self.data
+
+    def close(self):
+        """ドレイナー停止・DB接続クローズ"""
+        if self._drainer is not None:
+            self._drain_stop.set()
+            self._drainer.join()
+            self._drainer = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
 if __name__ == "__main__":
-    fetch_dashboard_data()
\ No newline at end of file
+    fetch_dashboard_data()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ダッシュボードAPIサーバー - FastAPI版
+JSONエンドポイント・gzip圧縮・ETag/304・並行リクエスト処理・SSEプッシュ配信
+"""
+
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+import sys
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.staticfiles import StaticFiles
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.dashboard.snapshot_writer import (
+    DASHBOARD_DATA_PATH, DASHBOARD_DELTA_PATH, compute_content_hash
+)
+
+DASHBOARD_DIR = project_root / "src" / "dashboard"
+SECTIONS = ("sales", "inventory", "profit")
+
+# スナップショット更新の監視間隔（秒）: 更新から1秒以内に配信する
+WATCH_INTERVAL = 0.25
+# 接続維持用コメントの送信間隔（秒）
+HEARTBEAT_INTERVAL = 15.0
+
+
+class SnapshotFileCache:
+    """dashboard_data.json のメモリキャッシュ（更新時のみ再読込）"""
+
+    def __init__(self, path: Path):
+        """初期化"""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._data: Optional[Dict] = None
+        self._etag: Optional[str] = None
+
+    def get(self) -> Tuple[Optional[Dict], Optional[str]]:
+        """スナップショットとETag取得"""
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None, None
+
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if stat_key != self._stat_key:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    # 読めない場合は直前のスナップショットを返す
+                    return self._data, self._etag
+                self._data = data
+                self._etag = data.get("content_hash") or compute_content_hash(data)
+                self._stat_key = stat_key
+            return self._data, self._etag
+
+
+def _format_sse(event: str, data: Dict, event_id: Optional[int] = None) -> str:
+    """SSEメッセージ整形"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+
+class DashboardEventBroker:
+    """スナップショット更新をSSE購読者に配信するブローカー"""
+
+    def __init__(self, snapshot_cache: SnapshotFileCache, delta_path: Path):
+        """初期化"""
+        self.snapshot_cache = snapshot_cache
+        self.delta_path = Path(delta_path)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.current_version: Optional[int] = None
+
+    def _load_delta(self, from_version: Optional[int], to_version: int) -> Optional[Dict]:
+        """指定バージョン間の差分ファイル取得（一致しなければNone）"""
+        try:
+            with open(self.delta_path, "r", encoding="utf-8") as f:
+                delta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if delta.get("from_version") == from_version and delta.get("to_version") == to_version:
+            return delta
+        return None
+
+    def publish(self, event: str):
+        """全購読者にイベント送信（詰まった購読者は切断）"""
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # 遅延した購読者は切断し、再接続時に全量スナップショットを受け取らせる
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def check_for_update(self) -> bool:
+        """スナップショット更新を検知したら配信"""
+        data, _ = self.snapshot_cache.get()
+        if data is None:
+            return False
+
+        version = data.get("version")
+        if version == self.current_version:
+            return False
+
+        previous_version = self.current_version
+        self.current_version = version
+
+        delta = self._load_delta(previous_version, version) if previous_version is not None else None
+        if delta is not None:
+            self.publish(_format_sse("delta", delta, version))
+        else:
+            self.publish(_format_sse("snapshot", data, version))
+        return True
+
+    async def watch(self):
+        """スナップショットファイル監視ループ"""
+        while True:
+            try:
+                # 通常はstatのみ・更新時だけ小さなJSONを読む
+                self.check_for_update()
+            except Exception as e:
+                print(f"⚠️ スナップショット監視エラー: {e}")
+            await asyncio.sleep(WATCH_INTERVAL)
+
+    async def stream(self, request: Request, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """SSEストリーム生成"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+        self.subscribers.add(queue)
+
+        try:
+            # 接続直後に現在のスナップショットを送信（既に最新なら省略）
+            data, _ = self.snapshot_cache.get()
+            if data is not None and str(data.get("version")) != last_event_id:
+                yield _format_sse("snapshot", data, data.get("version"))
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            self.subscribers.discard(queue)
+
+
+def _run_refresh_loop(stop_event: threading.Event, interval: Optional[float]):
+    """自動化エンジン常駐ループ（リアルタイムモード用・別スレッドで実行）"""
+    from src.automation_engine_24h import AutomationDaemon
+
+    try:
+        daemon = AutomationDaemon(interval=interval)
+    except Exception as e:
+        print(f"⚠️ 自動化エンジンを起動できません: {e}")
+        return
+
+    try:
+        daemon.start_notion_drainer()
+        while not stop_event.is_set():
+            try:
+                daemon.tick()
+            except Exception as e:
+                print(f"❌ 集計エラー: {e}")
+            stop_event.wait(daemon.interval)
+    finally:
+        daemon.close()
+
+
+def _json_response(request: Request, payload: Dict, etag: str) -> Response:
+    """ETag付きJSONレスポンス作成（一致時は304）"""
+    quoted_etag = f'"{etag}"'
+    headers = {"ETag": quoted_etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if quoted_etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def create_app(data_path: Optional[Path] = None, delta_path: Optional[Path] = None,
+               realtime: bool = False, refresh_interval: Optional[float] = None) -> FastAPI:
+    """ダッシュボードAPIアプリケーション作成（realtime時は自動化エンジンも常駐）"""
+    snapshot_cache = SnapshotFileCache(data_path or project_root / DASHBOARD_DATA_PATH)
+    broker = DashboardEventBroker(snapshot_cache, delta_path or project_root / DASHBOARD_DELTA_PATH)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        watcher = asyncio.create_task(broker.watch())
+        stop_event = threading.Event()
+        refresher = None
+        if realtime:
+            refresher = threading.Thread(
+                target=_run_refresh_loop, args=(stop_event, refresh_interval), daemon=True
+            )
+            refresher.start()
+        try:
+            yield
+        finally:
+            stop_event.set()
+            watcher.cancel()
+            # 購読中のストリームを終了させる
+            for queue in list(broker.subscribers):
+                if not queue.full():
+                    queue.put_nowait(None)
+
+    app = FastAPI(title="EC自動化システム ダッシュボードAPI", lifespan=lifespan)
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+    app.state.snapshot_cache = snapshot_cache
+    app.state.event_broker = broker
+
+    def load_snapshot() -> Tuple[Dict, str]:
+        data, etag = snapshot_cache.get()
+        if data is None:
+            raise HTTPException(status_code=503, detail="ダッシュボードデータ未生成です")
+        return data, etag
+
+    @app.get("/api/health")
+    def health():
+        data, _ = snapshot_cache.get()
+        return {
+            "status": "ok",
+            "data_available": data is not None,
+            "version": data.get("version") if data else None,
+            "last_updated": data.get("last_updated") if data else None
+        }
+
+    @app.get("/api/dashboard")
+    def dashboard(request: Request):
+        data, etag = load_snapshot()
+        return _json_response(request, data, etag)
+
+    def section_endpoint(section: str):
+        def endpoint(request: Request):
+            data, etag = load_snapshot()
+            payload = {
+                section: data.get(section, {}),
+                "version": data.get("version"),
+                "last_updated": data.get("last_updated")
+            }
+            return _json_response(request, payload, f"{etag}-{section}")
+        return endpoint
+
+    for section in SECTIONS:
+        app.add_api_route(f"/api/{section}", section_endpoint(section), methods=["GET"])
+
+    @app.get("/api/stream")
+    async def stream(request: Request):
+        last_event_id = request.headers.get("last-event-id")
+        return StreamingResponse(
+            broker.stream(request, last_event_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    # ダッシュボードHTML・JSONのみ公開（.env等を含むプロジェクトルートは公開しない）
+    app.mount("/src/dashboard", StaticFiles(directory=str(DASHBOARD_DIR)), name="dashboard")
+
+    return app
+
+
+async def serve_api(host: str = "0.0.0.0", port: int = 8080, realtime: bool = False):
+    """APIサーバーを実行中のイベントループ上で起動（起動失敗時は RuntimeError）"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(realtime=realtime), host=host, port=port, log_level="warning"
+    ))
+    try:
+        await server.serve()
+    except SystemExit as e:
+        # uvicornはポート使用中等の起動失敗時に sys.exit(1) する
+        raise RuntimeError(f"{host}:{port} で起動できません") from e
+    if not server.started:
+        raise RuntimeError(f"{host}:{port} で起動できません")
+
+
+def run_api_server(host: str = "0.0.0.0", port: int = 8080, realtime: bool = False):
+    """APIサーバー起動（イベントループ外から呼ぶ場合）"""
+    asyncio.run(serve_api(host, port, realtime))
+
+
+if __name__ == "__main__":
+    run_api_server()
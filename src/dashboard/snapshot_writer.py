@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ダッシュボードデータ出力モジュール
+アトミック書き込み・コンテンツハッシュ・差分ファイル出力
+"""
+
+import copy
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+import sys
+from typing import Dict, Optional
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.settings import get_config
+
+DASHBOARD_DATA_PATH = Path("src/dashboard/dashboard_data.json")
+DASHBOARD_DELTA_PATH = Path("src/dashboard/dashboard_delta.json")
+
+# ハッシュ計算から除外するメタデータ項目
+META_KEYS = ("last_updated", "version", "content_hash")
+
+
+def compute_content_hash(data: Dict) -> str:
+    """メタデータを除いた内容のハッシュ計算"""
+    payload = {k: v for k, v in data.items() if k not in META_KEYS}
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def atomic_write_json(path: Path, data: Dict, compact: bool = True):
+    """一時ファイル書き込み＋renameによるアトミックなJSON出力"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # rename を同一ファイルシステム内で行うため出力先と同じディレクトリに作成
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if compact:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            else:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp は0600で作成されるため通常ファイルと同じ権限に揃える
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def diff_snapshots(previous: Dict, current: Dict) -> Dict:
+    """前回スナップショットからの変更項目抽出（セクション内はキー単位）"""
+    changed = {}
+    removed = []
+
+    for key, value in current.items():
+        if key in META_KEYS:
+            continue
+        old_value = previous.get(key)
+        if old_value == value:
+            continue
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            section = {k: v for k, v in value.items() if old_value.get(k) != v}
+            section_removed = [k for k in old_value if k not in value]
+            if section_removed:
+                # セクション内で削除があればセクションごと置き換える
+                changed[key] = value
+            elif section:
+                changed[key] = section
+        else:
+            changed[key] = value
+
+    for key in previous:
+        if key not in META_KEYS and key not in current:
+            removed.append(key)
+
+    return {"changed": changed, "removed": removed}
+
+
+class DashboardSnapshotWriter:
+    """ダッシュボードJSON出力クラス"""
+
+    def __init__(self, output_path: Path = DASHBOARD_DATA_PATH,
+                 delta_path: Optional[Path] = DASHBOARD_DELTA_PATH,
+                 compact: Optional[bool] = None):
+        """初期化（compact未指定時は本番環境のみ非インデント出力）"""
+        self.output_path = Path(output_path)
+        self.delta_path = Path(delta_path) if delta_path else None
+        self.compact = get_config().is_production() if compact is None else compact
+        self._previous: Optional[Dict] = None
+
+    def load_previous(self) -> Optional[Dict]:
+        """前回出力したスナップショット取得"""
+        if self._previous is not None:
+            return self._previous
+
+        try:
+            with open(self.output_path, "r", encoding="utf-8") as f:
+                self._previous = json.load(f)
+        except (OSError, ValueError):
+            self._previous = None
+        return self._previous
+
+    def write(self, data: Dict) -> Dict:
+        """スナップショット出力（内容が変わらなければ書き込みを省略、引数のdataは変更しない）
+
+        last_updated はハッシュ対象外で、内容が最後に変わった時刻を表す。
+        内容が同じ間はファイルを書き換えないため、利用側は last_updated やファイル更新時刻で
+        生成処理が止まったか（データが古いか）を判定しないこと。
+        """
+        previous = self.load_previous() or {}
+        content_hash = compute_content_hash(data)
+
+        if previous.get("content_hash") == content_hash:
+            return {"written": False, "version": previous.get("version", 0), "path": self.output_path}
+
+        version = previous.get("version", 0) + 1
+        # 呼び出し元が後でdataを変更しても前回内容（差分の基準）が変わらないよう複製して保持
+        data = copy.deepcopy(data)
+        data["version"] = version
+        data["content_hash"] = content_hash
+
+        # 差分ファイルを先に更新（本体より新しい差分をクライアントが見ても全量取得で回復できる）
+        if self.delta_path and previous:
+            delta = diff_snapshots(previous, data)
+            delta.update({
+                "from_version": previous.get("version", 0),
+                "to_version": version,
+                "content_hash": content_hash,
+                "last_updated": data.get("last_updated")
+            })
+            atomic_write_json(self.delta_path, delta, compact=self.compact)
+
+        atomic_write_json(self.output_path, data, compact=self.compact)
+        self._previous = data
+        return {"written": True, "version": version, "path": self.output_path}
+
+
+_default_writer: Optional[DashboardSnapshotWriter] = None
+
+
+def get_snapshot_writer() -> DashboardSnapshotWriter:
+    """標準出力先のライター取得（プロセス内で前回内容を共有）"""
+    global _default_writer
+    if _default_writer is None:
+        _default_writer = DashboardSnapshotWriter()
+    return _default_writer
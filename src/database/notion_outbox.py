@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC自動化システム - Notion送信待ちキュー
+Notionへの日次ページ書き込みをSQLiteに保存し、後から再送する（障害・レート制限時もデータを失わない）
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+import sys
+from typing import Dict, List, Optional
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.database.notion_page_index import normalize_database_id
+from src.database.schema import connect, has_table
+
+
+class NotionOutbox:
+    """Notion書き込み送信待ちキュー（データベース・日付ごとに最新内容1件）"""
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        """初期化（接続未指定時は DATABASE_PATH に接続）"""
+        self._owns_connection = conn is None
+        self.conn = conn or connect()
+
+    def enqueue(self, database_id: str, page_date: str, properties: Dict,
+                force: bool = False, delay: float = 0.0):
+        """書き込み登録（同じ日付が送信待ちなら内容を差し替え、delay秒後から送信対象にする）"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO notion_outbox (database_id, page_date, properties, force, next_attempt_at, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(database_id, page_date) DO UPDATE SET
+                    properties = excluded.properties,
+                    force = MAX(force, excluded.force),
+                    version = version + 1,
+                    attempts = 0,
+                    next_attempt_at = excluded.next_attempt_at,
+                    last_error = NULL
+            """, (
+                normalize_database_id(database_id), page_date, json.dumps(properties, ensure_ascii=False),
+                int(force), now + delay, now
+            ))
+
+    def due(self, limit: int, now: Optional[float] = None) -> List[Dict]:
+        """送信時刻に達したエントリを古い順に取得"""
+        rows = self.conn.execute("""
+            SELECT id, database_id, page_date, properties, force, version, attempts
+            FROM notion_outbox
+            WHERE next_attempt_at <= ?
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+        """, (now if now is not None else time.time(), limit)).fetchall()
+        return [
+            {
+                "id": row[0], "database_id": row[1], "page_date": row[2],
+                "properties": json.loads(row[3]), "force": bool(row[4]),
+                "version": row[5], "attempts": row[6]
+            }
+            for row in rows
+        ]
+
+    def mark_sent(self, entry: Dict) -> bool:
+        """送信完了で削除（送信中に内容が差し替えられていれば残す）"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM notion_outbox WHERE id = ? AND version = ?",
+                (entry["id"], entry["version"])
+            )
+        return cursor.rowcount > 0
+
+    def mark_failed(self, entry: Dict, error: str, retry_in: float):
+        """送信失敗を記録し、retry_in秒後まで送信対象から外す"""
+        with self.conn:
+            self.conn.execute("""
+                UPDATE notion_outbox
+                SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?
+                WHERE id = ? AND version = ?
+            """, (error, time.time() + retry_in, entry["id"], entry["version"]))
+
+    def discard(self, database_id: str, page_date: str):
+        """送信待ちを取り消し（同じ日付を直接書き込めた場合、古い内容で上書きしないため）"""
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM notion_outbox WHERE database_id = ? AND page_date = ?",
+                (normalize_database_id(database_id), page_date)
+            )
+
+    def stats(self) -> Dict:
+        """件数統計（送信待ち・再試行中・最古の登録日時）"""
+        row = self.conn.execute("""
+            SELECT COUNT(*), SUM(CASE WHEN attempts > 0 THEN 1 ELSE 0 END), MIN(created_at)
+            FROM notion_outbox
+        """).fetchone()
+        return {"pending": row[0], "retrying": row[1] or 0, "oldest_created_at": row[2]}
+
+    def close(self):
+        """自前で開いた接続をクローズ"""
+        if self._owns_connection:
+            self.conn.close()
+
+
+def open_outbox() -> Optional[NotionOutbox]:
+    """既定DBの送信待ちキューを開く（DB未初期化時はNone）"""
+    try:
+        outbox = NotionOutbox()
+    except sqlite3.Error as e:
+        print(f"⚠️ Notion送信待ちキューを使用できません: {e}")
+        return None
+    if not has_table(outbox.conn, "notion_outbox"):
+        print("⚠️ Notion送信待ちキューが未作成です（python main.py setup で更新）")
+        outbox.close()
+        return None
+    return outbox
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC自動化システム - Notionページ索引
+データベース・日付ごとの日次ページIDと最終書き込み内容のハッシュを保存
+（upsert時の検索と、内容が変わっていない書き込みを省く）
+"""
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+import sys
+from typing import Dict, Optional
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.database.schema import connect
+
+
+def normalize_database_id(database_id: str) -> str:
+    """NotionのID表記ゆれ（ハイフン有無）を吸収"""
+    return database_id.replace("-", "")
+
+
+class NotionPageIndex:
+    """Notion日次ページの日付→ページID索引"""
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        """初期化（接続未指定時は DATABASE_PATH に接続）"""
+        self._owns_connection = conn is None
+        self.conn = conn or connect()
+
+    def get_entry(self, database_id: str, page_date: str) -> Optional[Dict]:
+        """ページIDと最終書き込みハッシュ取得"""
+        row = self.conn.execute(
+            "SELECT page_id, payload_hash FROM notion_page_index WHERE database_id = ? AND page_date = ?",
+            (normalize_database_id(database_id), page_date)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"page_id": row[0], "payload_hash": row[1]}
+
+    def get(self, database_id: str, page_date: str) -> Optional[str]:
+        """ページID取得"""
+        entry = self.get_entry(database_id, page_date)
+        return entry["page_id"] if entry is not None else None
+
+    def set(self, database_id: str, page_date: str, page_id: str, payload_hash: Optional[str] = None):
+        """ページID登録・更新（payload_hashは書き込み成功時のみ指定、未指定なら未書き込み扱い）"""
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO notion_page_index (database_id, page_date, page_id, updated_at, payload_hash)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(database_id, page_date) DO UPDATE SET
+                    page_id = excluded.page_id,
+                    updated_at = excluded.updated_at,
+                    payload_hash = excluded.payload_hash
+            """, (
+                normalize_database_id(database_id), page_date, page_id,
+                datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"), payload_hash
+            ))
+
+    def delete(self, database_id: str, page_date: str):
+        """索引削除（ページが削除・アーカイブされていた場合）"""
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM notion_page_index WHERE database_id = ? AND page_date = ?",
+                (normalize_database_id(database_id), page_date)
+            )
+
+    def close(self):
+        """自前で開いた接続をクローズ"""
+        if self._owns_connection:
+            self.conn.close()
+
+
+def open_page_index() -> Optional[NotionPageIndex]:
+    """既定DBの索引を開く（DB未初期化時はNone: 毎回Notion側を検索）"""
+    try:
+        index = NotionPageIndex()
+    except sqlite3.Error as e:
+        print(f"⚠️ Notionページ索引を使用できません: {e}")
+        return None
+    columns = [row[1] for row in index.conn.execute("PRAGMA table_info(notion_page_index)")]
+    if "payload_hash" not in columns:
+        print("⚠️ Notionページ索引が未作成・旧形式です（python main.py setup で更新）: 毎回Notionを検索します")
+        index.close()
+        return None
+    return index
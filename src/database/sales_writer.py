@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC自動化システム - 売上データ一括書き込み
+ページ単位の注文ストリームをexecutemanyでupsert
+"""
+
+import sqlite3
+from pathlib import Path
+import sys
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.database.schema import connect
+
+UPSERT_SALES_SQL = """
+    INSERT INTO sales (date, amount, platform, order_id, sku)
+    VALUES (:date, :amount, :platform, :order_id, :sku)
+    ON CONFLICT(platform, order_id, sku) WHERE order_id IS NOT NULL
+    DO UPDATE SET date = excluded.date, amount = excluded.amount
+    WHERE date IS NOT excluded.date OR amount IS NOT excluded.amount
+"""
+
+DELETE_ORDER_SQL = "DELETE FROM sales WHERE platform = :platform AND order_id = :order_id"
+
+
+class SalesWriter:
+    """売上テーブル一括書き込みクラス"""
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None, batch_size: int = 1000):
+        """初期化（接続未指定時は DATABASE_PATH に接続）"""
+        self._owns_connection = conn is None
+        self.conn = conn or connect()
+        self.batch_size = batch_size
+        self.stats = {"pages": 0, "upserted": 0, "deleted": 0}
+
+    def write_rows(self, rows: Iterable[Dict]) -> Dict:
+        """売上行を1トランザクションで書き込み（canceled=Trueの注文は削除）"""
+        upserts: List[Dict] = []
+        deletes: List[Dict] = []
+        result = {"upserted": 0, "deleted": 0}
+
+        with self.conn:
+            for row in rows:
+                if row.get("canceled"):
+                    deletes.append(row)
+                else:
+                    upserts.append(row)
+
+                if len(upserts) >= self.batch_size:
+                    self.conn.executemany(UPSERT_SALES_SQL, upserts)
+                    result["upserted"] += len(upserts)
+                    upserts = []
+                if len(deletes) >= self.batch_size:
+                    self.conn.executemany(DELETE_ORDER_SQL, deletes)
+                    result["deleted"] += len(deletes)
+                    deletes = []
+
+            if upserts:
+                self.conn.executemany(UPSERT_SALES_SQL, upserts)
+                result["upserted"] += len(upserts)
+            if deletes:
+                self.conn.executemany(DELETE_ORDER_SQL, deletes)
+                result["deleted"] += len(deletes)
+
+        self.stats["upserted"] += result["upserted"]
+        self.stats["deleted"] += result["deleted"]
+        return result
+
+    async def consume(self, pages: AsyncIterator[List[Dict]],
+                      mapper: Callable[[Dict], List[Dict]]) -> Dict:
+        """注文ページのストリームを取り込み（1ページ=1トランザクション）"""
+        try:
+            async for orders in pages:
+                rows = [row for order in orders for row in mapper(order)]
+                self.write_rows(rows)
+                self.stats["pages"] += 1
+        finally:
+            if self.stats["upserted"] or self.stats["deleted"]:
+                from src.automation_engine_24h import invalidate_dashboard_snapshot
+                invalidate_dashboard_snapshot()
+
+        return dict(self.stats)
+
+    def close(self):
+        """自前で開いた接続をクローズ"""
+        if self._owns_connection:
+            self.conn.close()
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC自動化システム - SQLiteスキーマ・インデックス管理
+PRAGMA user_version によるバージョン管理付きマイグレーション
+"""
+
+import sqlite3
+from pathlib import Path
+import sys
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.settings import get_config
+
+# ロック待ちタイムアウト（ミリ秒）
+BUSY_TIMEOUT_MS = 5000
+
+
+def connect(db_path: Optional[Union[str, Path]] = None) -> sqlite3.Connection:
+    """設定済みのSQLite接続を取得"""
+    if db_path is None:
+        db_path = get_config().get_database_path()
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    # WALモードではNORMALでもクラッシュ時の整合性は保たれる
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+def has_table(conn: sqlite3.Connection, table: str) -> bool:
+    """テーブル存在確認"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """テーブルのカラム名一覧取得"""
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def _ensure_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]):
+    """既存テーブルに不足カラムを追加"""
+    existing = _table_columns(conn, table)
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def _migration_001_base_tables(conn: sqlite3.Connection):
+    """売上・利益・在庫テーブルと基本インデックス作成"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            amount INTEGER NOT NULL DEFAULT 0,
+            platform TEXT,
+            order_id TEXT,
+            sku TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS profit (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            profit INTEGER NOT NULL DEFAULT 0,
+            platform TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS inventory (
+            id INTEGER PRIMARY KEY,
+            sku TEXT,
+            stock INTEGER NOT NULL DEFAULT 0,
+            reorder_level INTEGER NOT NULL DEFAULT 0,
+            capacity INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    """)
+
+    # 既存DB（手動作成）との互換: 後続機能で使うカラムを補完
+    _ensure_columns(conn, "sales", {"platform": "TEXT", "order_id": "TEXT", "sku": "TEXT"})
+    _ensure_columns(conn, "profit", {"platform": "TEXT"})
+    _ensure_columns(conn, "inventory", {"sku": "TEXT", "updated_at": "TEXT"})
+
+    # 日付範囲集計をテーブル本体に触れずに済ませるカバリングインデックス
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_date_amount ON sales(date, amount)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_profit_date_profit ON profit(date, profit)")
+    # 要補充商品だけを保持する部分インデックス
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_inventory_low_stock
+        ON inventory(sku, stock, reorder_level)
+        WHERE stock <= reorder_level
+    """)
+
+
+def _rollup_sql(row: str, sign: str) -> List[str]:
+    """売上ロールアップ加減算SQL生成（row: new/old, sign: +/-）"""
+    count = "1" if sign == "+" else "-1"
+    return [
+        f"""
+        INSERT INTO sales_daily (date, amount, order_count)
+        VALUES ({row}.date, {sign}COALESCE({row}.amount, 0), {count})
+        ON CONFLICT(date) DO UPDATE SET
+            amount = amount + excluded.amount,
+            order_count = order_count + excluded.order_count;
+        """,
+        f"""
+        INSERT INTO sales_daily_platform_sku (date, platform, sku, amount, order_count)
+        VALUES ({row}.date, COALESCE({row}.platform, ''), COALESCE({row}.sku, ''),
+                {sign}COALESCE({row}.amount, 0), {count})
+        ON CONFLICT(date, platform, sku) DO UPDATE SET
+            amount = amount + excluded.amount,
+            order_count = order_count + excluded.order_count;
+        """,
+    ]
+
+
+def _profit_rollup_sql(row: str, sign: str) -> str:
+    """利益ロールアップ加減算SQL生成"""
+    count = "1" if sign == "+" else "-1"
+    return f"""
+        INSERT INTO profit_daily (date, profit, row_count)
+        VALUES ({row}.date, {sign}COALESCE({row}.profit, 0), {count})
+        ON CONFLICT(date) DO UPDATE SET
+            profit = profit + excluded.profit,
+            row_count = row_count + excluded.row_count;
+    """
+
+
+# 件数0になった日は生テーブルのGROUP BYと同様に結果から消す
+_PRUNE_SALES_SQL = """
+    DELETE FROM sales_daily WHERE date = old.date AND order_count <= 0;
+    DELETE FROM sales_daily_platform_sku
+    WHERE date = old.date AND platform = COALESCE(old.platform, '')
+      AND sku = COALESCE(old.sku, '') AND order_count <= 0;
+"""
+_PRUNE_PROFIT_SQL = """
+    DELETE FROM profit_daily WHERE date = old.date AND row_count <= 0;
+"""
+
+
+def _migration_002_daily_rollups(conn: sqlite3.Connection):
+    """日次ロールアップテーブルと維持用トリガー作成"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            date TEXT PRIMARY KEY,
+            amount INTEGER NOT NULL DEFAULT 0,
+            order_count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_platform_sku (
+            date TEXT NOT NULL,
+            platform TEXT NOT NULL,
+            sku TEXT NOT NULL,
+            amount INTEGER NOT NULL DEFAULT 0,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, platform, sku)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS profit_daily (
+            date TEXT PRIMARY KEY,
+            profit INTEGER NOT NULL DEFAULT 0,
+            row_count INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+
+    # 既存データからロールアップを再構築
+    conn.execute("DELETE FROM sales_daily")
+    conn.execute("DELETE FROM sales_daily_platform_sku")
+    conn.execute("DELETE FROM profit_daily")
+    conn.execute("""
+        INSERT INTO sales_daily (date, amount, order_count)
+        SELECT date, SUM(COALESCE(amount, 0)), COUNT(*) FROM sales GROUP BY date
+    """)
+    conn.execute("""
+        INSERT INTO sales_daily_platform_sku (date, platform, sku, amount, order_count)
+        SELECT date, COALESCE(platform, ''), COALESCE(sku, ''), SUM(COALESCE(amount, 0)), COUNT(*)
+        FROM sales GROUP BY date, COALESCE(platform, ''), COALESCE(sku, '')
+    """)
+    conn.execute("""
+        INSERT INTO profit_daily (date, profit, row_count)
+        SELECT date, SUM(COALESCE(profit, 0)), COUNT(*) FROM profit GROUP BY date
+    """)
+
+    # 挿入・削除・更新のたびにロールアップを差分更新
+    add_sales = "".join(_rollup_sql("new", "+"))
+    sub_sales = "".join(_rollup_sql("old", "-"))
+    triggers = {
+        "trg_sales_rollup_insert": f"AFTER INSERT ON sales BEGIN {add_sales} END",
+        "trg_sales_rollup_delete": f"AFTER DELETE ON sales BEGIN {sub_sales} {_PRUNE_SALES_SQL} END",
+        "trg_sales_rollup_update": (
+            "AFTER UPDATE OF date, amount, platform, sku ON sales "
+            f"BEGIN {sub_sales} {add_sales} {_PRUNE_SALES_SQL} END"
+        ),
+        "trg_profit_rollup_insert": f"AFTER INSERT ON profit BEGIN {_profit_rollup_sql('new', '+')} END",
+        "trg_profit_rollup_delete": (
+            f"AFTER DELETE ON profit BEGIN {_profit_rollup_sql('old', '-')} {_PRUNE_PROFIT_SQL} END"
+        ),
+        "trg_profit_rollup_update": (
+            "AFTER UPDATE OF date, profit ON profit "
+            f"BEGIN {_profit_rollup_sql('old', '-')} {_profit_rollup_sql('new', '+')} {_PRUNE_PROFIT_SQL} END"
+        ),
+    }
+    for name, body in triggers.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(f"CREATE TRIGGER {name} {body}")
+
+
+def _migration_003_sales_order_key(conn: sqlite3.Connection):
+    """注文取り込みの冪等upsert用ユニークインデックス作成"""
+    # 手動投入データ（order_idなし）は対象外にする
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_sales_order
+        ON sales(platform, order_id, sku)
+        WHERE order_id IS NOT NULL
+    """)
+
+
+def _migration_004_sync_state(conn: sqlite3.Connection):
+    """差分同期用ハイウォーターマークテーブル作成"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            marketplace TEXT NOT NULL,
+            account TEXT NOT NULL,
+            high_water_mark TEXT NOT NULL,
+            last_synced_at TEXT NOT NULL,
+            last_order_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (marketplace, account)
+        ) WITHOUT ROWID
+    """)
+
+
+def _migration_005_inventory_sku(conn: sqlite3.Connection):
+    """在庫レポート一括取り込み用のSKUインデックス作成"""
+    # 既存データにSKU重複がありうるためユニークにはしない
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_inventory_sku ON inventory(sku)")
+
+
+def _migration_006_ai_response_cache(conn: sqlite3.Connection):
+    """AI応答キャッシュテーブル作成"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ai_response_cache (
+            cache_key TEXT PRIMARY KEY,
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # LRU追い出し用
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ai_response_cache_last_used
+        ON ai_response_cache(last_used_at)
+    """)
+
+
+def _migration_007_notion_page_index(conn: sqlite3.Connection):
+    """Notion日次ページの日付→ページID索引テーブル作成"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notion_page_index (
+            database_id TEXT NOT NULL,
+            page_date TEXT NOT NULL,
+            page_id TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (database_id, page_date)
+        ) WITHOUT ROWID
+    """)
+
+
+def _migration_008_notion_payload_hash(conn: sqlite3.Connection):
+    """Notionページ索引に最終書き込み内容のハッシュを追加"""
+    _ensure_columns(conn, "notion_page_index", {"payload_hash": "TEXT"})
+
+
+def _migration_009_notion_outbox(conn: sqlite3.Connection):
+    """Notion書き込み送信待ちキュー（日付ごとに最新内容1件）作成"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notion_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            database_id TEXT NOT NULL,
+            page_date TEXT NOT NULL,
+            properties TEXT NOT NULL,
+            force INTEGER NOT NULL DEFAULT 0,
+            version INTEGER NOT NULL DEFAULT 1,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            UNIQUE (database_id, page_date)
+        )
+    """)
+    # 送信対象の取り出し用
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_notion_outbox_next_attempt
+        ON notion_outbox(next_attempt_at)
+    """)
+
+
+# (バージョン, 説明, マイグレーション関数) ※追加のみ・既存の並び替え禁止
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "基本テーブル・インデックス作成", _migration_001_base_tables),
+    (2, "日次ロールアップテーブル作成", _migration_002_daily_rollups),
+    (3, "注文キー用ユニークインデックス作成", _migration_003_sales_order_key),
+    (4, "差分同期状態テーブル作成", _migration_004_sync_state),
+    (5, "在庫SKUインデックス作成", _migration_005_inventory_sku),
+    (6, "AI応答キャッシュテーブル作成", _migration_006_ai_response_cache),
+    (7, "Notionページ索引テーブル作成", _migration_007_notion_page_index),
+    (8, "Notionページ索引に書き込みハッシュ追加", _migration_008_notion_payload_hash),
+    (9, "Notion送信待ちキュー作成", _migration_009_notion_outbox),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+class ECDatabaseSchemaManager:
+    """SQLiteスキーマ管理クラス"""
+
+    def __init__(self, db_path: Optional[Union[str, Path]] = None):
+        """初期化（DBパス未指定時は DATABASE_PATH を使用）"""
+        self.db_path = Path(db_path) if db_path else get_config().get_database_path()
+
+    def get_version(self, conn: sqlite3.Connection) -> int:
+        """現在のスキーマバージョン取得"""
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self) -> Dict:
+        """未適用マイグレーションを実行し、WAL化・統計更新を行う"""
+        conn = connect(self.db_path)
+        # DDLを含めて明示的にトランザクション制御する
+        conn.isolation_level = None
+        applied = []
+
+        try:
+            current_version = self.get_version(conn)
+
+            for version, description, migration in MIGRATIONS:
+                if version <= current_version:
+                    continue
+
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    migration(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+                applied.append(version)
+                print(f"✅ マイグレーション適用: v{version} {description}")
+
+            # WALはトランザクション外で設定（DBファイルに永続化される）
+            journal_mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+
+            # クエリプランナー用の統計情報を更新
+            conn.execute("ANALYZE")
+
+            return {
+                "db_path": str(self.db_path),
+                "previous_version": current_version,
+                "version": self.get_version(conn),
+                "applied": applied,
+                "journal_mode": journal_mode
+            }
+        finally:
+            conn.close()
+
+    def verify(self) -> Dict:
+        """スキーマ状態確認"""
+        status = {
+            "db_path": str(self.db_path),
+            "exists": self.db_path.exists(),
+            "version": 0,
+            "latest_version": SCHEMA_VERSION,
+            "up_to_date": False,
+            "journal_mode": None,
+            "tables": [],
+            "indexes": []
+        }
+
+        if not status["exists"]:
+            return status
+
+        conn = connect(self.db_path)
+        try:
+            status["version"] = self.get_version(conn)
+            status["up_to_date"] = status["version"] >= SCHEMA_VERSION
+            status["journal_mode"] = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            status["tables"] = [
+                row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+                )
+            ]
+            status["indexes"] = [
+                row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%' ORDER BY name"
+                )
+            ]
+        finally:
+            conn.close()
+
+        return status
+
+
+def initialize_database(db_path: Optional[Union[str, Path]] = None) -> Dict:
+    """データベース初期化（最新スキーマまでマイグレーション）"""
+    return ECDatabaseSchemaManager(db_path).migrate()
+
+
+def ensure_database(db_path: Optional[Union[str, Path]] = None) -> Optional[Dict]:
+    """スキーマが最新でない場合（DB未作成を含む）のみ初期化
+
+    最新ならDBに触れずNoneを返す（毎回のWAL設定・ANALYZEを避ける、定期実行するコマンド用）。
+    """
+    manager = ECDatabaseSchemaManager(db_path)
+    if manager.db_path.exists():
+        conn = connect(manager.db_path)
+        try:
+            if manager.get_version(conn) >= SCHEMA_VERSION:
+                return None
+        finally:
+            conn.close()
+    return manager.migrate()
+
+
+if __name__ == "__main__":
+    result = initialize_database()
+    print(f"📊 スキーマバージョン: v{result['version']} ({result['journal_mode']})")
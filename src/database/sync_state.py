@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC自動化システム - 差分同期状態管理
+マーケットプレイス・アカウントごとのハイウォーターマーク保存
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+from typing import Dict, Optional
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.database.schema import connect
+
+
+def format_utc(value: datetime) -> str:
+    """UTCのISO8601文字列に変換"""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_utc(value: str) -> datetime:
+    """ISO8601文字列をaware datetimeに変換"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class SyncStateStore:
+    """差分同期状態ストア"""
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        """初期化（接続未指定時は DATABASE_PATH に接続）"""
+        self._owns_connection = conn is None
+        self.conn = conn or connect()
+
+    def get(self, marketplace: str, account: str) -> Optional[Dict]:
+        """同期状態取得"""
+        row = self.conn.execute(
+            "SELECT high_water_mark, last_synced_at, last_order_count FROM sync_state "
+            "WHERE marketplace = ? AND account = ?",
+            (marketplace, account)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "high_water_mark": row[0],
+            "last_synced_at": row[1],
+            "last_order_count": row[2]
+        }
+
+    def get_sync_start(self, marketplace: str, account: str,
+                       overlap: timedelta, initial_days: int) -> datetime:
+        """次回取得開始時刻（前回の到達点から重複取得分だけ遡る）"""
+        state = self.get(marketplace, account)
+        if state is None:
+            return datetime.now(timezone.utc) - timedelta(days=initial_days)
+        return parse_utc(state["high_water_mark"]) - overlap
+
+    def set(self, marketplace: str, account: str, high_water_mark: datetime, order_count: int = 0):
+        """同期完了後にハイウォーターマーク更新（後退はさせない）"""
+        new_mark = format_utc(high_water_mark)
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO sync_state (marketplace, account, high_water_mark, last_synced_at, last_order_count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(marketplace, account) DO UPDATE SET
+                    high_water_mark = MAX(high_water_mark, excluded.high_water_mark),
+                    last_synced_at = excluded.last_synced_at,
+                    last_order_count = excluded.last_order_count
+            """, (marketplace, account, new_mark, format_utc(datetime.now(timezone.utc)), order_count))
+
+    def close(self):
+        """自前で開いた接続をクローズ"""
+        if self._owns_connection:
+            self.conn.close()
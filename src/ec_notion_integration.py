@@ -10,6 +10,7 @@ import json
 import asyncio
 import aiohttp
 import sqlite3
+import time
 from datetime import date, datetime, timedelta
 from pathlib import Path
 import sys
@@ -20,10 +21,30 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from config.settings import get_config
+from src.database.notion_outbox import open_outbox
+from src.notion_pages import drain_outbox, outbox_retry_delay, upsert_daily_page
+from src.rate_limiter import AsyncTokenBucket
 
 class ECAutomationNotionManager:
     """EC自動化システム × Notion統合管理クラス"""
     
+    # データソースごとのタイムアウト（秒）
+    SOURCE_TIMEOUTS = {
+        "automation_engine": 15.0,
+        "amazon_api": 30.0,
+        "rakuten_api": 30.0,
+        "ai_integration": 60.0,
+        "sqlite_database": 15.0
+    }
+    
+    # データソース名 → 統合データのキー
+    SOURCE_KEYS = {
+        "amazon_api": "amazon_data",
+        "rakuten_api": "rakuten_data",
+        "ai_integration": "ai_analysis",
+        "sqlite_database": "historical_data"
+    }
+    
     def __init__(self):
         """初期化 - 既存システムとの連携"""
         self.config = get_config()
@@ -33,7 +54,7 @@ class ECAutomationNotionManager:
         self.database_id = os.getenv('NOTION_DATABASE_ID') or "212e415da2cf8012b4f5cbea3cadb458"
         
         # Notion API設定
-        self.notion_api_base = "https://api.notion.com/v1"
+        self.notion_api_base = self.config.notion_api_base_url
         self.headers = {
             "Authorization": f"Bearer {self.notion_token}",
             "Content-Type": "application/json",
@@ -82,8 +103,48 @@ class ECAutomationNotionManager:
         
         return integration_status
     
+    async def _fetch_amazon_data(self):
+        """Amazon APIデータ取得"""
+        from src.amazon_connector.amazon_api import AmazonSPAPIConnector
+        amazon_connector = AmazonSPAPIConnector()
+        try:
+            return await amazon_connector.get_sales_data_async()
+        finally:
+            await amazon_connector.close()
+    
+    def _fetch_rakuten_data(self):
+        """楽天APIデータ取得（同期処理: スレッドプールで実行）"""
+        from src.rakuten_connector.rakuten_api import RakutenAPIConnector
+        return RakutenAPIConnector().get_comprehensive_data()
+    
+    async def _fetch_ai_analysis(self):
+        """AI分析データ取得"""
+        from src.ai_integration.ai_engine import ECAIIntegrationEngine
+        async with ECAIIntegrationEngine() as ai_engine:
+            return await ai_engine.analyze_ec_performance()
+    
+    def _fetch_dashboard_snapshot(self):
+        """自動化エンジンデータ取得（SQLite集計: スレッドプールで実行）"""
+        from src.automation_engine_24h import get_dashboard_snapshot
+        return get_dashboard_snapshot()
+    
+    async def _run_source(self, name: str, label: str, source, timeout: float):
+        """データソース1件を実行（失敗・タイムアウトは他ソースに影響させない）"""
+        started = time.monotonic()
+        try:
+            # 同期関数はイベントループを塞がないようスレッドで実行
+            awaitable = source() if asyncio.iscoroutinefunction(source) else asyncio.to_thread(source)
+            result = await asyncio.wait_for(awaitable, timeout)
+            print(f"✅ {label}取得完了 ({time.monotonic() - started:.2f}秒)")
+            return name, result, time.monotonic() - started
+        except asyncio.TimeoutError:
+            print(f"⚠️ {label}取得タイムアウト ({timeout}秒)")
+        except Exception as e:
+            print(f"⚠️ {label}取得失敗: {e}")
+        return name, None, time.monotonic() - started
+    
     async def get_comprehensive_ec_data(self):
-        """既存システムから包括的データ取得"""
+        """既存システムから包括的データ取得（独立したデータソースを並行取得）"""
         comprehensive_data = {
             "timestamp": datetime.now().isoformat(),
             "data_sources": [],
@@ -94,58 +155,33 @@ class ECAutomationNotionManager:
             "system_status": {}
         }
         
-        # 1. 自動化エンジンからデータ取得
-        try:
-            from src.automation_engine_24h import fetch_dashboard_data
-            dashboard_data = fetch_dashboard_data()
-            comprehensive_data.update(dashboard_data)
-            comprehensive_data["data_sources"].append("automation_engine")
-            print("✅ 自動化エンジンデータ取得完了")
-        except Exception as e:
-            print(f"⚠️ 自動化エンジンデータ取得失敗: {e}")
-        
-        # 2. Amazon APIデータ取得
-        try:
-            from src.amazon_connector.amazon_api import AmazonSPAPIConnector
-            amazon_connector = AmazonSPAPIConnector()
-            amazon_data = amazon_connector.get_sales_data()
-            comprehensive_data["amazon_data"] = amazon_data
-            comprehensive_data["data_sources"].append("amazon_api")
-            print("✅ Amazon APIデータ取得完了")
-        except Exception as e:
-            print(f"⚠️ Amazon APIデータ取得失敗: {e}")
-        
-        # 3. 楽天APIデータ取得
-        try:
-            from src.rakuten_connector.rakuten_api import RakutenAPIConnector
-            rakuten_connector = RakutenAPIConnector()
-            rakuten_data = rakuten_connector.get_comprehensive_data()
-            comprehensive_data["rakuten_data"] = rakuten_data
-            comprehensive_data["data_sources"].append("rakuten_api")
-            print("✅ 楽天APIデータ取得完了")
-        except Exception as e:
-            print(f"⚠️ 楽天APIデータ取得失敗: {e}")
-        
-        # 4. AI分析データ取得
-        try:
-            from src.ai_integration.ai_engine import ECAIIntegrationEngine
-            ai_engine = ECAIIntegrationEngine()
-            ai_results = await ai_engine.analyze_ec_performance()
-            comprehensive_data["ai_analysis"] = ai_results
-            comprehensive_data["data_sources"].append("ai_integration")
-            print("✅ AI分析データ取得完了")
-        except Exception as e:
-            print(f"⚠️ AI分析データ取得失敗: {e}")
-        
-        # 5. データベースから履歴データ取得
+        # (データソース名, 表示名, 取得関数)
+        sources = [
+            ("automation_engine", "自動化エンジンデータ", self._fetch_dashboard_snapshot),
+            ("amazon_api", "Amazon APIデータ", self._fetch_amazon_data),
+            ("rakuten_api", "楽天APIデータ", self._fetch_rakuten_data),
+            ("ai_integration", "AI分析データ", self._fetch_ai_analysis),
+        ]
         if self.db_path.exists():
-            try:
-                historical_data = self._get_historical_data()
-                comprehensive_data["historical_data"] = historical_data
-                comprehensive_data["data_sources"].append("sqlite_database")
-                print("✅ 履歴データ取得完了")
-            except Exception as e:
-                print(f"⚠️ 履歴データ取得失敗: {e}")
+            sources.append(("sqlite_database", "履歴データ", self._get_historical_data))
+        
+        # 全体の所要時間は最も遅いデータソース程度になる
+        results = await asyncio.gather(*[
+            self._run_source(name, label, source, self.SOURCE_TIMEOUTS[name])
+            for name, label, source in sources
+        ])
+        
+        # 取得できたソースだけを定義順にマージ
+        comprehensive_data["source_timings"] = {}
+        for name, result, elapsed in results:
+            comprehensive_data["source_timings"][name] = round(elapsed, 3)
+            if result is None:
+                continue
+            if name == "automation_engine":
+                comprehensive_data.update(result)
+            else:
+                comprehensive_data[self.SOURCE_KEYS[name]] = result
+            comprehensive_data["data_sources"].append(name)
         
         # データ補強・計算
         comprehensive_data = self._enhance_data_calculations(comprehensive_data)
@@ -158,21 +194,32 @@ class ECAutomationNotionManager:
             return {}
         
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            from src.database.schema import connect, has_table
+            conn = connect(self.db_path)
             cur = conn.cursor()
             
             end_date = date.today()
             start_date = end_date - timedelta(days=days)
             
+            # ロールアップ作成済みなら日数分の行だけを読む
+            use_rollups = has_table(conn, "sales_daily") and has_table(conn, "profit_daily")
+            
             # 売上履歴
-            cur.execute("""
-                SELECT date, SUM(amount) as daily_sales, COUNT(*) as order_count
-                FROM sales 
-                WHERE date BETWEEN ? AND ?
-                GROUP BY date
-                ORDER BY date DESC
-            """, (start_date.isoformat(), end_date.isoformat()))
+            if use_rollups:
+                cur.execute("""
+                    SELECT date, amount as daily_sales, order_count
+                    FROM sales_daily
+                    WHERE date BETWEEN ? AND ?
+                    ORDER BY date DESC
+                """, (start_date.isoformat(), end_date.isoformat()))
+            else:
+                cur.execute("""
+                    SELECT date, SUM(amount) as daily_sales, COUNT(*) as order_count
+                    FROM sales 
+                    WHERE date BETWEEN ? AND ?
+                    GROUP BY date
+                    ORDER BY date DESC
+                """, (start_date.isoformat(), end_date.isoformat()))
             
             sales_history = {
                 row["date"]: {
@@ -183,13 +230,21 @@ class ECAutomationNotionManager:
             }
             
             # 利益履歴
-            cur.execute("""
-                SELECT date, SUM(profit) as daily_profit
-                FROM profit
-                WHERE date BETWEEN ? AND ?
-                GROUP BY date
-                ORDER BY date DESC
-            """, (start_date.isoformat(), end_date.isoformat()))
+            if use_rollups:
+                cur.execute("""
+                    SELECT date, profit as daily_profit
+                    FROM profit_daily
+                    WHERE date BETWEEN ? AND ?
+                    ORDER BY date DESC
+                """, (start_date.isoformat(), end_date.isoformat()))
+            else:
+                cur.execute("""
+                    SELECT date, SUM(profit) as daily_profit
+                    FROM profit
+                    WHERE date BETWEEN ? AND ?
+                    GROUP BY date
+                    ORDER BY date DESC
+                """, (start_date.isoformat(), end_date.isoformat()))
             
             profit_history = {
                 row["date"]: row["daily_profit"]
@@ -246,8 +301,14 @@ class ECAutomationNotionManager:
         
         return data
     
-    async def sync_to_notion_database(self, target_date: Optional[str] = None):
-        """Notionデータベースへの統合同期"""
+    async def sync_to_notion_database(self, target_date: Optional[str] = None,
+                                      rate_limiter: Optional[AsyncTokenBucket] = None,
+                                      force: bool = False, write_through: bool = False):
+        """Notionデータベースへの統合同期（既定では送信待ちキューに登録し、送信は flush_outbox で行う）
+
+        write_through=True または送信待ちキュー未作成時はその場でNotionに書き込む
+        （rate_limiter: 一括同期時に共有する送信枠、force: 変更なしでも書き込む）。
+        """
         if not self.notion_token or not self.database_id:
             print("❌ Notion設定が不完全です")
             print("💡 NOTION_TOKEN と NOTION_DATABASE_ID を .env ファイルに設定してください")
@@ -264,29 +325,113 @@ class ECAutomationNotionManager:
         # Notion用データ構造作成
         notion_data = self._create_notion_page_data(comprehensive_data, target_date)
         
+        if write_through or not self.queue_notion_page(target_date, notion_data["properties"], force):
+            success = await self._write_notion_page(target_date, notion_data, rate_limiter, force)
+        else:
+            success = True
+        if success:
+            # 同期結果サマリー表示
+            self._display_sync_summary(comprehensive_data)
+        return success
+    
+    async def _write_notion_page(self, target_date: str, notion_data: Dict,
+                                 rate_limiter: Optional[AsyncTokenBucket] = None, force: bool = False):
+        """日次ページをNotionに書き込み（同じ日付のページがあれば更新、前回と同内容なら省略）
+
+        書き込めなかった内容は送信待ちキューに保存し、flush_outbox で再送する。
+        """
         try:
             async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.notion_api_base}/pages",
-                    headers=self.headers,
-                    json=notion_data
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        print(f"✅ Notion同期完了: {target_date}")
-                        
-                        # 同期結果サマリー表示
-                        self._display_sync_summary(comprehensive_data)
-                        return True
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ Notion同期エラー: {response.status}")
-                        print(f"📄 エラー詳細: {error_text}")
-                        return False
-                        
+                response, action = await upsert_daily_page(
+                    session, self.notion_api_base, self.headers,
+                    self.database_id, target_date, notion_data["properties"],
+                    rate_limiter=rate_limiter, force=force
+                )
+            if action == "unchanged":
+                print(f"⏭️ 変更なしのためスキップ: {target_date}")
+                self._discard_pending(target_date)
+                return True
+            if response.status == 200:
+                print(f"✅ Notion同期完了: {target_date}（{'更新' if action == 'updated' else '新規作成'}）")
+                self._discard_pending(target_date)
+                return True
+            else:
+                print(f"❌ Notion同期エラー: {response.status}")
+                print(f"📄 エラー詳細: {response.text}")
+                
         except Exception as e:
             print(f"❌ Notion同期エラー: {e}")
+        
+        # 直後の再送で失敗を繰り返さないよう、再送間隔を空けて保存
+        self.queue_notion_page(target_date, notion_data["properties"], force, outbox_retry_delay(0))
+        return False
+    
+    def queue_notion_page(self, target_date: str, properties: Dict,
+                          force: bool = False, delay: float = 0.0):
+        """日次ページを送信待ちキューに登録（Notionへは送信せず即時に戻る、delay秒後から再送対象）"""
+        outbox = open_outbox()
+        if outbox is None:
             return False
+        try:
+            outbox.enqueue(self.database_id, target_date, properties, force, delay)
+            print(f"📮 送信待ちキューに保存: {target_date}（python main.py notion --drain で再送）")
+            return True
+        finally:
+            outbox.close()
+    
+    def queue_daily_pages(self, days: int = 1, force: bool = False) -> Optional[int]:
+        """直近days日分（当日を含む）の日次ページを履歴データから作成し、送信待ちキューに登録
+
+        Notionへは送信しない（同じ日付は最新内容1件にまとまる）。送信待ちキューが使えなければNone。
+        """
+        outbox = open_outbox()
+        if outbox is None:
+            return None
+        try:
+            today = date.today()
+            history = self._get_daily_history(today - timedelta(days=days - 1), today)
+            for target_date in sorted(history, reverse=True):
+                page_data = self._create_backfill_page_data(history[target_date], target_date)
+                outbox.enqueue(self.database_id, target_date, page_data["properties"], force)
+        finally:
+            outbox.close()
+        
+        if history:
+            print(f"📮 Notion送信待ちに登録: {len(history)}日分")
+        return len(history)
+    
+    def _discard_pending(self, target_date: str):
+        """直接書き込めた日付の送信待ちを取り消し（古い内容での上書き防止）"""
+        outbox = open_outbox()
+        if outbox is None:
+            return
+        try:
+            outbox.discard(self.database_id, target_date)
+        finally:
+            outbox.close()
+    
+    async def flush_outbox(self):
+        """送信待ちキューをNotionに再送（送信時刻に達したもののみ）"""
+        if not self.notion_token or not self.database_id:
+            print("❌ Notion設定が不完全です")
+            return None
+        outbox = open_outbox()
+        if outbox is None:
+            return None
+        try:
+            pending = outbox.stats()["pending"]
+            if not outbox.due(1):
+                # 送信待ちなし・再送間隔中のみ（常駐ドレイナーから毎回呼ばれるため何も表示しない）
+                return {"sent": 0, "unchanged": 0, "failed": 0, "remaining": pending}
+            print(f"📮 送信待ち {pending} 件をNotionに再送中...")
+            async with aiohttp.ClientSession() as session:
+                counts = await drain_outbox(session, self.notion_api_base, self.headers, outbox)
+        finally:
+            outbox.close()
+        
+        print(f"📮 再送結果: 送信 {counts['sent']} 件・変更なし {counts['unchanged']} 件・失敗 {counts['failed']} 件"
+              f"（残り {counts['remaining']} 件）")
+        return counts
     
     def _create_notion_page_data(self, data: Dict, target_date: str):
         """Notion用ページデータ作成"""
@@ -372,6 +517,99 @@ class ECAutomationNotionManager:
         
         return notion_page_data
     
+    def _get_daily_history(self, start_date: date, end_date: date) -> Dict[str, Dict]:
+        """期間の日別売上（プラットフォーム別）・利益を範囲クエリで一括取得"""
+        from src.database.schema import connect, has_table
+        conn = connect(self.db_path)
+        
+        try:
+            period = (start_date.isoformat(), end_date.isoformat())
+            use_rollups = has_table(conn, "sales_daily_platform_sku") and has_table(conn, "profit_daily")
+            
+            if use_rollups:
+                sales_rows = conn.execute("""
+                    SELECT date, platform, SUM(amount) AS amount, SUM(order_count) AS order_count
+                    FROM sales_daily_platform_sku
+                    WHERE date BETWEEN ? AND ?
+                    GROUP BY date, platform
+                """, period).fetchall()
+                profit_rows = conn.execute("""
+                    SELECT date, profit
+                    FROM profit_daily
+                    WHERE date BETWEEN ? AND ?
+                """, period).fetchall()
+            else:
+                sales_rows = conn.execute("""
+                    SELECT date, COALESCE(platform, '') AS platform, SUM(amount) AS amount, COUNT(*) AS order_count
+                    FROM sales
+                    WHERE date BETWEEN ? AND ?
+                    GROUP BY date, COALESCE(platform, '')
+                """, period).fetchall()
+                profit_rows = conn.execute("""
+                    SELECT date, SUM(profit) AS profit
+                    FROM profit
+                    WHERE date BETWEEN ? AND ?
+                    GROUP BY date
+                """, period).fetchall()
+        finally:
+            conn.close()
+        
+        history: Dict[str, Dict] = {}
+        
+        def day_entry(day: str) -> Dict:
+            return history.setdefault(day, {"sales": 0, "orders": 0, "profit": 0, "platforms": {}})
+        
+        for row in sales_rows:
+            day = day_entry(row["date"])
+            day["sales"] += row["amount"]
+            day["orders"] += row["order_count"]
+            day["platforms"][row["platform"]] = {"sales": row["amount"], "orders": row["order_count"]}
+        for row in profit_rows:
+            day_entry(row["date"])["profit"] = row["profit"]
+        
+        return history
+    
+    def _create_backfill_page_data(self, day: Dict, target_date: str):
+        """履歴1日分からNotion用ページデータ作成（その日の実績で決まる項目のみ）"""
+        amazon = day["platforms"].get("amazon", {})
+        rakuten = day["platforms"].get("rakuten", {})
+        
+        return {
+            "parent": {"database_id": self.database_id},
+            "properties": {
+                "日付": {
+                    "date": {"start": target_date}
+                },
+                "総売上": {
+                    "number": day["sales"]
+                },
+                "注文数": {
+                    "number": day["orders"]
+                },
+                "平均注文額": {
+                    "number": int(day["sales"] / day["orders"]) if day["orders"] else 0
+                },
+                "利益率": {
+                    "number": round(day["profit"] / day["sales"], 3) if day["sales"] else 0
+                },
+                "今日の利益": {
+                    "number": day["profit"]
+                },
+                "Amazon売上": {
+                    "number": amazon.get("sales", 0)
+                },
+                "Amazon注文数": {
+                    "number": amazon.get("orders", 0)
+                },
+                "楽天売上": {
+                    "number": rakuten.get("sales", 0)
+                },
+                "楽天注文数": {
+                    "number": rakuten.get("orders", 0)
+                }
+            }
+        }
+    
     def _display_sync_summary(self, data: Dict):
         """同期結果サマリー表示"""
         sales = data.get("sales", {})
@@ -387,25 +625,32 @@ class ECAutomationNotionManager:
         print(f"🔗 データソース: {', '.join(data_sources)}")
         print(f"🕐 同期時刻: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    async def batch_sync_period(self, days: int = 7):
-        """期間データ一括同期"""
-        print(f"📅 過去{days}日間のデータを一括同期開始...")
+    async def batch_sync_period(self, days: int = 7, force: bool = False):
+        """期間データ一括同期（履歴を1回だけ取得し各日の実績からページ作成）
+
+        日ごとの包括データ取得（AI分析・外部API）は行わない。
+        在庫・AI提案・稼働状況はその日の値が残らないため書き込まず、既存ページの値を保持する。
+        各日は送信待ちキューに登録し、1回の再送（HTTPセッション・ページ索引を共有）でまとめて送信する。
+        """
+        if not self.notion_token or not self.database_id:
+            print("❌ Notion設定が不完全です")
+            print("💡 NOTION_TOKEN と NOTION_DATABASE_ID を .env ファイルに設定してください")
+            return 0
+        if not self.db_path.exists():
+            print(f"❌ データベースがありません: {self.db_path}")
+            return 0
         
-        success_count = 0
-        today = date.today()
+        print(f"📅 過去{days}日間のデータを一括同期開始...")
         
-        for i in range(days):
-            target_date = (today - timedelta(days=i)).isoformat()
-            print(f"📊 {target_date} のデータを同期中...")
-            
-            success = await self.sync_to_notion_database(target_date)
-            if success:
-                success_count += 1
-            
-            # API制限回避
-            await asyncio.sleep(1)
+        queued = await asyncio.to_thread(self.queue_daily_pages, days, force)
+        if queued is None:
+            return 0
         
-        print(f"✅ 一括同期完了: {success_count}/{days} 日成功")
+        counts = await self.flush_outbox()
+        success_count = counts["sent"] + counts["unchanged"] if counts else 0
+        if queued < days:
+            print(f"ℹ️ 売上・利益データのない {days - queued} 日はスキップしました")
+        print(f"✅ 一括同期完了: {queued}日分を登録・{success_count}件を反映")
         return success_count
     
     def create_integration_report(self):
@@ -439,7 +684,7 @@ class ECAutomationNotionManager:
             report["recommendations"].append({
                 "priority": "中",
                 "action": "データベース初期化",
-                "description": "python main.py automation を実行してデータベースを作成してください"
+                "description": "python main.py setup を実行してデータベースを作成してください"
             })
         
         return report
@@ -487,6 +732,9 @@ async def main():
     # 今日のデータ同期
     print("\n📊 今日のデータをNotionに同期中...")
     success = await manager.sync_to_notion_database()
+    counts = await manager.flush_outbox()
+    if counts is not None and counts["failed"]:
+        success = False
     
     if success:
         print("\n🎉 EC自動化システム × Notion連携完了！")
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+"""
+フェイク外部サービス（負荷試験・結合テスト用）
+Amazon SP-API・楽天RMS・Notion・Gemini・Anthropic をローカルで再現
+"""
+
+from src.fake_services.server import (
+    FAKE_CREDENTIALS, FakeServicesServer, base_url_overrides, create_app
+)
+from src.fake_services.settings import FakeServiceSettings
+
+__all__ = [
+    "FAKE_CREDENTIALS",
+    "FakeServiceSettings",
+    "FakeServicesServer",
+    "base_url_overrides",
+    "create_app",
+]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェイク外部サービス起動
+
+使用例:
+  python -m src.fake_services --port 8900 --orders 1000000 --latency 0.05 --error-rate 0.01
+"""
+
+import argparse
+from pathlib import Path
+import sys
+
+from aiohttp import web
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from src.fake_services.server import FAKE_CREDENTIALS, base_url_overrides, create_app
+from src.fake_services.settings import FakeServiceSettings
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="フェイク外部サービス（SP-API・RMS・Notion・Gemini・Anthropic）")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=8900, help="待ち受けポート")
+    parser.add_argument("--orders", type=int, default=10000, help="注文数（SP-API・RMSそれぞれ）")
+    parser.add_argument("--days", type=int, default=30, help="注文を配置する直近日数")
+    parser.add_argument("--items-per-order", type=int, default=1, help="1注文あたりの明細数")
+    parser.add_argument("--latency", type=float, default=0.0, help="応答遅延（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="応答遅延の揺らぎ（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503を返す確率（0〜1）")
+    parser.add_argument("--rate-limits", action="store_true", help="本番相当のレート制限を適用（超過時429）")
+    parser.add_argument("--report-polls", type=int, default=1, help="レポート完了までのIN_PROGRESS回数")
+    parser.add_argument("--seed", type=int, default=None, help="乱数シード")
+    args = parser.parse_args()
+
+    settings = FakeServiceSettings(
+        latency=args.latency,
+        latency_jitter=args.jitter,
+        error_rate=args.error_rate,
+        enforce_rate_limits=args.rate_limits,
+        order_count=args.orders,
+        order_days=args.days,
+        items_per_order=args.items_per_order,
+        report_polls=args.report_polls,
+        seed=args.seed
+    )
+
+    base_url = f"http://{args.host}:{args.port}"
+    print("🧪 フェイク外部サービス起動")
+    print(f"📦 注文数: {args.orders:,}件 / 直近{args.days}日  ⏱️ 遅延: {args.latency}秒  💥 エラー率: {args.error_rate}")
+    print("\n💡 以下を .env または環境変数に設定すると各コネクターがこのサーバーに接続します:")
+    for key, value in {**base_url_overrides(base_url), **FAKE_CREDENTIALS}.items():
+        print(f"{key}={value}")
+    print()
+
+    web.run_app(create_app(settings), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
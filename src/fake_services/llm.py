@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェイク外部サービス - Gemini・Anthropic API
+プロンプトから決定的に生成した文章を返す
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Dict, List
+
+from aiohttp import web
+
+# 応答文の素材（EC施策提案風）
+SENTENCES = [
+    "商品ページの画像とタイトルを検索意図に合わせて改善します。",
+    "在庫回転率の高い商品に広告予算を集中させます。",
+    "送料無料ラインを平均注文額の少し上に設定してまとめ買いを促します。",
+    "レビュー依頼メールを発送3日後に自動送信します。",
+    "競合価格を毎日確認し、利益率を保てる範囲で価格を調整します。",
+    "楽天スーパーSALEに合わせてクーポンと在庫を事前に準備します。",
+    "定期購入の対象商品を増やしてリピート売上を安定させます。",
+]
+
+
+def generate_text(prompt: str, length: int) -> str:
+    """プロンプトに応じた決定的な文章（length文字）"""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    parts: List[str] = []
+    total = 0
+    i = 0
+    while total < length:
+        sentence = f"{i + 1}. {SENTENCES[(digest[i % len(digest)] + i) % len(SENTENCES)]}\n"
+        parts.append(sentence)
+        total += len(sentence)
+        i += 1
+    return "".join(parts)[:length]
+
+
+def _gemini_prompt(body: Dict) -> str:
+    """generateContent リクエストのプロンプト文字列"""
+    return "".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+
+def _anthropic_prompt(body: Dict) -> str:
+    """messages リクエストのプロンプト文字列"""
+    texts = []
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            texts.append(content)
+        else:
+            texts.extend(block.get("text", "") for block in content or [])
+    return "".join(texts)
+
+
+def _split_chunks(text: str, size: int) -> List[str]:
+    """ストリーミング用に本文を分割"""
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+async def _send_sse(request: web.Request, events: List[Dict], with_event_names: bool) -> web.StreamResponse:
+    """SSEで順に送信（クライアント切断時は残りを送らない）"""
+    settings = request.app["settings"]
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+    try:
+        for event in events:
+            lines = f"event: {event['type']}\n" if with_event_names else ""
+            lines += f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+            await response.write(lines.encode("utf-8"))
+            request.app["stats"]["llm.stream_events"] += 1
+            if settings.llm_stream_delay:
+                await asyncio.sleep(settings.llm_stream_delay)
+        await response.write_eof()
+    except (ConnectionResetError, asyncio.CancelledError):
+        # 早期打ち切りでクライアントが切断した
+        request.app["stats"]["llm.stream_disconnects"] += 1
+    return response
+
+
+def _check_gemini_key(request: web.Request):
+    """APIキー確認（未指定なら403応答）"""
+    if not request.query.get("key") and not request.headers.get("x-goog-api-key"):
+        return web.json_response({"error": {"code": 403, "status": "PERMISSION_DENIED"}}, status=403)
+    return None
+
+
+async def gemini_generate_content(request: web.Request) -> web.Response:
+    """POST /v1beta/models/{model}:generateContent"""
+    model = request.match_info["model"]
+    denied = _check_gemini_key(request)
+    if denied is not None:
+        return denied
+
+    body = await request.json()
+    text = generate_text(_gemini_prompt(body), request.app["settings"].llm_response_chars)
+    return web.json_response({
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": text}]},
+            "finishReason": "STOP",
+            "index": 0
+        }],
+        "modelVersion": model
+    })
+
+
+async def gemini_stream_generate_content(request: web.Request) -> web.StreamResponse:
+    """POST /v1beta/models/{model}:streamGenerateContent?alt=sse"""
+    model = request.match_info["model"]
+    denied = _check_gemini_key(request)
+    if denied is not None:
+        return denied
+
+    body = await request.json()
+    settings = request.app["settings"]
+    text = generate_text(_gemini_prompt(body), settings.llm_response_chars)
+    chunks = _split_chunks(text, settings.llm_stream_chunk_chars)
+    events = [
+        {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": chunk}]},
+                **({"finishReason": "STOP"} if i == len(chunks) - 1 else {}),
+                "index": 0
+            }],
+            "modelVersion": model
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+    return await _send_sse(request, events, with_event_names=False)
+
+
+async def anthropic_messages(request: web.Request) -> web.Response:
+    """POST /v1/messages"""
+    if not request.headers.get("x-api-key"):
+        return web.json_response(
+            {"type": "error", "error": {"type": "authentication_error", "message": "missing x-api-key"}},
+            status=401
+        )
+
+    body = await request.json()
+    prompt = _anthropic_prompt(body)
+    # max_tokens を超えない長さに揃える（日本語1文字≒1トークンの概算）
+    length = min(request.app["settings"].llm_response_chars, int(body.get("max_tokens", 1024)))
+    text = generate_text(prompt, length)
+    message_id = "msg_" + hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:24]
+    stop_reason = "max_tokens" if length < request.app["settings"].llm_response_chars else "end_turn"
+
+    if body.get("stream"):
+        chunks = _split_chunks(text, request.app["settings"].llm_stream_chunk_chars)
+        events = [
+            {"type": "message_start", "message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": body.get("model"),
+                "content": [], "stop_reason": None, "usage": {"input_tokens": len(prompt), "output_tokens": 0}
+            }},
+            {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+            {"type": "ping"},
+            *[
+                {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}}
+                for chunk in chunks
+            ],
+            {"type": "content_block_stop", "index": 0},
+            {"type": "message_delta", "delta": {"stop_reason": stop_reason}, "usage": {"output_tokens": len(text)}},
+            {"type": "message_stop"},
+        ]
+        return await _send_sse(request, events, with_event_names=True)
+
+    return web.json_response({
+        "id": message_id,
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": stop_reason,
+        "usage": {"input_tokens": len(prompt), "output_tokens": len(text)}
+    })
+
+
+def add_llm_routes(app: web.Application, gemini_prefix: str, anthropic_prefix: str):
+    """Gemini・Anthropicのルート登録"""
+    app.router.add_post(
+        f"{gemini_prefix}/v1beta/models/{{model}}:generateContent", gemini_generate_content,
+        name="gemini.generateContent"
+    )
+    app.router.add_post(
+        f"{gemini_prefix}/v1beta/models/{{model}}:streamGenerateContent", gemini_stream_generate_content,
+        name="gemini.streamGenerateContent"
+    )
+    app.router.add_post(f"{anthropic_prefix}/v1/messages", anthropic_messages, name="anthropic.messages")
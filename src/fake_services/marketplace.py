@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェイク外部サービス - Amazon SP-API・楽天RMS
+注文は番号から決定的に生成し、大量件数でもメモリに保持しない
+"""
+
+import asyncio
+import math
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+
+from aiohttp import web
+
+JST = timezone(timedelta(hours=9))
+SP_API_PAGE_SIZE = 100
+RMS_SHOP_ID = "100000"
+INVENTORY_SKU_COUNT = 500
+REPORT_CHUNK_LINES = 2000
+
+ORDER_REPORT_COLUMNS = [
+    "amazon-order-id", "purchase-date", "last-updated-date", "order-status",
+    "sku", "item-status", "quantity", "currency", "item-price", "shipping-price"
+]
+INVENTORY_REPORT_COLUMNS = ["item-name", "seller-sku", "price", "quantity"]
+
+
+class OrderCatalog:
+    """直近N日に均等配置した注文の決定的生成"""
+
+    def __init__(self, count: int, days: int, items_per_order: int = 1, now: Optional[datetime] = None):
+        """初期化"""
+        self.count = count
+        self.items_per_order = max(1, items_per_order)
+        self.end = now or datetime.now(timezone.utc)
+        self.start = self.end - timedelta(days=days)
+        self.step = (self.end - self.start) / max(1, count)
+
+    def created_at(self, index: int) -> datetime:
+        """注文日時"""
+        return self.start + self.step * index
+
+    def first_index_after(self, value: datetime) -> int:
+        """指定日時以降の最初の注文番号"""
+        position = (value - self.start) / self.step
+        return max(0, min(self.count, math.ceil(position)))
+
+    def item_price(self, index: int) -> int:
+        """明細単価（円）"""
+        return 1000 + (index * 7919) % 9000
+
+    def total(self, index: int) -> int:
+        """注文合計（円）"""
+        return self.item_price(index) * self.items_per_order
+
+    def is_canceled(self, index: int) -> bool:
+        """キャンセル注文か（50件に1件）"""
+        return index % 50 == 49
+
+    def sku(self, index: int, item: int) -> str:
+        """明細SKU"""
+        return f"SKU-{(index * 31 + item) % INVENTORY_SKU_COUNT:04d}"
+
+
+def _parse_time(value: str) -> datetime:
+    """ISO8601（Z・+0900形式を含む）をaware datetimeに変換"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _utc(value: datetime) -> str:
+    """SP-API形式のUTC日時"""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ---- Amazon SP-API ----
+
+def amazon_order_id(index: int) -> str:
+    """Amazon注文番号"""
+    return f"250-{index // 10000000:07d}-{index % 10000000:07d}"
+
+
+def amazon_order(catalog: OrderCatalog, index: int) -> Dict:
+    """getOrders の注文オブジェクト"""
+    created = _utc(catalog.created_at(index))
+    return {
+        "AmazonOrderId": amazon_order_id(index),
+        "PurchaseDate": created,
+        "LastUpdateDate": created,
+        "OrderStatus": "Canceled" if catalog.is_canceled(index) else "Shipped",
+        "OrderTotal": {"CurrencyCode": "JPY", "Amount": f"{catalog.total(index)}.00"},
+        "NumberOfItemsShipped": catalog.items_per_order,
+        "MarketplaceId": "A1VC38T7YXB528"
+    }
+
+
+async def lwa_token(request: web.Request) -> web.Response:
+    """LWAアクセストークン発行"""
+    return web.json_response({"access_token": "fake-access-token", "token_type": "bearer", "expires_in": 3600})
+
+
+async def sp_api_get_orders(request: web.Request) -> web.Response:
+    """getOrders（CreatedAfter・LastUpdatedAfter・NextToken）"""
+    catalog: OrderCatalog = request.app["amazon_orders"]
+    query = request.query
+
+    if "NextToken" in query:
+        start, end = (int(part) for part in query["NextToken"].split(":"))
+    else:
+        after = query.get("LastUpdatedAfter") or query.get("CreatedAfter")
+        if not after:
+            return web.json_response({"errors": [{"code": "InvalidInput"}]}, status=400)
+        start = catalog.first_index_after(_parse_time(after))
+        before = query.get("LastUpdatedBefore") or query.get("CreatedBefore")
+        end = catalog.first_index_after(_parse_time(before)) if before else catalog.count
+
+    page_end = min(end, start + SP_API_PAGE_SIZE)
+    payload = {"Orders": [amazon_order(catalog, i) for i in range(start, page_end)]}
+    if page_end < end:
+        payload["NextToken"] = f"{page_end}:{end}"
+    return web.json_response({"payload": payload})
+
+
+async def sp_api_create_report(request: web.Request) -> web.Response:
+    """createReport"""
+    body = await request.json()
+    reports = request.app["amazon_reports"]
+    report_id = str(len(reports) + 1)
+    reports[report_id] = {"body": body, "polls": 0}
+    return web.json_response({"reportId": report_id}, status=202)
+
+
+async def sp_api_get_report(request: web.Request) -> web.Response:
+    """getReport（report_polls回は処理中）"""
+    report_id = request.match_info["report_id"]
+    report = request.app["amazon_reports"].get(report_id)
+    if report is None:
+        return web.json_response({"errors": [{"code": "NotFound"}]}, status=404)
+
+    report["polls"] += 1
+    if report["polls"] <= request.app["settings"].report_polls:
+        return web.json_response({"reportId": report_id, "processingStatus": "IN_PROGRESS"})
+    return web.json_response({
+        "reportId": report_id, "processingStatus": "DONE", "reportDocumentId": f"doc-{report_id}"
+    })
+
+
+async def sp_api_get_report_document(request: web.Request) -> web.Response:
+    """getReportDocument（ダウンロードURLはこのサーバー自身）"""
+    document_id = request.match_info["document_id"]
+    prefix = request.app["amazon_prefix"]
+    return web.json_response({
+        "reportDocumentId": document_id,
+        "url": f"{request.scheme}://{request.host}{prefix}/_documents/{document_id}",
+        "compressionAlgorithm": "GZIP"
+    })
+
+
+def _order_report_lines(catalog: OrderCatalog, body: Dict) -> Iterator[str]:
+    """注文レポート行生成"""
+    start = catalog.first_index_after(_parse_time(body["dataStartTime"])) if body.get("dataStartTime") else 0
+    end = catalog.first_index_after(_parse_time(body["dataEndTime"])) if body.get("dataEndTime") else catalog.count
+
+    yield "\t".join(ORDER_REPORT_COLUMNS)
+    for index in range(start, end):
+        created = catalog.created_at(index).astimezone(timezone.utc).isoformat()
+        status = "Cancelled" if catalog.is_canceled(index) else "Shipped"
+        for item in range(catalog.items_per_order):
+            yield "\t".join([
+                amazon_order_id(index), created, created, status,
+                catalog.sku(index, item), status, "1", "JPY", f"{catalog.item_price(index)}.00", ""
+            ])
+
+
+def _inventory_report_lines() -> Iterator[str]:
+    """出品レポート行生成"""
+    yield "\t".join(INVENTORY_REPORT_COLUMNS)
+    for i in range(INVENTORY_SKU_COUNT):
+        yield f"商品{i}\tSKU-{i:04d}\t{1000 + i}\t{(i * 13) % 200}"
+
+
+async def sp_api_download_document(request: web.Request) -> web.StreamResponse:
+    """レポート本体（gzip圧縮TSVを生成しながら送信）"""
+    report_id = request.match_info["document_id"].split("-", 1)[-1]
+    report = request.app["amazon_reports"].get(report_id)
+    if report is None:
+        return web.Response(status=404, text="NoSuchKey")
+
+    if report["body"].get("reportType", "").startswith("GET_FLAT_FILE_ALL_ORDERS"):
+        lines = _order_report_lines(request.app["amazon_orders"], report["body"])
+    else:
+        lines = _inventory_report_lines()
+
+    response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=Windows-31J"})
+    await response.prepare(request)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    buffer: List[str] = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= REPORT_CHUNK_LINES:
+            await response.write(compressor.compress(("\n".join(buffer) + "\n").encode("cp932")))
+            buffer = []
+            # 大量生成中も他のリクエストを処理できるようにする
+            await asyncio.sleep(0)
+    if buffer:
+        await response.write(compressor.compress(("\n".join(buffer) + "\n").encode("cp932")))
+    await response.write(compressor.flush())
+    await response.write_eof()
+    return response
+
+
+def add_sp_api_routes(app: web.Application, prefix: str):
+    """SP-API・LWAのルート登録"""
+    app["amazon_prefix"] = prefix
+    app["amazon_reports"] = {}
+    app.router.add_post(f"{prefix}/auth/o2/token", lwa_token, name="amazon.lwa_token")
+    app.router.add_get(f"{prefix}/orders/v0/orders", sp_api_get_orders, name="sp_api.getOrders")
+    app.router.add_post(f"{prefix}/reports/2021-06-30/reports", sp_api_create_report, name="sp_api.createReport")
+    app.router.add_get(
+        f"{prefix}/reports/2021-06-30/reports/{{report_id}}", sp_api_get_report, name="sp_api.getReport"
+    )
+    app.router.add_get(
+        f"{prefix}/reports/2021-06-30/documents/{{document_id}}", sp_api_get_report_document,
+        name="sp_api.getReportDocument"
+    )
+    app.router.add_get(f"{prefix}/_documents/{{document_id}}", sp_api_download_document, name="sp_api.download")
+
+
+# ---- 楽天RMS ----
+
+def rms_order_number(catalog: OrderCatalog, index: int) -> str:
+    """RMS受注番号（店舗ID-注文日-連番）"""
+    ordered = catalog.created_at(index).astimezone(JST)
+    return f"{RMS_SHOP_ID}-{ordered:%Y%m%d}-{index:010d}"
+
+
+def rms_order(catalog: OrderCatalog, index: int) -> Dict:
+    """getOrder の受注オブジェクト"""
+    return {
+        "orderNumber": rms_order_number(catalog, index),
+        "orderDatetime": catalog.created_at(index).astimezone(JST).strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "orderProgress": 900 if catalog.is_canceled(index) else 300,
+        "totalPrice": catalog.total(index),
+        "goodsPrice": catalog.total(index)
+    }
+
+
+async def rms_search_order(request: web.Request) -> web.Response:
+    """searchOrder（期間内の受注番号をページング）"""
+    catalog: OrderCatalog = request.app["rakuten_orders"]
+    body = await request.json()
+    pagination = body.get("PaginationRequestModel") or {}
+    page_size = int(pagination.get("requestRecordsAmount", 30))
+    page = int(pagination.get("requestPage", 1))
+
+    start = catalog.first_index_after(_parse_time(body["startDatetime"]))
+    end = catalog.first_index_after(_parse_time(body["endDatetime"]))
+    total = max(0, end - start)
+    page_start = start + (page - 1) * page_size
+
+    return web.json_response({
+        "orderNumberList": [
+            rms_order_number(catalog, i) for i in range(page_start, min(end, page_start + page_size))
+        ],
+        "PaginationResponseModel": {
+            "totalRecordsAmount": total,
+            "totalPages": max(1, math.ceil(total / page_size)),
+            "requestPage": page
+        }
+    })
+
+
+async def rms_get_order(request: web.Request) -> web.Response:
+    """getOrder（最大100件）"""
+    catalog: OrderCatalog = request.app["rakuten_orders"]
+    body = await request.json()
+    order_numbers = body.get("orderNumberList") or []
+    if len(order_numbers) > 100:
+        return web.json_response({"Results": {"errorCode": "ES04-02", "message": "too many orders"}}, status=400)
+
+    orders = []
+    for number in order_numbers:
+        index = int(number.rsplit("-", 1)[-1])
+        if 0 <= index < catalog.count:
+            orders.append(rms_order(catalog, index))
+    return web.json_response({"OrderModelList": orders})
+
+
+def add_rms_routes(app: web.Application, prefix: str):
+    """RMSのルート登録"""
+    app.router.add_post(f"{prefix}/order/searchOrder/", rms_search_order, name="rms.searchOrder")
+    app.router.add_post(f"{prefix}/order/getOrder/", rms_get_order, name="rms.getOrder")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェイク外部サービス - Notion API
+ページ・データベースをメモリ上に保持
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+QUERY_PAGE_SIZE = 100
+
+
+def _now() -> str:
+    """Notion形式の現在時刻"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def notion_error(status: int, code: str, message: str) -> web.Response:
+    """Notion形式のエラー応答"""
+    return web.json_response({"object": "error", "status": status, "code": code, "message": message}, status=status)
+
+
+def _page_object(page: Dict) -> Dict:
+    """ページオブジェクト（応答用）"""
+    return {
+        "object": "page",
+        "id": page["id"],
+        "created_time": page["created_time"],
+        "last_edited_time": page["last_edited_time"],
+        "archived": page.get("archived", False),
+        "parent": page["parent"],
+        "properties": page["properties"]
+    }
+
+
+def _date_value(page: Dict, property_name: str) -> Optional[str]:
+    """日付プロパティの開始日"""
+    prop = page["properties"].get(property_name) or {}
+    return (prop.get("date") or {}).get("start")
+
+
+def _matches(page: Dict, query_filter: Optional[Dict]) -> bool:
+    """databases/query のフィルター判定（日付・and/or の主要形式のみ）"""
+    if not query_filter:
+        return True
+    if "and" in query_filter:
+        return all(_matches(page, f) for f in query_filter["and"])
+    if "or" in query_filter:
+        return any(_matches(page, f) for f in query_filter["or"])
+
+    condition = query_filter.get("date")
+    if condition is None:
+        return True
+    value = _date_value(page, query_filter.get("property", ""))
+    if value is None:
+        return bool(condition.get("is_empty"))
+    if "equals" in condition:
+        return value[:10] == condition["equals"][:10]
+    if "on_or_after" in condition and value[:10] < condition["on_or_after"][:10]:
+        return False
+    if "on_or_before" in condition and value[:10] > condition["on_or_before"][:10]:
+        return False
+    return True
+
+
+async def create_page(request: web.Request) -> web.Response:
+    """POST /pages"""
+    body = await request.json()
+    parent = body.get("parent") or {}
+    if not parent:
+        return notion_error(400, "validation_error", "body.parent should be defined")
+
+    now = _now()
+    page = {
+        "id": str(uuid.uuid4()),
+        "created_time": now,
+        "last_edited_time": now,
+        "parent": parent,
+        "properties": body.get("properties") or {},
+        "children": body.get("children") or []
+    }
+    request.app["notion_pages"][page["id"]] = page
+    return web.json_response(_page_object(page))
+
+
+async def get_page(request: web.Request) -> web.Response:
+    """GET /pages/{page_id}"""
+    page = request.app["notion_pages"].get(request.match_info["page_id"])
+    if page is None:
+        return notion_error(404, "object_not_found", "Could not find page")
+    return web.json_response(_page_object(page))
+
+
+async def update_page(request: web.Request) -> web.Response:
+    """PATCH /pages/{page_id}（指定プロパティのみ更新）"""
+    page = request.app["notion_pages"].get(request.match_info["page_id"])
+    if page is None:
+        return notion_error(404, "object_not_found", "Could not find page")
+
+    body = await request.json()
+    page["properties"].update(body.get("properties") or {})
+    if "archived" in body:
+        page["archived"] = bool(body["archived"])
+    page["last_edited_time"] = _now()
+    return web.json_response(_page_object(page))
+
+
+async def create_database(request: web.Request) -> web.Response:
+    """POST /databases"""
+    body = await request.json()
+    database_id = str(uuid.uuid4())
+    request.app["notion_databases"][database_id] = body
+    return web.json_response({"object": "database", "id": database_id, "properties": body.get("properties", {})})
+
+
+async def query_database(request: web.Request) -> web.Response:
+    """POST /databases/{database_id}/query"""
+    database_id = request.match_info["database_id"]
+    body = await request.json() if request.can_read_body else {}
+    page_size = min(QUERY_PAGE_SIZE, int(body.get("page_size", QUERY_PAGE_SIZE)))
+    start = int(body.get("start_cursor") or 0)
+
+    # ハイフン有無の違いは同一IDとして扱う
+    normalized = database_id.replace("-", "")
+    pages: List[Dict] = [
+        page for page in request.app["notion_pages"].values()
+        if (page["parent"].get("database_id") or "").replace("-", "") == normalized
+        and not page.get("archived")
+        and _matches(page, body.get("filter"))
+    ]
+
+    results = pages[start:start + page_size]
+    has_more = start + page_size < len(pages)
+    return web.json_response({
+        "object": "list",
+        "results": [_page_object(page) for page in results],
+        "has_more": has_more,
+        "next_cursor": str(start + page_size) if has_more else None
+    })
+
+
+def add_notion_routes(app: web.Application, prefix: str):
+    """Notionのルート登録"""
+    app["notion_pages"] = {}
+    app["notion_databases"] = {}
+    app.router.add_post(f"{prefix}/pages", create_page, name="notion.pages")
+    app.router.add_get(f"{prefix}/pages/{{page_id}}", get_page, name="notion.get_page")
+    app.router.add_patch(f"{prefix}/pages/{{page_id}}", update_page, name="notion.update_page")
+    app.router.add_post(f"{prefix}/databases", create_database, name="notion.databases")
+    app.router.add_post(
+        f"{prefix}/databases/{{database_id}}/query", query_database, name="notion.query"
+    )
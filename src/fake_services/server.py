@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェイク外部サービス - aiohttpアプリ・サーバー
+全サービスを1つのサーバーにパス前置きで同居させる
+"""
+
+import asyncio
+from collections import Counter
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from src.fake_services.llm import add_llm_routes
+from src.fake_services.marketplace import OrderCatalog, add_rms_routes, add_sp_api_routes
+from src.fake_services.notion import add_notion_routes
+from src.fake_services.settings import FakeRateLimiter, FakeServiceSettings
+
+# サービスごとのパス前置き
+AMAZON_PREFIX = "/amazon"
+RAKUTEN_PREFIX = "/rakuten/es/2.0"
+NOTION_PREFIX = "/notion/v1"
+GEMINI_PREFIX = "/gemini"
+ANTHROPIC_PREFIX = "/anthropic"
+
+# フェイクサービス利用時の認証情報（接続可否チェックを通すためのダミー値）
+FAKE_CREDENTIALS = {
+    "AMAZON_CLIENT_ID": "fake-client-id",
+    "AMAZON_CLIENT_SECRET": "fake-client-secret",
+    "AMAZON_REFRESH_TOKEN": "fake-refresh-token",
+    "AMAZON_SELLER_ID": "fake-seller",
+    "RAKUTEN_SERVICE_SECRET": "fake-service-secret",
+    "RAKUTEN_LICENSE_KEY": "fake-license-key",
+    "NOTION_TOKEN": "fake-notion-token",
+    "NOTION_DATABASE_ID": "00000000-0000-0000-0000-000000000000",
+    "GEMINI_API_KEY": "fake-gemini-key",
+    "CLAUDE_API_KEY": "fake-claude-key",
+}
+
+
+@web.middleware
+async def fault_injection_middleware(request: web.Request, handler):
+    """遅延・エラー・レート制限の注入と呼び出し回数の記録"""
+    settings: FakeServiceSettings = request.app["settings"]
+    route = request.match_info.route
+    operation = route.name if route is not None and route.name else "unknown"
+    request.app["stats"][operation] += 1
+
+    delay = settings.response_delay()
+    if delay:
+        await asyncio.sleep(delay)
+
+    if settings.enforce_rate_limits:
+        retry_after = request.app["rate_limiter"].check(operation)
+        if retry_after is not None:
+            request.app["stats"]["throttled"] += 1
+            headers = {"Retry-After": f"{retry_after:.3f}"}
+            if operation.startswith("sp_api."):
+                rate, _ = settings.rate_limits.get(operation, (0, 0))
+                headers["x-amzn-RateLimit-Limit"] = str(rate)
+            return web.json_response(
+                {"object": "error", "status": 429, "code": "rate_limited", "message": "Too Many Requests"},
+                status=429, headers=headers
+            )
+
+    if settings.should_fail():
+        request.app["stats"]["failed"] += 1
+        return web.json_response(
+            {"object": "error", "status": 503, "code": "service_unavailable", "message": "fake outage"},
+            status=503
+        )
+
+    response = await handler(request)
+    if settings.should_lose_response(operation):
+        request.app["stats"]["lost_responses"] += 1
+        return web.json_response(
+            {"object": "error", "status": 504, "code": "gateway_timeout", "message": "fake lost response"},
+            status=504
+        )
+    return response
+
+
+def create_app(settings: Optional[FakeServiceSettings] = None) -> web.Application:
+    """フェイクサービスのaiohttpアプリ生成"""
+    settings = settings or FakeServiceSettings()
+    app = web.Application(middlewares=[fault_injection_middleware], client_max_size=32 * 1024 * 1024)
+    app["settings"] = settings
+    app["stats"] = Counter()
+    app["rate_limiter"] = FakeRateLimiter(settings.rate_limits)
+    app["amazon_orders"] = OrderCatalog(settings.order_count, settings.order_days, settings.items_per_order)
+    app["rakuten_orders"] = OrderCatalog(settings.order_count, settings.order_days, settings.items_per_order)
+
+    add_sp_api_routes(app, AMAZON_PREFIX)
+    add_rms_routes(app, RAKUTEN_PREFIX)
+    add_notion_routes(app, NOTION_PREFIX)
+    add_llm_routes(app, GEMINI_PREFIX, ANTHROPIC_PREFIX)
+    return app
+
+
+def base_url_overrides(base_url: str) -> Dict[str, str]:
+    """各コネクターをフェイクサービスに向ける環境変数"""
+    base_url = base_url.rstrip("/")
+    return {
+        "AMAZON_SP_API_BASE_URL": f"{base_url}{AMAZON_PREFIX}",
+        "AMAZON_AUTH_BASE_URL": f"{base_url}{AMAZON_PREFIX}/auth/o2",
+        "RAKUTEN_RMS_BASE_URL": f"{base_url}{RAKUTEN_PREFIX}",
+        "NOTION_API_BASE_URL": f"{base_url}{NOTION_PREFIX}",
+        "GEMINI_API_BASE_URL": f"{base_url}{GEMINI_PREFIX}",
+        "ANTHROPIC_API_BASE_URL": f"{base_url}{ANTHROPIC_PREFIX}",
+    }
+
+
+class FakeServicesServer:
+    """プロセス内で起動するフェイクサービスサーバー"""
+
+    def __init__(self, settings: Optional[FakeServiceSettings] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        """初期化（port=0 で空きポート）"""
+        self.app = create_app(settings)
+        self.host = host
+        self.port = port
+        self.runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    async def __aenter__(self):
+        """async with 対応"""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """終了時に停止"""
+        await self.stop()
+
+    @property
+    def settings(self) -> FakeServiceSettings:
+        """挙動設定（起動後も変更可能）"""
+        return self.app["settings"]
+
+    @property
+    def stats(self) -> Counter:
+        """操作別の呼び出し回数"""
+        return self.app["stats"]
+
+    @property
+    def notion_pages(self) -> Dict[str, Dict]:
+        """作成済みNotionページ"""
+        return self.app["notion_pages"]
+
+    async def start(self):
+        """起動"""
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{self.host}:{self.port}"
+
+    async def stop(self):
+        """停止"""
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def environment(self, include_credentials: bool = True) -> Dict[str, str]:
+        """コネクターをこのサーバーに向ける環境変数一式"""
+        env = base_url_overrides(self.base_url)
+        if include_credentials:
+            env.update(FAKE_CREDENTIALS)
+        return env
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェイク外部サービス - 挙動設定
+遅延・エラー率・レート制限・データ量
+"""
+
+import random
+import time
+from typing import Dict, Optional, Tuple
+
+# 本番相当のレート制限 (リクエスト/秒, バースト)
+# キーは操作名（ルート名）またはサービス名（ルート名の "." より前）
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "sp_api.getOrders": (0.0167, 20),
+    "sp_api.createReport": (0.0167, 15),
+    "sp_api.getReport": (2.0, 15),
+    "sp_api.getReportDocument": (0.0167, 15),
+    "rms.searchOrder": (1.0, 5),
+    "rms.getOrder": (1.0, 5),
+    # Notionはインテグレーション単位（全エンドポイント共通）で平均3リクエスト/秒
+    "notion": (3.0, 3),
+    "gemini.generateContent": (1.0, 5),
+    "gemini.streamGenerateContent": (1.0, 5),
+    "anthropic.messages": (1.0, 5),
+}
+
+
+class FakeServiceSettings:
+    """フェイクサービスの挙動設定"""
+
+    def __init__(self, latency: float = 0.0, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 enforce_rate_limits: bool = False,
+                 order_count: int = 10000, order_days: int = 30, items_per_order: int = 1,
+                 report_polls: int = 1, llm_response_chars: int = 600,
+                 llm_stream_chunk_chars: int = 20, llm_stream_delay: float = 0.0,
+                 lost_responses: Optional[Dict[str, int]] = None, seed: Optional[int] = None):
+        """初期化
+
+        latency/latency_jitter: 応答遅延（秒、jitterは0〜指定値の一様乱数を加算）
+        error_rate: 503を返す確率
+        lost_responses: 操作名ごとに、処理を反映した後で504を返す回数（応答が失われたリクエストの再現）
+        rate_limits: 操作名ごとの (リクエスト/秒, バースト)、enforce_rate_limits=True で適用
+        order_count/order_days: 直近order_days日に均等配置する注文数（SP-API・RMS共通）
+        report_polls: レポート完了までに IN_PROGRESS を返す回数
+        llm_response_chars: LLM応答の文字数
+        llm_stream_chunk_chars/llm_stream_delay: ストリーミング時の1断片の文字数と送信間隔（秒）
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS)
+        if rate_limits:
+            self.rate_limits.update(rate_limits)
+        self.enforce_rate_limits = enforce_rate_limits
+        self.order_count = order_count
+        self.order_days = order_days
+        self.items_per_order = items_per_order
+        self.report_polls = report_polls
+        self.llm_response_chars = llm_response_chars
+        self.llm_stream_chunk_chars = llm_stream_chunk_chars
+        self.llm_stream_delay = llm_stream_delay
+        self.lost_responses = dict(lost_responses or {})
+        self.random = random.Random(seed)
+
+    def response_delay(self) -> float:
+        """1リクエスト分の遅延秒数"""
+        if self.latency_jitter:
+            return self.latency + self.random.uniform(0, self.latency_jitter)
+        return self.latency
+
+    def should_fail(self) -> bool:
+        """エラー応答にするか"""
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+    def should_lose_response(self, operation: str) -> bool:
+        """処理後の応答を失わせるか（指定回数を使い切るまで）"""
+        remaining = self.lost_responses.get(operation, 0)
+        if remaining <= 0:
+            return False
+        self.lost_responses[operation] = remaining - 1
+        return True
+
+
+class FakeRateLimiter:
+    """操作ごとのトークンバケット（超過時はRetry-After秒数を返す）"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, int]]):
+        """初期化"""
+        self.limits = limits
+        self._buckets: Dict[str, list] = {}
+
+    def check(self, operation: str) -> Optional[float]:
+        """1件消費（許可ならNone、超過なら次のトークンまでの秒数）"""
+        if operation not in self.limits:
+            # 操作別の設定がなければサービス共通のバケットを使う
+            operation = operation.split(".", 1)[0]
+            if operation not in self.limits:
+                return None
+        rate, burst = self.limits[operation]
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(operation, (float(burst), now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+
+        if tokens < 1:
+            self._buckets[operation] = [tokens, now]
+            return (1 - tokens) / rate
+        self._buckets[operation] = [tokens - 1, now]
+        return None
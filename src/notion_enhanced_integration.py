@@ -19,6 +19,9 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from config.settings import get_config
+from src.notion_pages import upsert_daily_page
+from src.rate_limiter import AsyncTokenBucket
+from src.resilience import request_with_retry
 
 class NotionECIntegration:
     """Notion EC自動化統合クラス"""
@@ -32,7 +35,7 @@ class NotionECIntegration:
         self.database_id = os.getenv('NOTION_DATABASE_ID')
         
         # Notion API設定
-        self.notion_api_base = "https://api.notion.com/v1"
+        self.notion_api_base = self.config.notion_api_base_url
         self.headers = {
             "Authorization": f"Bearer {self.notion_token}",
             "Content-Type": "application/json",
@@ -120,20 +123,20 @@ class NotionECIntegration:
             }
             
             async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.notion_api_base}/databases",
+                response = await request_with_retry(
+                    session, "POST", f"{self.notion_api_base}/databases", "notion.databases",
                     headers=self.headers,
-                    json=database_data
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        database_id = result["id"]
-                        print(f"✅ Notionデータベース作成完了: {database_id}")
-                        return database_id
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ データベース作成エラー: {response.status} - {error_text}")
-                        return None
+                    json=database_data,
+                    idempotent=False
+                )
+            if response.status == 200:
+                result = response.json()
+                database_id = result["id"]
+                print(f"✅ Notionデータベース作成完了: {database_id}")
+                return database_id
+            else:
+                print(f"❌ データベース作成エラー: {response.status} - {response.text}")
+                return None
                         
         except Exception as e:
             print(f"❌ データベース作成エラー: {e}")
@@ -143,8 +146,8 @@ class NotionECIntegration:
         """ダッシュボードデータ取得"""
         try:
             # 自動化エンジンからデータ取得
-            from src.automation_engine_24h import fetch_dashboard_data
-            return fetch_dashboard_data()
+            from src.automation_engine_24h import get_dashboard_snapshot
+            return get_dashboard_snapshot()
         except Exception as e:
             print(f"⚠️ リアルデータ取得失敗、デモデータ使用: {e}")
             return self._get_demo_data()
@@ -195,8 +198,9 @@ class NotionECIntegration:
             }
         }
     
-    async def sync_daily_report(self, target_date: Optional[str] = None):
-        """日次レポートをNotionに同期"""
+    async def sync_daily_report(self, target_date: Optional[str] = None,
+                                rate_limiter: Optional[AsyncTokenBucket] = None, force: bool = False):
+        """日次レポートをNotionに同期（rate_limiter: 一括同期時に共有する送信枠、force: 変更なしでも書き込む）"""
         if not self.notion_token or not self.database_id:
             print("❌ Notion設定が不完全です（NOTION_TOKEN, NOTION_DATABASE_IDを確認）")
             return False
@@ -284,49 +288,43 @@ class NotionECIntegration:
         
         try:
             async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.notion_api_base}/pages",
-                    headers=self.headers,
-                    json=page_data
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        print(f"✅ Notion同期完了: {target_date}")
-                        print(f"📊 売上: ¥{dashboard_data['sales']['today']:,}")
-                        print(f"💰 利益: ¥{dashboard_data['profit']['today_profit']:,}")
-                        print(f"📦 在庫: {dashboard_data['inventory']['stock_ratio']}%")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ Notion同期エラー: {response.status}")
-                        print(f"📄 エラー詳細: {error_text}")
-                        return False
+                response, action = await upsert_daily_page(
+                    session, self.notion_api_base, self.headers,
+                    self.database_id, target_date, page_data["properties"],
+                    rate_limiter=rate_limiter, force=force
+                )
+            if action == "unchanged":
+                print(f"⏭️ 変更なしのためスキップ: {target_date}")
+                return True
+            if response.status == 200:
+                print(f"✅ Notion同期完了: {target_date}（{'更新' if action == 'updated' else '新規作成'}）")
+                print(f"📊 売上: ¥{dashboard_data['sales']['today']:,}")
+                print(f"💰 利益: ¥{dashboard_data['profit']['today_profit']:,}")
+                print(f"📦 在庫: {dashboard_data['inventory']['stock_ratio']}%")
+                return True
+            else:
+                print(f"❌ Notion同期エラー: {response.status}")
+                print(f"📄 エラー詳細: {response.text}")
+                return False
                         
         except Exception as e:
             print(f"❌ Notion同期エラー: {e}")
             return False
     
-    async def batch_sync_weekly_data(self):
-        """週間データ一括同期"""
-        print("📅 週間データ一括同期開始...")
-        
-        success_count = 0
-        today = date.today()
-        
-        for i in range(7):
-            target_date = (today - timedelta(days=i)).isoformat()
-            
-            print(f"📊 {target_date} のデータを同期中...")
-            success = await self.sync_daily_report(target_date)
-            
-            if success:
-                success_count += 1
-            
-            # API制限回避のため少し待機
-            await asyncio.sleep(1)
+    async def batch_sync_weekly_data(self, force: bool = False):
+        """週間データ一括同期（各日の実績履歴からページ作成）
+
+        sync_daily_report は当日のダッシュボード値を書くため過去日には使わない
+        （既存の過去日ページを当日の数値で上書きしてしまう）。
+        """
+        if not self.notion_token or not self.database_id:
+            print("❌ Notion設定が不完全です（NOTION_TOKEN, NOTION_DATABASE_IDを確認）")
+            return 0
         
-        print(f"✅ 週間同期完了: {success_count}/7 日成功")
-        return success_count
+        from src.ec_notion_integration import ECAutomationNotionManager
+        manager = ECAutomationNotionManager()
+        manager.database_id = self.database_id
+        return await manager.batch_sync_period(7, force=force)
     
     async def create_notion_dashboard_template(self, parent_page_id: str):
         """Notionダッシュボードテンプレート作成"""
@@ -403,20 +401,20 @@ class NotionECIntegration:
         
         try:
             async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.notion_api_base}/pages",
+                response = await request_with_retry(
+                    session, "POST", f"{self.notion_api_base}/pages", "notion.pages",
                     headers=self.headers,
-                    json=page_data
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        page_id = result["id"]
-                        print(f"✅ Notionダッシュボードテンプレート作成完了: {page_id}")
-                        return page_id
-                    else:
-                        error_text = await response.text()
-                        print(f"❌ テンプレート作成エラー: {response.status} - {error_text}")
-                        return None
+                    json=page_data,
+                    idempotent=False
+                )
+            if response.status == 200:
+                result = response.json()
+                page_id = result["id"]
+                print(f"✅ Notionダッシュボードテンプレート作成完了: {page_id}")
+                return page_id
+            else:
+                print(f"❌ テンプレート作成エラー: {response.status} - {response.text}")
+                return None
                         
         except Exception as e:
             print(f"❌ テンプレート作成エラー: {e}")
@@ -6,6 +6,7 @@ Notion統合システム - EC自動化データをNotionに同期
 
 import json
 import asyncio
+import aiohttp
 from datetime import date, datetime, timedelta
 from pathlib import Path
 import sys
@@ -15,6 +16,7 @@ project_root = Path(__file__).parent.parent
 sys.path.append(str(project_root))
 
 from config.settings import get_config
+from src.notion_pages import upsert_daily_page
 
 class NotionECDashboard:
     """NotionとEC自動化システムの統合クラス"""
@@ -25,15 +27,15 @@ class NotionECDashboard:
         self.notion_token = self.config.notion_token if hasattr(self.config, 'notion_token') else None
         self.database_id = self.config.notion_database_id if hasattr(self.config, 'notion_database_id') else None
         
-    async def create_daily_report(self, date_str=None):
-        """日報データを作成"""
+    async def create_daily_report(self, date_str=None, force=False):
+        """日報データを作成（force: Notionへは変更なしでも書き込む）"""
         if not date_str:
             date_str = date.today().isoformat()
             
         # ダッシュボードデータを取得
         try:
-            from src.automation_engine_24h import fetch_dashboard_data
-            dashboard_data = fetch_dashboard_data()
+            from src.automation_engine_24h import get_dashboard_snapshot
+            dashboard_data = get_dashboard_snapshot()
         except Exception as e:
             print(f"⚠️ ダッシュボードデータ取得エラー: {e}")
             dashboard_data = self._get_demo_data()
@@ -102,7 +104,7 @@ class NotionECDashboard:
         
         # Notion同期（設定されている場合）
         if self.notion_token and self.database_id:
-            await self._sync_to_notion(report_data)
+            await self._sync_to_notion(report_data, force)
         
         return report_data
     
@@ -127,12 +129,9 @@ class NotionECDashboard:
             }
         }
     
-    async def _sync_to_notion(self, report_data):
-        """Notionデータベースに同期"""
+    async def _sync_to_notion(self, report_data, force=False):
+        """Notionデータベースに同期（前回と同内容なら省略）"""
         try:
-            import requests
-            
-            url = f"https://api.notion.com/v1/pages"
             headers = {
                 "Authorization": f"Bearer {self.notion_token}",
                 "Content-Type": "application/json",
@@ -179,12 +178,18 @@ class NotionECDashboard:
                 }
             }
             
-            response = requests.post(url, headers=headers, json=notion_data)
+            async with aiohttp.ClientSession() as session:
+                response, action = await upsert_daily_page(
+                    session, self.config.notion_api_base_url, headers,
+                    self.database_id, report_data["date"], notion_data["properties"], force=force
+                )
             
-            if response.status_code == 200:
-                print("✅ Notion同期完了")
+            if action == "unchanged":
+                print("⏭️ 変更なしのためNotion同期をスキップ")
+            elif response.status == 200:
+                print(f"✅ Notion同期完了（{'更新' if action == 'updated' else '新規作成'}）")
             else:
-                print(f"⚠️ Notion同期エラー: {response.status_code}")
+                print(f"⚠️ Notion同期エラー: {response.status}")
                 print(response.text)
                 
         except Exception as e:
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC自動化システム - Notion日次ページ upsert
+同じ日付のページがあれば更新、なければ作成（再同期で行を重複させない）
+送信待ちキューの再送もここで行う
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+from pathlib import Path
+import sys
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from config.settings import get_config
+from src.database.notion_outbox import NotionOutbox
+from src.database.notion_page_index import NotionPageIndex, open_page_index
+from src.rate_limiter import AsyncTokenBucket
+from src.resilience import HTTPResult, RetryPolicy, request_with_retry
+
+# 日次ページの日付プロパティ名
+DATE_PROPERTY = "日付"
+
+
+def create_notion_rate_limiter() -> AsyncTokenBucket:
+    """Notion API用トークンバケット（同時実行する同期処理で共有する）"""
+    rate = get_config().notion_requests_per_second
+    return AsyncTokenBucket(rate, max(1, int(rate)))
+
+
+def payload_hash(properties: Dict) -> str:
+    """プロパティ内容のハッシュ（キー順に依存しない）"""
+    content = json.dumps(properties, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _is_stale_page(result: HTTPResult) -> bool:
+    """索引のページが削除・アーカイブ済みか（作り直しが必要）"""
+    if result.status == 404:
+        return True
+    return result.status == 400 and "archived" in result.text
+
+
+async def find_daily_page(session: aiohttp.ClientSession, api_base: str, headers: Dict,
+                          database_id: str, page_date: str,
+                          date_property: str = DATE_PROPERTY,
+                          rate_limiter: Optional[AsyncTokenBucket] = None) -> Tuple[HTTPResult, Optional[str]]:
+    """databases/query で日付が一致するページを1件検索"""
+    result = await request_with_retry(
+        session, "POST", f"{api_base}/databases/{database_id}/query", "notion.query",
+        headers=headers, rate_limiter=rate_limiter,
+        json={"filter": {"property": date_property, "date": {"equals": page_date}}, "page_size": 1}
+    )
+    if result.status != 200:
+        return result, None
+    pages = result.json().get("results", [])
+    return result, pages[0]["id"] if pages else None
+
+
+async def upsert_daily_page(session: aiohttp.ClientSession, api_base: str, headers: Dict,
+                            database_id: str, page_date: str, properties: Dict,
+                            index: Optional[NotionPageIndex] = None,
+                            date_property: str = DATE_PROPERTY,
+                            rate_limiter: Optional[AsyncTokenBucket] = None,
+                            force: bool = False) -> Tuple[Optional[HTTPResult], str]:
+    """日次ページupsert（索引→未登録時のみNotion検索→PATCHまたはPOST）
+
+    戻り値は (最後のAPI応答, "updated" / "created" / "lookup_failed" / "unchanged")。
+    前回書き込んだ内容と同じなら呼び出さずに (None, "unchanged") を返す（force=True で常に書き込み）。
+    作成の応答が通信エラー・5xxで失われた場合は、再検索して作成済みなら更新、なければ作成し直す。
+    index未指定時は既定DBの索引を開いて使う。
+    """
+    owns_index = index is None
+    if owns_index:
+        index = open_page_index()
+    content_hash = payload_hash(properties)
+    policy = RetryPolicy()
+    attempt = 0
+
+    try:
+        entry = index.get_entry(database_id, page_date) if index is not None else None
+        if entry is not None and entry["payload_hash"] == content_hash and not force:
+            return None, "unchanged"
+
+        page_id = entry["page_id"] if entry is not None else None
+        while True:
+            if page_id is None:
+                lookup, page_id = await find_daily_page(
+                    session, api_base, headers, database_id, page_date, date_property, rate_limiter
+                )
+                if lookup.status != 200:
+                    # 検索できないまま作成すると重複しうるため書き込まない
+                    return lookup, "lookup_failed"
+                if page_id is not None and index is not None:
+                    index.set(database_id, page_date, page_id)
+
+            if page_id is not None:
+                result = await request_with_retry(
+                    session, "PATCH", f"{api_base}/pages/{page_id}", "notion.update_page",
+                    headers=headers, json={"properties": properties}, rate_limiter=rate_limiter
+                )
+                if not _is_stale_page(result):
+                    if result.status == 200 and index is not None:
+                        index.set(database_id, page_date, page_id, content_hash)
+                    return result, "updated"
+                if index is not None:
+                    index.delete(database_id, page_date)
+
+            # 作成はそのまま再送しない（応答だけ失われた場合に同じ日付のページが重複する）
+            try:
+                result = await request_with_retry(
+                    session, "POST", f"{api_base}/pages", "notion.pages",
+                    headers=headers, json={"parent": {"database_id": database_id}, "properties": properties},
+                    rate_limiter=rate_limiter, idempotent=False
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= policy.max_retries:
+                    raise
+                result = None
+            if result is not None and (result.status < 500 or attempt >= policy.max_retries):
+                if result.status == 200 and index is not None:
+                    index.set(database_id, page_date, result.json()["id"], content_hash)
+                return result, "created"
+
+            # 作成されたか不明: 再検索し、作成済みならそのページを更新、なければ作成し直す
+            await asyncio.sleep(policy.backoff(attempt))
+            attempt += 1
+            page_id = None
+    finally:
+        if owns_index and index is not None:
+            index.close()
+
+
+async def run_daily_batch(dates: Iterable[str],
+                          sync_day: Callable[[str, AsyncTokenBucket], Awaitable[bool]],
+                          concurrency: Optional[int] = None) -> List[Dict]:
+    """日付ごとの同期を並行実行（送信レートは共有トークンバケットで制御）
+
+    sync_day(日付, レートリミッター) は成否を返す。例外もその日の失敗として記録し、他の日は続行する。
+    """
+    rate_limiter = create_notion_rate_limiter()
+    semaphore = asyncio.Semaphore(concurrency or get_config().notion_batch_concurrency)
+
+    async def run(target_date: str) -> Dict:
+        async with semaphore:
+            try:
+                success = await sync_day(target_date, rate_limiter)
+                return {"date": target_date, "success": bool(success), "error": None}
+            except Exception as e:
+                return {"date": target_date, "success": False, "error": str(e)}
+
+    return await asyncio.gather(*(run(target_date) for target_date in dates))
+
+
+def outbox_retry_delay(attempts: int) -> float:
+    """送信待ちキューの再送間隔（attempts回失敗済み、指数バックオフ＋ジッター）"""
+    config = get_config()
+    delay = min(config.notion_outbox_retry_max, config.notion_outbox_retry_base * (2 ** attempts))
+    return random.uniform(delay / 2, delay)
+
+
+async def drain_outbox(session: aiohttp.ClientSession, api_base: str, headers: Dict,
+                       outbox: NotionOutbox, index: Optional[NotionPageIndex] = None,
+                       batch_size: Optional[int] = None,
+                       concurrency: Optional[int] = None) -> Dict:
+    """送信待ちキューを送信時刻に達したものからバッチ単位で送信
+
+    失敗したエントリは再送間隔を延ばしてキューに残す（今回の実行では再送しない）。
+    戻り値は {"sent", "unchanged", "failed", "remaining"} の件数。
+    """
+    config = get_config()
+    batch_size = batch_size or config.notion_outbox_batch_size
+    rate_limiter = create_notion_rate_limiter()
+    semaphore = asyncio.Semaphore(concurrency or config.notion_batch_concurrency)
+    owns_index = index is None
+    if owns_index:
+        index = open_page_index()
+    counts = {"sent": 0, "unchanged": 0, "failed": 0}
+    # 実行開始後に登録・延期されたエントリは次回に回す（失敗の繰り返しで止まらなくなるのを防ぐ）
+    started = time.time()
+
+    async def send(entry: Dict):
+        async with semaphore:
+            try:
+                result, action = await upsert_daily_page(
+                    session, api_base, headers, entry["database_id"], entry["page_date"],
+                    entry["properties"], index, rate_limiter=rate_limiter, force=entry["force"]
+                )
+                if action == "unchanged" or result.status == 200:
+                    error = None
+                else:
+                    error = f"HTTP {result.status}: {result.text[:200]}"
+            except Exception as e:
+                action, error = None, str(e)
+        if error is None:
+            outbox.mark_sent(entry)
+            counts["unchanged" if action == "unchanged" else "sent"] += 1
+        else:
+            outbox.mark_failed(entry, error, outbox_retry_delay(entry["attempts"]))
+            counts["failed"] += 1
+
+    try:
+        while True:
+            entries = outbox.due(batch_size, now=started)
+            if not entries:
+                break
+            await asyncio.gather(*(send(entry) for entry in entries))
+    finally:
+        if owns_index and index is not None:
+            index.close()
+
+    counts["remaining"] = outbox.stats()["pending"]
+    return counts
+
+
+def print_batch_report(results: List[Dict]) -> int:
+    """日別の同期結果を表示し、成功日数を返す"""
+    success_count = sum(1 for result in results if result["success"])
+    print(f"\n📋 日別同期結果: {success_count}/{len(results)} 日成功")
+    for result in sorted(results, key=lambda r: r["date"]):
+        if result["success"]:
+            print(f"  ✅ {result['date']}")
+        else:
+            print(f"  ❌ {result['date']}" + (f": {result['error']}" if result["error"] else ""))
+    return success_count
@@ -6,7 +6,8 @@
 
 import requests
 import json
-from datetime import datetime, timedelta
+import hashlib
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import sys
 
@@ -24,7 +25,10 @@ class RakutenAPIConnector:
         
         # 楽天API エンドポイント
         self.api_base_url = "https://api.rms.rakuten.co.jp"
-        self.rms_base_url = "https://api.rms.rakuten.co.jp/es/2.0"
+        self.rms_base_url = self.config.rakuten_rms_base_url
+        
+        # RMS非同期クライアント（初回利用時に生成）
+        self._client = None
         
         print("🟢 楽天API コネクター初期化完了")
     
@@ -89,6 +93,79 @@ class RakutenAPIConnector:
             "timestamp": datetime.now().isoformat()
         }
     
+    async def iter_orders(self, days=7):
+        """直近N日の受注をページ単位で返す（非同期ジェネレーター）"""
+        async for orders in self.get_client().iter_recent_order_pages(days):
+            yield orders
+    
+    async def get_order_details(self, order_numbers):
+        """受注詳細取得（getOrder を100件単位で並行実行）"""
+        return await self.get_client().get_orders(list(order_numbers))
+    
+    async def ingest_orders(self, days=7):
+        """直近N日の受注をページ単位でDBに取り込み"""
+        from src.rakuten_connector.rms_client import order_to_sales_rows
+        from src.database.sales_writer import SalesWriter
+        
+        writer = SalesWriter()
+        try:
+            stats = await writer.consume(self.iter_orders(days), order_to_sales_rows)
+        finally:
+            writer.close()
+        print(f"✅ 楽天受注取り込み完了: {stats['pages']}ページ / {stats['upserted']}件")
+        return stats
+    
+    async def sync_orders_incremental(self, overlap_minutes=None, initial_days=7, date_type=None):
+        """前回同期以降の受注のみ取り込み（searchOrder の日付種別で判定）"""
+        from src.rakuten_connector.rms_client import DATE_TYPE_ORDER, order_to_sales_rows
+        from src.database.sales_writer import SalesWriter
+        from src.database.sync_state import SyncStateStore, format_utc
+        
+        if overlap_minutes is None:
+            overlap_minutes = self.config.sync_overlap_minutes
+        if date_type is None:
+            date_type = DATE_TYPE_ORDER
+        # 認証情報そのものは保存せず、識別用ハッシュをアカウントキーにする
+        account = hashlib.sha256(
+            (self.rakuten_config['service_secret'] or '').encode('utf-8')
+        ).hexdigest()[:16]
+        marketplace = f"rakuten:dateType={date_type}"
+        
+        writer = SalesWriter()
+        state = SyncStateStore(writer.conn)
+        try:
+            start = state.get_sync_start(
+                marketplace, account, timedelta(minutes=overlap_minutes), initial_days
+            )
+            cutoff = datetime.now(timezone.utc)
+            
+            pages = self.get_client().iter_order_pages_between(start, cutoff, date_type)
+            stats = await writer.consume(pages, order_to_sales_rows)
+            
+            # 全ページ取り込み成功後にのみ到達点を進める（途中失敗時は次回再取得）
+            state.set(marketplace, account, cutoff, stats['upserted'] + stats['deleted'])
+        finally:
+            writer.close()
+        
+        print(f"✅ 楽天差分同期完了: {format_utc(start)} 以降 {stats['upserted']}件更新 / {stats['deleted']}件キャンセル")
+        return stats
+    
+    def get_client(self):
+        """RMS非同期クライアント取得（接続を使い回す）"""
+        if self._client is None:
+            from src.rakuten_connector.rms_client import RakutenRMSClient
+            self._client = RakutenRMSClient(
+                rakuten_config=self.rakuten_config,
+                base_url=self.rms_base_url
+            )
+        return self._client
+    
+    async def close(self):
+        """RMSクライアントのセッションクローズ"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
     def check_connection_status(self):
         """接続状況確認"""
         config_check = {
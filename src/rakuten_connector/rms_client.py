@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+楽天RMS 受注API 非同期クライアント
+searchOrder（ページング）→ getOrder の受注取得フロー
+"""
+
+import asyncio
+import base64
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.settings import get_config
+from src.resilience import RetryPolicy, default_timeout, request_with_retry
+
+RMS_BASE_URL = "https://api.rms.rakuten.co.jp/es/2.0"
+JST = timezone(timedelta(hours=9))
+
+# searchOrder 1ページあたりの最大件数
+SEARCH_PAGE_SIZE = 1000
+# getOrder 1回あたりの最大受注番号数
+GET_ORDER_BATCH_SIZE = 100
+# getOrder の同時実行数上限
+GET_ORDER_CONCURRENCY = 4
+# getOrder レスポンスバージョン
+GET_ORDER_VERSION = 7
+# searchOrder の dateType（1: 注文日）
+DATE_TYPE_ORDER = 1
+# searchOrder の検索期間上限（日）
+SEARCH_MAX_DAYS = 63
+# orderProgress: キャンセル確定
+ORDER_PROGRESS_CANCELED = 900
+
+
+class RMSAPIError(Exception):
+    """RMS API呼び出しエラー"""
+
+    def __init__(self, status: int, message: str, operation: Optional[str] = None):
+        """初期化"""
+        super().__init__(f"{operation or 'RMS'} {status}: {message}")
+        self.status = status
+        self.operation = operation
+
+
+def format_rms_datetime(value: datetime) -> str:
+    """RMS APIの日時形式（yyyy-MM-ddTHH:mm:ss+0900）に変換"""
+    return value.astimezone(JST).strftime("%Y-%m-%dT%H:%M:%S%z")
+
+
+def order_to_sales_rows(order: Dict) -> List[Dict]:
+    """RMS受注を売上テーブル行に変換（注文単位）"""
+    ordered_at = datetime.fromisoformat(order["orderDatetime"]).astimezone(JST)
+    return [{
+        "platform": "rakuten",
+        "order_id": order["orderNumber"],
+        "sku": "",
+        "date": ordered_at.date().isoformat(),
+        "amount": int(order.get("totalPrice") or 0),
+        "canceled": order.get("orderProgress") == ORDER_PROGRESS_CANCELED
+    }]
+
+
+class RakutenRMSClient:
+    """楽天RMS 受注API 非同期クライアント"""
+
+    def __init__(self, rakuten_config: Optional[Dict] = None,
+                 base_url: str = RMS_BASE_URL, max_connections: int = 10,
+                 max_concurrent_requests: int = GET_ORDER_CONCURRENCY,
+                 retry_policy: Optional[RetryPolicy] = None):
+        """初期化"""
+        self.rakuten_config = rakuten_config or get_config().rakuten_config
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.max_concurrent_requests = max_concurrent_requests
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._order_semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+        credentials = f"{self.rakuten_config['service_secret']}:{self.rakuten_config['license_key']}"
+        self.headers = {
+            "Authorization": "ESA " + base64.b64encode(credentials.encode("utf-8")).decode("ascii"),
+            "Content-Type": "application/json; charset=utf-8"
+        }
+
+    async def __aenter__(self):
+        """async with 対応"""
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """終了時にセッションクローズ"""
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """共有セッション取得（keep-alive接続を再利用）"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=default_timeout()
+            )
+        return self._session
+
+    async def close(self):
+        """セッションクローズ"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def request(self, path: str, operation: str, body: Dict) -> Dict:
+        """RMS API呼び出し（タイムアウト・再試行・サーキットブレーカー付き）"""
+        response = await request_with_retry(
+            self._get_session(), "POST", f"{self.base_url}{path}", f"rms.{operation}",
+            policy=self.retry_policy, json=body
+        )
+        if response.status >= 400:
+            raise RMSAPIError(response.status, response.text, operation)
+        return response.json()
+
+    async def search_order(self, start: datetime, end: datetime, page: int = 1,
+                           date_type: int = DATE_TYPE_ORDER) -> Dict:
+        """受注番号検索1ページ取得（searchOrder）"""
+        body = {
+            "dateType": date_type,
+            "startDatetime": format_rms_datetime(start),
+            "endDatetime": format_rms_datetime(end),
+            "PaginationRequestModel": {
+                "requestRecordsAmount": SEARCH_PAGE_SIZE,
+                "requestPage": page
+            }
+        }
+        return await self.request("/order/searchOrder/", "searchOrder", body)
+
+    async def get_order(self, order_numbers: List[str]) -> List[Dict]:
+        """受注詳細取得（getOrder、最大100件）"""
+        body = {"orderNumberList": order_numbers, "version": GET_ORDER_VERSION}
+        result = await self.request("/order/getOrder/", "getOrder", body)
+        return result.get("OrderModelList", [])
+
+    async def _get_order_limited(self, order_numbers: List[str]) -> List[Dict]:
+        """同時実行数を制限して getOrder 呼び出し"""
+        async with self._order_semaphore:
+            return await self.get_order(order_numbers)
+
+    async def get_orders(self, order_numbers: List[str]) -> List[Dict]:
+        """受注詳細取得（100件ずつ分割し、同時実行数を制限して並行取得・順序は維持）"""
+        chunks = [
+            order_numbers[i:i + GET_ORDER_BATCH_SIZE]
+            for i in range(0, len(order_numbers), GET_ORDER_BATCH_SIZE)
+        ]
+        tasks = [asyncio.ensure_future(self._get_order_limited(chunk)) for chunk in chunks]
+        try:
+            results = await asyncio.gather(*tasks)
+        finally:
+            # 1件失敗したら残りの呼び出しは打ち切る
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        return [order for orders in results for order in orders]
+
+    async def iter_order_number_pages(self, start: datetime, end: datetime,
+                                      date_type: int = DATE_TYPE_ORDER) -> AsyncIterator[List[str]]:
+        """受注番号をページ単位で返す（次ページを先読み）"""
+        fetch = asyncio.ensure_future(self.search_order(start, end, 1, date_type))
+        try:
+            while fetch is not None:
+                result = await fetch
+                pagination = result.get("PaginationResponseModel") or {}
+                page = pagination.get("requestPage", 1)
+                total_pages = pagination.get("totalPages", 1)
+
+                fetch = None
+                if page < total_pages:
+                    fetch = asyncio.ensure_future(self.search_order(start, end, page + 1, date_type))
+
+                order_numbers = result.get("orderNumberList") or []
+                if order_numbers:
+                    yield order_numbers
+        finally:
+            if fetch is not None and not fetch.done():
+                fetch.cancel()
+
+    async def iter_order_pages(self, start: datetime, end: datetime,
+                               date_type: int = DATE_TYPE_ORDER) -> AsyncIterator[List[Dict]]:
+        """受注詳細をページ単位で返す（処理中に次ページの詳細を先読み）"""
+        pages = self.iter_order_number_pages(start, end, date_type)
+        fetch = None
+        try:
+            async for order_numbers in pages:
+                current, fetch = fetch, asyncio.ensure_future(self.get_orders(order_numbers))
+                if current is not None:
+                    yield await current
+            if fetch is not None:
+                current, fetch = fetch, None
+                yield await current
+        finally:
+            if fetch is not None and not fetch.done():
+                fetch.cancel()
+            await pages.aclose()
+
+    async def iter_order_pages_between(self, start: datetime, end: datetime,
+                                       date_type: int = DATE_TYPE_ORDER) -> AsyncIterator[List[Dict]]:
+        """期間内の受注詳細をページ単位で返す（検索期間上限ごとに分割）"""
+        window_start = start
+        while window_start < end:
+            window_end = min(end, window_start + timedelta(days=SEARCH_MAX_DAYS))
+            async for orders in self.iter_order_pages(window_start, window_end, date_type):
+                yield orders
+            window_start = window_end
+
+    async def iter_recent_order_pages(self, days: int = 7) -> AsyncIterator[List[Dict]]:
+        """直近N日の受注詳細をページ単位で返す"""
+        end = datetime.now(JST)
+        async for orders in self.iter_order_pages_between(end - timedelta(days=days), end):
+            yield orders
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC自動化システム - 非同期レート制限モジュール
+トークンバケット＋SP-APIオペレーション別制限（レスポンスヘッダー・429に追従）
+"""
+
+import asyncio
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+# SP-API公式ドキュメント記載のデフォルト値 (リクエスト/秒, バースト)
+SP_API_DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "getOrders": (0.0167, 20),
+    "getOrder": (0.5, 30),
+    "getOrderItems": (0.5, 30),
+    "getOrderAddress": (0.5, 30),
+    "getOrderBuyerInfo": (0.5, 30),
+    "getItemOffers": (0.5, 1),
+    "getListingOffers": (1.0, 2),
+    "getPricing": (0.5, 1),
+    "getCompetitivePricing": (0.5, 1),
+    "getInventorySummaries": (2.0, 2),
+    "getCatalogItem": (2.0, 2),
+    "searchCatalogItems": (2.0, 2),
+    "createReport": (0.0167, 15),
+    "getReport": (2.0, 15),
+    "getReports": (0.0222, 10),
+    "getReportDocument": (0.0167, 15),
+}
+# 未登録オペレーション用の控えめな既定値
+SP_API_FALLBACK_RATE_LIMIT: Tuple[float, int] = (0.5, 1)
+
+RATE_LIMIT_HEADER = "x-amzn-RateLimit-Limit"
+# 429受信時の減速係数と下限
+THROTTLE_BACKOFF_FACTOR = 0.5
+MIN_RATE = 0.001
+
+
+class AsyncTokenBucket:
+    """非同期トークンバケット"""
+
+    def __init__(self, rate: float, burst: int):
+        """初期化（rate: 毎秒補充トークン数, burst: 最大トークン数）"""
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """経過時間分のトークン補充"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        """トークン取得（不足時は補充まで待機、待機者は到着順）"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def update_rate(self, rate: float, burst: Optional[int] = None):
+        """補充レート変更"""
+        self._refill()
+        self.rate = max(MIN_RATE, rate)
+        if burst is not None:
+            self.burst = max(1, burst)
+            self.tokens = min(self.tokens, self.burst)
+
+    def block(self, seconds: float):
+        """指定秒数トークンを払い出さない（429・Retry-After対応）"""
+        self._refill()
+        self.tokens = 0.0
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class SPAPIRateLimiter:
+    """SP-APIオペレーション別レートリミッター"""
+
+    def __init__(self, default_limits: Optional[Mapping[str, Tuple[float, int]]] = None):
+        """初期化（公式デフォルト値から開始）"""
+        self.default_limits = dict(SP_API_DEFAULT_RATE_LIMITS)
+        if default_limits:
+            self.default_limits.update(default_limits)
+        self.buckets: Dict[str, AsyncTokenBucket] = {}
+        self.throttled_count: Dict[str, int] = {}
+
+    def get_bucket(self, operation: str) -> AsyncTokenBucket:
+        """オペレーションのバケット取得"""
+        bucket = self.buckets.get(operation)
+        if bucket is None:
+            rate, burst = self.default_limits.get(operation, SP_API_FALLBACK_RATE_LIMIT)
+            bucket = AsyncTokenBucket(rate, burst)
+            self.buckets[operation] = bucket
+        return bucket
+
+    async def acquire(self, operation: str):
+        """呼び出し前に送信枠を確保"""
+        await self.get_bucket(operation).acquire()
+
+    def on_response(self, operation: str, status: int, headers: Mapping[str, str]):
+        """レスポンスヘッダー・ステータスからレートを補正"""
+        bucket = self.get_bucket(operation)
+
+        header_rate = headers.get(RATE_LIMIT_HEADER)
+        if header_rate:
+            try:
+                bucket.update_rate(float(header_rate))
+            except ValueError:
+                pass
+
+        if status == 429:
+            self.throttled_count[operation] = self.throttled_count.get(operation, 0) + 1
+            if not header_rate:
+                # 実際の上限が不明なため減速して様子を見る
+                bucket.update_rate(bucket.rate * THROTTLE_BACKOFF_FACTOR)
+            retry_after = headers.get("Retry-After")
+            try:
+                delay = float(retry_after) if retry_after else 1 / bucket.rate
+            except ValueError:
+                delay = 1 / bucket.rate
+            bucket.block(delay)
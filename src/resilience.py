@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC自動化システム - 外部API呼び出し耐障害性モジュール
+タイムアウト・指数バックオフ（ジッター・Retry-After対応）・エンドポイント別サーキットブレーカー
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+import sys
+from typing import Any, AsyncIterator, Dict, Mapping, Optional
+
+import aiohttp
+
+# プロジェクトルートをパスに追加
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from config.settings import get_config
+from src.rate_limiter import AsyncTokenBucket
+
+# 再試行対象のHTTPステータス
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# 429はサービス稼働中のためサーキットブレーカーの失敗に数えない
+BREAKER_NEUTRAL_STATUSES = frozenset({429})
+
+
+class CircuitOpenError(Exception):
+    """サーキットオープン中（呼び出しを即時失敗させる）"""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        """初期化"""
+        super().__init__(f"{endpoint} は一時停止中です（{retry_in:.1f}秒後に再試行）")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """エンドポイント別サーキットブレーカー（closed → open → half_open）"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """初期化（連続failure_threshold回失敗でopen、reset_timeout秒後に1件だけ試行）"""
+        self.endpoint = endpoint
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """呼び出し可否判定（不可ならCircuitOpenError）"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+
+            elapsed = time.monotonic() - self.opened_at
+            # 試行が結果を記録せずに終わった（キャンセル等）場合もreset_timeout後に再試行させる
+            if elapsed >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self.opened_at = time.monotonic()
+                return
+
+            raise CircuitOpenError(self.endpoint, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self):
+        """成功記録（half_openからの復帰を含む）"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """失敗記録"""
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"⚠️ サーキットオープン: {self.endpoint}（{self.reset_timeout}秒間停止）")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(endpoint: str) -> CircuitBreaker:
+    """エンドポイント別サーキットブレーカー取得（プロセス内で共有）"""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            config = get_config()
+            breaker = CircuitBreaker(
+                endpoint, config.circuit_failure_threshold, config.circuit_reset_timeout
+            )
+            _breakers[endpoint] = breaker
+        return breaker
+
+
+def reset_circuit_breakers():
+    """全サーキットブレーカー破棄"""
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-Afterヘッダー（秒数またはHTTP日付）を秒数に変換"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """指数バックオフ再試行ポリシー（フルジッター）"""
+
+    def __init__(self, max_retries: Optional[int] = None, base_delay: float = 0.5,
+                 max_delay: float = 30.0, max_retry_after: float = 120.0):
+        """初期化（max_retries未指定時は HTTP_MAX_RETRIES）"""
+        self.max_retries = max_retries if max_retries is not None else get_config().http_max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """attempt回目（0始まり）の失敗後の待機秒数"""
+        if retry_after is not None:
+            # サーバー指定の待機時間を優先（同時再送の集中を避けるため少しずらす）
+            return min(retry_after, self.max_retry_after) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def default_timeout() -> aiohttp.ClientTimeout:
+    """aiohttp用の既定タイムアウト（接続・読み取り）"""
+    config = get_config()
+    return aiohttp.ClientTimeout(
+        total=None, connect=config.http_connect_timeout, sock_read=config.http_read_timeout
+    )
+
+
+class HTTPResult:
+    """読み込み済みHTTPレスポンス（再試行ループの外で扱えるよう本文を保持）"""
+
+    def __init__(self, status: int, headers: Mapping[str, str], text: str):
+        """初期化"""
+        self.status = status
+        self.headers = headers
+        self.text = text
+
+    def json(self) -> Any:
+        """JSON本文"""
+        return json.loads(self.text) if self.text else {}
+
+
+async def request_with_retry(session: aiohttp.ClientSession, method: str, url: str, endpoint: str,
+                             policy: Optional[RetryPolicy] = None,
+                             timeout: Optional[aiohttp.ClientTimeout] = None,
+                             rate_limiter: Optional[AsyncTokenBucket] = None,
+                             idempotent: bool = True, **kwargs) -> HTTPResult:
+    """aiohttpリクエスト（タイムアウト・再試行・サーキットブレーカー付き）
+
+    再試行しきれなかったHTTPエラーはそのまま返し、ステータスの扱いは呼び出し元に任せる。
+    通信エラーは再試行後に送出する。
+    rate_limiter指定時は再送も含めて送信枠を確保し、429ではバケット共有者全体を待機させる。
+    idempotent=False（作成など再送で重複しうる操作）では未処理が確実な429のみ再送し、
+    通信エラー・5xxは処理済みか不明なため再送せずに呼び出し元へ返す。
+    """
+    policy = policy or RetryPolicy()
+    breaker = get_circuit_breaker(endpoint)
+    timeout = timeout or default_timeout()
+    attempt = 0
+
+    while True:
+        breaker.before_call()
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        retry_after = None
+        try:
+            async with session.request(method, url, timeout=timeout, **kwargs) as response:
+                result = HTTPResult(response.status, response.headers, await response.text())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            breaker.record_failure()
+            if attempt >= policy.max_retries or not idempotent:
+                raise
+            print(f"⚠️ {endpoint} 通信エラー、再試行します ({attempt + 1}/{policy.max_retries}): {e!r}")
+        else:
+            if result.status not in RETRYABLE_STATUSES:
+                breaker.record_success()
+                return result
+            if result.status not in BREAKER_NEUTRAL_STATUSES:
+                breaker.record_failure()
+            if attempt >= policy.max_retries or (not idempotent and result.status != 429):
+                return result
+            retry_after = parse_retry_after(result.headers.get("Retry-After"))
+            if rate_limiter is not None and result.status == 429:
+                rate_limiter.block(retry_after if retry_after is not None else policy.backoff(attempt))
+
+        await asyncio.sleep(policy.backoff(attempt, retry_after))
+        attempt += 1
+
+
+@asynccontextmanager
+async def stream_with_retry(session: aiohttp.ClientSession, method: str, url: str, endpoint: str,
+                            policy: Optional[RetryPolicy] = None,
+                            timeout: Optional[aiohttp.ClientTimeout] = None,
+                            **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+    """ストリーミング版（応答ヘッダー受信までを再試行し、本文は読まずに開いたまま渡す）
+
+    本文の途中で切れた場合は再試行しない（受信済みの内容は呼び出し元が持っているため）。
+    本文を読み切らずに抜けると接続を閉じ、サーバー側の生成も打ち切られる。
+    """
+    policy = policy or RetryPolicy()
+    breaker = get_circuit_breaker(endpoint)
+    timeout = timeout or default_timeout()
+    attempt = 0
+
+    while True:
+        breaker.before_call()
+        retry_after = None
+        try:
+            response = await session.request(method, url, timeout=timeout, **kwargs)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            breaker.record_failure()
+            if attempt >= policy.max_retries:
+                raise
+            print(f"⚠️ {endpoint} 通信エラー、再試行します ({attempt + 1}/{policy.max_retries}): {e!r}")
+        else:
+            retryable = response.status in RETRYABLE_STATUSES
+            if not retryable:
+                breaker.record_success()
+            elif response.status not in BREAKER_NEUTRAL_STATUSES:
+                breaker.record_failure()
+
+            if not retryable or attempt >= policy.max_retries:
+                try:
+                    yield response
+                finally:
+                    response.release()
+                return
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.release()
+
+        await asyncio.sleep(policy.backoff(attempt, retry_after))
+        attempt += 1
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""pytest共通設定"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# APIキー未設定の環境でも config.settings を読み込めるようにする
+os.environ.setdefault("DEBUG_MODE", "true")
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(autouse=True)
+def _reset_circuit_breakers():
+    """テスト間でサーキットブレーカーの状態を持ち越さない"""
+    from src.resilience import reset_circuit_breakers
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
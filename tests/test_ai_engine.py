@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EC AI統合エンジン テスト
+フェイクGemini・Anthropicで共有セッション・並行実行・応答キャッシュ・ストリーミングを確認
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from config.settings import get_config
+from src.ai_integration.ai_engine import ECAIIntegrationEngine
+from src.ai_integration.response_cache import AIResponseCache
+from src.database.schema import ECDatabaseSchemaManager, connect
+from src.fake_services import FakeServiceSettings, FakeServicesServer
+
+
+def point_config_to(monkeypatch, env):
+    """設定のAPIキー・ベースURLをフェイクサービスに向ける"""
+    config = get_config()
+    monkeypatch.setattr(config, "gemini_api_key", env["GEMINI_API_KEY"])
+    monkeypatch.setattr(config, "claude_api_key", env["CLAUDE_API_KEY"])
+    monkeypatch.setattr(config, "gemini_api_base_url", env["GEMINI_API_BASE_URL"])
+    monkeypatch.setattr(config, "anthropic_api_base_url", env["ANTHROPIC_API_BASE_URL"])
+    # 既定のSQLiteキャッシュは使わない（キャッシュはテストごとに明示的に渡す）
+    monkeypatch.setattr(config, "ai_cache_ttl", 0)
+
+
+@pytest.fixture
+def cache_conn(tmp_path):
+    """マイグレーション済みの一時DB接続"""
+    db_path = tmp_path / "ec.db"
+    ECDatabaseSchemaManager(db_path).migrate()
+    conn = connect(db_path)
+    yield conn
+    conn.close()
+
+
+def test_providers_run_concurrently_on_shared_session(monkeypatch):
+    async def scenario():
+        async with FakeServicesServer(FakeServiceSettings(latency=0.3)) as server:
+            point_config_to(monkeypatch, server.environment())
+            async with ECAIIntegrationEngine() as engine:
+                started = time.perf_counter()
+                result = await engine.analyze_ec_performance()
+                elapsed = time.perf_counter() - started
+                session = engine._session
+                # 2回目も同じセッション（接続）を使い回す
+                await engine.test_gemini_connection()
+                assert engine._session is session
+            return result, elapsed, session
+
+    result, elapsed, session = asyncio.run(scenario())
+
+    assert result["ai_insights"]["gemini"]["connected"]
+    assert result["ai_insights"]["claude"]["connected"]
+    # 直列なら 0.6秒、並行なら遅い方の 0.3秒程度
+    assert elapsed < 0.55
+    assert session.closed
+
+
+def test_repeat_analysis_is_served_from_cache(monkeypatch, cache_conn):
+    async def scenario():
+        async with FakeServicesServer() as server:
+            point_config_to(monkeypatch, server.environment())
+            cache = AIResponseCache(cache_conn, ttl=3600, max_entries=10)
+            async with ECAIIntegrationEngine(cache=cache) as engine:
+                first = await engine.analyze_ec_performance()
+                second = await engine.analyze_ec_performance()
+                # 分析データが変わればキャッシュは使わない
+                await engine.test_gemini_connection({"amazon": {"daily_sales": 1}})
+            return first, second, cache.stats(), dict(server.stats)
+
+    first, second, stats, calls = asyncio.run(scenario())
+
+    assert first["ai_insights"] == second["ai_insights"]
+    assert calls["gemini.streamGenerateContent"] == 2
+    assert calls["anthropic.messages"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert stats["entries"] == 3
+
+
+def test_cache_expires_and_evicts_least_recently_used(cache_conn):
+    cache = AIResponseCache(cache_conn, ttl=3600, max_entries=2)
+    cache.set("gemini", "m", "a", "A")
+    cache.set("gemini", "m", "b", "B")
+    assert cache.get("gemini", "m", "a") == "A"
+    time.sleep(0.01)
+
+    # "b" が最も長く使われていないため追い出される
+    cache.set("gemini", "m", "c", "C")
+    assert cache.get("gemini", "m", "b") is None
+    assert cache.get("gemini", "m", "a") == "A"
+    assert cache.get("claude", "m", "a") is None
+
+    cache.ttl = 0
+    assert cache.get("gemini", "m", "c") is None
+
+
+def test_streaming_yields_chunks_and_stops_early(monkeypatch):
+    async def scenario():
+        settings = FakeServiceSettings(llm_response_chars=600, llm_stream_chunk_chars=20, llm_stream_delay=0.01)
+        async with FakeServicesServer(settings) as server:
+            point_config_to(monkeypatch, server.environment())
+            async with ECAIIntegrationEngine() as engine:
+                full = [chunk async for chunk in engine.stream_gemini("在庫改善策")]
+                partial = [chunk async for chunk in engine.stream_claude("在庫改善策", max_chars=50)]
+            # サーバー側が切断を検知するまで待つ
+            await asyncio.sleep(0.1)
+            return full, partial, dict(server.stats)
+
+    full, partial, stats = asyncio.run(scenario())
+
+    assert len(full) == 30
+    assert len("".join(full)) == 600
+    assert [len(chunk) for chunk in partial] == [20, 20, 10]
+    # 打ち切り後は送信されない（Gemini 30断片 + Claudeは全36イベント中の先頭数件のみ）
+    assert stats["llm.stream_events"] < 30 + 10
+    assert stats["llm.stream_disconnects"] == 1
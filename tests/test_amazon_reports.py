@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SP-API Reports API 一括取り込み テスト
+ローカルのフェイクレポートサーバーからgzipフラットファイルを取り込み
+"""
+
+import asyncio
+import gzip
+
+import pytest
+from aiohttp import web
+
+from src.amazon_connector.reports import (
+    INVENTORY_REPORT_TYPE, ORDER_REPORT_TYPE, ReportBulkLoader, SPAPIReportsClient
+)
+from src.amazon_connector.sp_api_client import AmazonSPAPIClient, SPAPIError
+from src.database.schema import ECDatabaseSchemaManager, connect
+from src.rate_limiter import SPAPIRateLimiter
+from src.resilience import RetryPolicy
+
+AMAZON_CONFIG = {
+    "client_id": "test-client",
+    "client_secret": "test-secret",
+    "refresh_token": "test-refresh",
+    "seller_id": "test-seller"
+}
+
+ORDER_COLUMNS = [
+    "amazon-order-id", "purchase-date", "order-status", "sku", "item-status",
+    "quantity", "item-price", "shipping-price"
+]
+
+
+def build_order_report(order_count: int) -> str:
+    """注文レポート生成（1注文2明細、明細順は注文ごとに連続しない）"""
+    lines = ["\t".join(ORDER_COLUMNS)]
+    for sku in ("SKU-A", "SKU-B"):
+        for i in range(order_count):
+            status = "Cancelled" if i % 50 == 0 else "Shipped"
+            shipping = "300" if sku == "SKU-A" else ""
+            lines.append("\t".join([
+                f"250-{i:07d}", "2026-10-16T20:00:00+00:00", status, sku, status,
+                "1", "1000.00", shipping
+            ]))
+    return "\r\n".join(lines) + "\r\n"
+
+
+class FakeReportServer:
+    """createReport→getReport→getReportDocument→ダウンロードを再現するフェイク"""
+
+    def __init__(self, reports: dict, pending_polls: int = 2, lost_creates: int = 0):
+        """初期化（reports: レポート種別→TSV本文、lost_creates: 作成後に503を返す回数）"""
+        self.reports = reports
+        self.pending_polls = pending_polls
+        self.lost_creates = lost_creates
+        self.polls = {}
+        self.created = []
+        self.runner = None
+        self.base_url = None
+
+    async def token(self, request):
+        """LWAトークン発行"""
+        return web.json_response({"access_token": "fake-token", "expires_in": 3600})
+
+    async def create_report(self, request):
+        """createReport"""
+        body = await request.json()
+        self.created.append(body)
+        report_id = str(len(self.created))
+        self.polls[report_id] = 0
+        if self.lost_creates > 0:
+            # 作成は受け付けたが応答が失われたケース
+            self.lost_creates -= 1
+            return web.json_response({"errors": [{"code": "InternalFailure"}]}, status=503)
+        return web.json_response({"reportId": report_id}, status=202)
+
+    async def get_report(self, request):
+        """getReport（数回は処理中を返す）"""
+        report_id = request.match_info["report_id"]
+        self.polls[report_id] += 1
+        if self.polls[report_id] <= self.pending_polls:
+            return web.json_response({"reportId": report_id, "processingStatus": "IN_PROGRESS"})
+        return web.json_response({
+            "reportId": report_id, "processingStatus": "DONE", "reportDocumentId": f"doc-{report_id}"
+        })
+
+    async def get_document(self, request):
+        """getReportDocument"""
+        document_id = request.match_info["document_id"]
+        return web.json_response({
+            "reportDocumentId": document_id,
+            "url": f"{self.base_url}/download/{document_id}",
+            "compressionAlgorithm": "GZIP"
+        })
+
+    async def download(self, request):
+        """レポート本体（gzip・小さいチャンクで送信）"""
+        report_id = request.match_info["document_id"].split("-", 1)[1]
+        report_type = self.created[int(report_id) - 1]["reportType"]
+        payload = gzip.compress(self.reports[report_type].encode("cp932"))
+
+        response = web.StreamResponse(headers={"Content-Type": "text/plain"})
+        await response.prepare(request)
+        for offset in range(0, len(payload), 1000):
+            await response.write(payload[offset:offset + 1000])
+        await response.write_eof()
+        return response
+
+    async def start(self):
+        """空きポートで起動"""
+        app = web.Application()
+        app.router.add_post("/auth/token", self.token)
+        app.router.add_post("/reports/2021-06-30/reports", self.create_report)
+        app.router.add_get("/reports/2021-06-30/reports/{report_id}", self.get_report)
+        app.router.add_get("/reports/2021-06-30/documents/{document_id}", self.get_document)
+        app.router.add_get("/download/{document_id}", self.download)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        """停止"""
+        await self.runner.cleanup()
+
+
+def run_report_ingestion(tmp_path, reports: dict, load):
+    """フェイクサーバーからレポートを取り込み、DB接続を返す"""
+    db_path = tmp_path / "ec.db"
+    ECDatabaseSchemaManager(db_path).migrate()
+    conn = connect(db_path)
+
+    async def run():
+        server = FakeReportServer(reports)
+        await server.start()
+        client = AmazonSPAPIClient(
+            AMAZON_CONFIG,
+            api_base_url=server.base_url,
+            auth_base_url=f"{server.base_url}/auth",
+            token_cache_path=tmp_path / "token.json",
+            rate_limiter=SPAPIRateLimiter({
+                "createReport": (100.0, 10), "getReport": (100.0, 10), "getReportDocument": (100.0, 10)
+            })
+        )
+        try:
+            reports_client = SPAPIReportsClient(client, poll_interval=0.01)
+            return await load(ReportBulkLoader(conn, batch_size=500), reports_client), server
+        finally:
+            await client.close()
+            await server.stop()
+
+    stats, server = asyncio.run(run())
+    return conn, stats, server
+
+
+def test_order_report_is_aggregated_per_order_and_idempotent(tmp_path):
+    report = build_order_report(1000)
+
+    async def load(loader, reports):
+        first = await loader.load_orders(reports.iter_report_rows(ORDER_REPORT_TYPE))
+        second = await loader.load_orders(reports.iter_report_rows(ORDER_REPORT_TYPE))
+        return first, second
+
+    conn, (first, second), server = run_report_ingestion(tmp_path, {ORDER_REPORT_TYPE: report}, load)
+
+    assert first["lines"] == 2000
+    # 50件に1件はキャンセル（取り込まない）
+    assert first["upserted"] == 980
+    assert server.polls["1"] == 3
+    # 同じレポートの再取り込みでは行が変わらない
+    assert second["upserted"] == 0
+
+    count, total = conn.execute(
+        "SELECT COUNT(*), SUM(amount) FROM sales WHERE platform = 'amazon'"
+    ).fetchone()
+    assert count == 980
+    # 明細2件＋送料を注文単位で合算
+    assert total == 980 * 2300
+    # JST日付に変換してロールアップに反映
+    assert [tuple(row) for row in conn.execute("SELECT date, amount, order_count FROM sales_daily")] == [
+        ("2026-10-17", 980 * 2300, 980)
+    ]
+
+
+def test_inventory_report_updates_existing_and_inserts_new_skus(tmp_path):
+    lines = ["item-name\tseller-sku\tprice\tquantity"]
+    lines += [f"商品{i}\tSKU-{i}\t1000\t{i}" for i in range(1200)]
+    # FBA出品（数量空欄）は対象外
+    lines.append("FBA商品\tSKU-FBA\t1000\t")
+    report = "\n".join(lines)
+
+    db_path = tmp_path / "ec.db"
+    ECDatabaseSchemaManager(db_path).migrate()
+    setup = connect(db_path)
+    with setup:
+        setup.execute(
+            "INSERT INTO inventory (sku, stock, reorder_level, capacity) VALUES ('SKU-1', 99, 5, 100)"
+        )
+    setup.close()
+
+    async def load(loader, reports):
+        return await loader.load_inventory(reports.iter_report_rows(INVENTORY_REPORT_TYPE))
+
+    conn, stats, _ = run_report_ingestion(tmp_path, {INVENTORY_REPORT_TYPE: report}, load)
+
+    assert stats == {"rows": 1200, "inserted": 1199}
+    assert conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0] == 1200
+    # 既存SKUは在庫数のみ更新し、補充設定は維持
+    assert tuple(conn.execute(
+        "SELECT stock, reorder_level, capacity FROM inventory WHERE sku = 'SKU-1'"
+    ).fetchone()) == (1, 5, 100)
+
+
+def test_create_report_is_not_resent_after_server_error(tmp_path):
+    async def run():
+        server = FakeReportServer({}, lost_creates=1)
+        await server.start()
+        client = AmazonSPAPIClient(
+            AMAZON_CONFIG,
+            api_base_url=server.base_url,
+            auth_base_url=f"{server.base_url}/auth",
+            token_cache_path=tmp_path / "token.json",
+            rate_limiter=SPAPIRateLimiter({"createReport": (100.0, 10)}),
+            retry_policy=RetryPolicy(max_retries=3, base_delay=0)
+        )
+        try:
+            with pytest.raises(SPAPIError) as error:
+                await SPAPIReportsClient(client).create_report(ORDER_REPORT_TYPE)
+            return error.value, server
+        finally:
+            await client.close()
+            await server.stop()
+
+    error, server = asyncio.run(run())
+
+    # 作成済みか不明な5xxは再送せず、レポートの重複作成を避ける
+    assert error.status == 503
+    assert len(server.created) == 1
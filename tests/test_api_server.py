@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ダッシュボードAPIサーバー テスト
+ETag/304・gzip圧縮・セクション別エンドポイント・SSEの差分配信を確認
+"""
+
+import asyncio
+import json
+
+import aiohttp
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+
+from src.dashboard.api_server import create_app
+from src.dashboard.snapshot_writer import DashboardSnapshotWriter
+
+
+def snapshot(today_sales: int) -> dict:
+    """gzip対象になる程度の大きさのスナップショット"""
+    return {
+        "sales": {
+            "today": today_sales,
+            "order_count": 3,
+            "daily_sales": {f"2026-09-{day:02d}": 1000 * day for day in range(1, 31)}
+        },
+        "inventory": {"stock_ratio": 88.5, "low_stock": 2, "total_items": 40},
+        "profit": {"today_profit": 500, "week_profit": 3500, "profit_rate": 0.3},
+        "last_updated": "2026-10-17 09:00:00"
+    }
+
+
+@pytest.fixture
+def paths(tmp_path):
+    """スナップショット・差分ファイルの出力先とライター"""
+    data_path, delta_path = tmp_path / "dashboard_data.json", tmp_path / "dashboard_delta.json"
+    return data_path, delta_path, DashboardSnapshotWriter(data_path, delta_path, compact=True)
+
+
+def test_dashboard_returns_etag_and_304_on_revalidation(paths):
+    data_path, delta_path, writer = paths
+    writer.write(snapshot(100))
+
+    with TestClient(create_app(data_path, delta_path)) as client:
+        first = client.get("/api/dashboard")
+        etag = first.headers["ETag"]
+        revalidated = client.get("/api/dashboard", headers={"If-None-Match": etag})
+
+        writer.write(snapshot(200))
+        changed = client.get("/api/dashboard", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert first.json()["sales"]["today"] == 100
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["version"] == 2
+
+
+def test_responses_are_gzipped_when_accepted(paths):
+    data_path, delta_path, writer = paths
+    writer.write(snapshot(100))
+
+    with TestClient(create_app(data_path, delta_path)) as client:
+        gzipped = client.get("/api/dashboard", headers={"Accept-Encoding": "gzip"})
+        plain = client.get("/api/dashboard", headers={"Accept-Encoding": "identity"})
+
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in plain.headers
+    assert gzipped.json() == plain.json()
+
+
+def test_section_endpoints_return_only_their_section(paths):
+    data_path, delta_path, writer = paths
+    writer.write(snapshot(100))
+
+    with TestClient(create_app(data_path, delta_path)) as client:
+        responses = {section: client.get(f"/api/{section}") for section in ("sales", "inventory", "profit")}
+        etags = {section: response.headers["ETag"] for section, response in responses.items()}
+        cached = client.get("/api/inventory", headers={"If-None-Match": etags["inventory"]})
+
+    expected = snapshot(100)
+    for section, response in responses.items():
+        assert response.status_code == 200
+        assert response.json() == {
+            section: expected[section], "version": 1, "last_updated": expected["last_updated"]
+        }
+    assert len(set(etags.values())) == 3
+    assert cached.status_code == 304
+
+
+def test_missing_snapshot_returns_503(tmp_path):
+    with TestClient(create_app(tmp_path / "none.json", tmp_path / "delta.json")) as client:
+        assert client.get("/api/dashboard").status_code == 503
+        assert client.get("/api/health").json()["data_available"] is False
+
+
+def test_stream_pushes_delta_frame_after_snapshot_update(paths):
+    data_path, delta_path, writer = paths
+    writer.write(snapshot(100))
+
+    async def read_event(response) -> str:
+        """SSEイベント1件（空行区切り）を読む"""
+        lines = []
+        while True:
+            line = (await asyncio.wait_for(response.content.readline(), timeout=5)).decode("utf-8").rstrip("\n")
+            if line == "" and lines:
+                return "\n".join(lines)
+            if line and not line.startswith(":"):
+                lines.append(line)
+
+    async def scenario():
+        server = uvicorn.Server(uvicorn.Config(
+            create_app(data_path, delta_path), host="127.0.0.1", port=0, log_level="warning"
+        ))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/api/stream") as response:
+                    initial = await read_event(response)
+                    # ファイル更新をブローカーが検知し、差分を購読者へ配信する
+                    writer.write(snapshot(250))
+                    pushed = await read_event(response)
+        finally:
+            server.should_exit = True
+            await serving
+        return initial, pushed
+
+    initial, pushed = asyncio.run(scenario())
+
+    assert initial.splitlines()[:2] == ["id: 1", "event: snapshot"]
+    lines = pushed.splitlines()
+    assert lines[:2] == ["id: 2", "event: delta"]
+    assert lines[2].startswith("data: ")
+    delta = json.loads(lines[2][len("data: "):])
+    assert delta["changed"] == {"sales": {"today": 250}}
+    assert (delta["from_version"], delta["to_version"]) == (1, 2)
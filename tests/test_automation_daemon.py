@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+24時間自動化エンジン常駐モード テスト
+集計中の想定外の例外で常駐ループが止まらないことを確認
+集計時はNotionに送信せず送信待ちキューに登録し、ドレイナーが後から反映することを確認
+"""
+
+import asyncio
+import time
+from datetime import date
+
+import pytest
+
+from config.settings import get_config
+from src import automation_engine_24h
+from src.automation_engine_24h import AutomationDaemon
+from src.database.notion_outbox import NotionOutbox
+from src.database.schema import ECDatabaseSchemaManager, connect
+from src.fake_services import FakeServicesServer
+
+
+@pytest.fixture
+def db_path(monkeypatch, tmp_path):
+    """マイグレーション済み一時DB（Notion連携は各テストで有効化）"""
+    monkeypatch.delenv("NOTION_TOKEN", raising=False)
+    db_path = tmp_path / "ec.db"
+    monkeypatch.setattr(get_config(), "database_path", str(db_path))
+    ECDatabaseSchemaManager(db_path).migrate()
+    return db_path
+
+
+def test_run_continues_after_unexpected_error(monkeypatch, capsys, db_path):
+    calls = []
+
+    def fetch(conn=None):
+        calls.append(conn)
+        if len(calls) == 1:
+            raise KeyError("broken snapshot")
+        return {"version": len(calls)}
+
+    monkeypatch.setattr(automation_engine_24h, "fetch_dashboard_data", fetch)
+    daemon = AutomationDaemon(interval=0)
+
+    assert daemon.run(max_ticks=2) == {"version": 2}
+    assert daemon.conn is None
+    captured = capsys.readouterr()
+    assert "❌ 集計エラー: 'broken snapshot'" in captured.out
+    assert "Traceback" in captured.err
+
+
+def test_tick_queues_notion_page_and_drainer_delivers_it(monkeypatch, db_path):
+    today = date.today().isoformat()
+    conn = connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO sales (date, amount, platform, order_id, sku) VALUES (?, ?, ?, ?, ?)",
+            (today, 1200, "amazon", "A-1", "S1")
+        )
+    monkeypatch.setattr(automation_engine_24h, "fetch_dashboard_data", lambda conn=None: {"version": 1})
+
+    async def scenario():
+        async with FakeServicesServer() as server:
+            monkeypatch.setenv("NOTION_TOKEN", "fake-notion-token")
+            monkeypatch.setenv("NOTION_DATABASE_ID", "db")
+            monkeypatch.setattr(get_config(), "notion_api_base_url", server.environment()["NOTION_API_BASE_URL"])
+            daemon = AutomationDaemon(interval=0)
+            outbox = NotionOutbox(conn)
+            try:
+                daemon.tick()
+                # 同じ日付の再登録は1件にまとまる
+                daemon.notion.queue_daily_pages(AutomationDaemon.NOTION_QUEUE_DAYS)
+                queued = outbox.stats()["pending"]
+                calls_after_tick = {name: count for name, count in server.stats.items() if name.startswith("notion.")}
+
+                daemon.start_notion_drainer(interval=0.05)
+                deadline = time.monotonic() + 5
+                while outbox.stats()["pending"] and time.monotonic() < deadline:
+                    await asyncio.sleep(0.05)
+                remaining = outbox.stats()["pending"]
+            finally:
+                daemon.close()
+            return queued, calls_after_tick, remaining, list(server.notion_pages.values())
+
+    queued, calls_after_tick, remaining, pages = asyncio.run(scenario())
+    conn.close()
+
+    assert queued == 1
+    assert calls_after_tick == {}
+    assert len(pages) == 1
+    assert pages[0]["properties"]["日付"] == {"date": {"start": today}}
+    assert pages[0]["properties"]["総売上"] == {"number": 1200}
+    assert remaining == 0
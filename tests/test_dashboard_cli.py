@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ダッシュボード起動コマンド テスト
+python main.py realtime を実プロセスで起動し、JSON APIとSSEストリームが応答することを確認
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def free_port() -> int:
+    """空きポート取得"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_realtime_command_serves_event_stream(tmp_path):
+    port = free_port()
+    env = dict(
+        os.environ,
+        DEBUG_MODE="true",
+        DASHBOARD_PORT=str(port),
+        # DB未作成: データ生成・常駐更新は警告のみでスキップされる（リポジトリ内にファイルを作らない）
+        DATABASE_PATH=str(tmp_path / "missing.db"),
+        # ブラウザを開かない
+        BROWSER="true"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "main.py", "realtime"], cwd=PROJECT_ROOT, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        deadline = time.monotonic() + 20
+        health = None
+        while health is None and time.monotonic() < deadline:
+            assert process.poll() is None, process.stdout.read().decode("utf-8", "replace")
+            try:
+                with urllib.request.urlopen(f"{base_url}/api/health", timeout=1) as response:
+                    health = json.loads(response.read())
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+
+        assert health == {"status": "ok", "data_available": False, "version": None, "last_updated": None}
+
+        with urllib.request.urlopen(f"{base_url}/api/stream", timeout=5) as response:
+            assert response.status == 200
+            assert response.headers["Content-Type"].startswith("text/event-stream")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        process.stdout.close()
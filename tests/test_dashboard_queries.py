@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ダッシュボード集計クエリ テスト
+在庫サマリーの値と、要補充数が部分インデックスだけで数えられることを確認
+"""
+
+from src.automation_engine_24h import DashboardQueryEngine
+from src.database.schema import ECDatabaseSchemaManager, connect
+
+
+def test_low_stock_count_uses_partial_index(tmp_path):
+    db_path = tmp_path / "ec.db"
+    ECDatabaseSchemaManager(db_path).migrate()
+    conn = connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO inventory (sku, stock, reorder_level, capacity) VALUES (?, ?, ?, ?)",
+            [("S1", 5, 10, 100), ("S2", 10, 10, 50), ("S3", 80, 10, 100), ("S4", 0, 10, 0)]
+        )
+
+    summary = DashboardQueryEngine(conn).fetch_inventory_summary()
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + DashboardQueryEngine.INVENTORY_QUERY)]
+    conn.close()
+
+    assert summary == {"stock_ratio": 35.0, "low_stock": 3, "total_items": 4}
+    assert any("idx_inventory_low_stock" in detail for detail in plan)
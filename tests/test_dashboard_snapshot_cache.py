@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ダッシュボードスナップショットキャッシュ テスト
+無効化前に始まったバックグラウンド再計算が古い値を戻さないことを確認
+"""
+
+import threading
+import time
+
+from src.automation_engine_24h import DashboardSnapshotCache
+
+
+def test_refresh_started_before_invalidate_is_discarded():
+    release = threading.Event()
+    results = iter([{"version": "pre-ingestion"}, {"version": "post-ingestion"}])
+
+    def loader():
+        data = next(results)
+        if data["version"] == "pre-ingestion":
+            # 取り込み前に読み始め、無効化後に終わる再計算
+            release.wait(5)
+        return data
+
+    cache = DashboardSnapshotCache(loader, ttl=0.0, stale_ttl=60.0)
+    cache.prime({"version": "initial"})
+
+    assert cache.get() == {"version": "initial"}
+    cache.invalidate()
+    release.set()
+
+    deadline = time.monotonic() + 5
+    while cache._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not cache._refreshing
+    assert cache._data is None
+    assert cache.get() == {"version": "post-ingestion"}
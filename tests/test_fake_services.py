@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+フェイク外部サービス テスト
+各クライアントをフェイクサービスに向けて動作を確認
+"""
+
+import asyncio
+
+import aiohttp
+
+from src.amazon_connector.sp_api_client import AmazonSPAPIClient
+from src.fake_services import FakeServiceSettings, FakeServicesServer
+from src.rakuten_connector.rms_client import RakutenRMSClient
+from src.rate_limiter import SPAPIRateLimiter
+from src.resilience import RetryPolicy, request_with_retry
+
+AMAZON_CONFIG = {
+    "client_id": "fake-client-id",
+    "client_secret": "fake-client-secret",
+    "refresh_token": "fake-refresh-token",
+    "seller_id": "fake-seller"
+}
+RAKUTEN_CONFIG = {"service_secret": "fake-service-secret", "license_key": "fake-license-key"}
+
+
+def run_with_server(settings: FakeServiceSettings, scenario):
+    """フェイクサービス起動中にシナリオを実行"""
+    async def run():
+        async with FakeServicesServer(settings) as server:
+            return await scenario(server, server.environment())
+
+    return asyncio.run(run())
+
+
+def test_marketplace_clients_read_generated_orders(tmp_path):
+    async def scenario(server, env):
+        amazon = AmazonSPAPIClient(
+            AMAZON_CONFIG,
+            api_base_url=env["AMAZON_SP_API_BASE_URL"],
+            auth_base_url=env["AMAZON_AUTH_BASE_URL"],
+            token_cache_path=tmp_path / "token.json",
+            rate_limiter=SPAPIRateLimiter({"getOrders": (1000.0, 100)})
+        )
+        rakuten = RakutenRMSClient(RAKUTEN_CONFIG, base_url=env["RAKUTEN_RMS_BASE_URL"])
+        try:
+            sales = await amazon.get_sales_data(days=10)
+            rakuten_orders = [
+                order for page in [p async for p in rakuten.iter_recent_order_pages(days=10)] for order in page
+            ]
+        finally:
+            await amazon.close()
+            await rakuten.close()
+        return sales, rakuten_orders, server.stats
+
+    settings = FakeServiceSettings(order_count=3000, order_days=30)
+    sales, rakuten_orders, stats = run_with_server(settings, scenario)
+
+    # 直近10日 = 全30日の1/3（キャンセル50件に1件を除く）
+    assert 990 <= sales["total_orders"] + sales["total_orders"] // 49 <= 1010
+    assert stats["sp_api.getOrders"] == 10
+    assert 990 <= len(rakuten_orders) <= 1010
+    assert stats["rms.getOrder"] == 10
+
+
+def test_notion_pages_can_be_created_queried_and_patched():
+    async def scenario(server, env):
+        base = env["NOTION_API_BASE_URL"]
+        database_id = env["NOTION_DATABASE_ID"]
+        headers = {"Authorization": "Bearer fake"}
+        async with aiohttp.ClientSession(headers=headers) as session:
+            for day in ("2026-10-01", "2026-10-02"):
+                await session.post(f"{base}/pages", json={
+                    "parent": {"database_id": database_id},
+                    "properties": {"日付": {"date": {"start": day}}, "総売上": {"number": 1}}
+                })
+            async with session.post(f"{base}/databases/{database_id}/query", json={
+                "filter": {"property": "日付", "date": {"equals": "2026-10-02"}}
+            }) as response:
+                results = (await response.json())["results"]
+            async with session.patch(f"{base}/pages/{results[0]['id']}", json={
+                "properties": {"総売上": {"number": 5}}
+            }) as response:
+                patched = await response.json()
+        return results, patched, server.notion_pages
+
+    results, patched, pages = run_with_server(FakeServiceSettings(), scenario)
+
+    assert len(results) == 1
+    assert patched["properties"]["総売上"] == {"number": 5}
+    assert patched["properties"]["日付"] == {"date": {"start": "2026-10-02"}}
+    assert len(pages) == 2
+
+
+def test_rate_limits_and_errors_are_injected():
+    async def scenario(server, env):
+        url = f"{env['NOTION_API_BASE_URL']}/pages"
+        body = {"parent": {"database_id": "db"}, "properties": {}}
+        async with aiohttp.ClientSession() as session:
+            statuses = []
+            for _ in range(5):
+                async with session.post(url, json=body) as response:
+                    statuses.append((response.status, response.headers.get("Retry-After")))
+
+            # 429はRetry-Afterに従って再送すれば成功する
+            result = await request_with_retry(
+                session, "POST", url, "notion.pages", policy=RetryPolicy(max_retries=3), json=body
+            )
+
+            server.settings.enforce_rate_limits = False
+            server.settings.error_rate = 1.0
+            async with session.post(url, json=body) as response:
+                failed_status = response.status
+        return statuses, result.status, failed_status
+
+    settings = FakeServiceSettings(enforce_rate_limits=True, rate_limits={"notion": (10.0, 3)}, seed=1)
+    statuses, retried_status, failed_status = run_with_server(settings, scenario)
+
+    assert [status for status, _ in statuses[:3]] == [200, 200, 200]
+    assert all(status == 429 and float(retry_after) > 0 for status, retry_after in statuses[3:])
+    assert retried_status == 200
+    assert failed_status == 503
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Notion期間一括同期（履歴バックフィル）テスト
+SQLiteの日別実績からページを作り、日ごとの包括データ取得・当日ダッシュボード値での上書きをしないことを確認
+HTTPセッション・ページ索引を一括同期全体で1つだけ開くことを確認
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import aiohttp
+
+from config.settings import get_config
+from src import notion_pages
+from src.database.schema import ECDatabaseSchemaManager, connect
+from src.ec_notion_integration import ECAutomationNotionManager
+from src.fake_services import FakeServicesServer
+from src.notion_enhanced_integration import NotionECIntegration
+
+
+def test_backfill_builds_each_page_from_that_days_rows(monkeypatch, tmp_path):
+    db_path = tmp_path / "ec.db"
+    monkeypatch.setattr(get_config(), "database_path", str(db_path))
+    ECDatabaseSchemaManager(db_path).migrate()
+
+    today = date.today()
+    day1, day2 = (today - timedelta(days=1)).isoformat(), (today - timedelta(days=3)).isoformat()
+    old_day = (today - timedelta(days=30)).isoformat()
+    conn = connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO sales (date, amount, platform, order_id, sku) VALUES (?, ?, ?, ?, ?)",
+            [
+                (day1, 1000, "amazon", "A-1", "S1"),
+                (day1, 3000, "rakuten", "R-1", "S1"),
+                (day2, 500, "amazon", "A-2", "S2"),
+                (old_day, 9999, "amazon", "A-3", "S2"),
+            ]
+        )
+        conn.executemany("INSERT INTO profit (date, profit) VALUES (?, ?)", [(day1, 800), (day2, 50)])
+    conn.close()
+
+    async def scenario():
+        async with FakeServicesServer() as server:
+            monkeypatch.setenv("NOTION_TOKEN", "fake-notion-token")
+            monkeypatch.setenv("NOTION_DATABASE_ID", "db")
+            monkeypatch.setattr(get_config(), "notion_api_base_url", server.environment()["NOTION_API_BASE_URL"])
+            manager = ECAutomationNotionManager()
+
+            async def must_not_fetch():
+                raise AssertionError("バックフィルで包括データを取得してはいけない")
+            manager.get_comprehensive_ec_data = must_not_fetch
+
+            success_count = await manager.batch_sync_period(7)
+            # 再実行しても行は増えない
+            await manager.batch_sync_period(7)
+            return success_count, list(server.notion_pages.values())
+
+    success_count, pages = asyncio.run(scenario())
+
+    assert success_count == 2
+    by_date = {page["properties"]["日付"]["date"]["start"]: page["properties"] for page in pages}
+    assert sorted(by_date) == sorted([day1, day2])
+    assert by_date[day1]["総売上"] == {"number": 4000}
+    assert by_date[day1]["Amazon売上"] == {"number": 1000}
+    assert by_date[day1]["楽天注文数"] == {"number": 1}
+    assert by_date[day1]["利益率"] == {"number": 0.2}
+    assert by_date[day2]["今日の利益"] == {"number": 50}
+    # その日に値が残らない項目は書き込まない
+    assert "在庫充足率" not in by_date[day2]
+
+
+def test_weekly_sync_writes_past_days_from_history_not_todays_dashboard(monkeypatch, tmp_path):
+    db_path = tmp_path / "ec.db"
+    monkeypatch.setattr(get_config(), "database_path", str(db_path))
+    ECDatabaseSchemaManager(db_path).migrate()
+
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    conn = connect(db_path)
+    with conn:
+        conn.execute(
+            "INSERT INTO sales (date, amount, platform, order_id, sku) VALUES (?, ?, ?, ?, ?)",
+            (yesterday, 700, "amazon", "A-1", "S1")
+        )
+    conn.close()
+
+    async def scenario():
+        async with FakeServicesServer() as server:
+            monkeypatch.setenv("NOTION_TOKEN", "fake-notion-token")
+            monkeypatch.setenv("NOTION_DATABASE_ID", "weekly-db")
+            monkeypatch.setattr(get_config(), "notion_api_base_url", server.environment()["NOTION_API_BASE_URL"])
+            notion = NotionECIntegration()
+
+            async def must_not_fetch():
+                raise AssertionError("過去日に当日のダッシュボード値を書いてはいけない")
+            notion.get_dashboard_data = must_not_fetch
+
+            success_count = await notion.batch_sync_weekly_data()
+            return success_count, list(server.notion_pages.values())
+
+    success_count, pages = asyncio.run(scenario())
+
+    assert success_count == 1
+    assert len(pages) == 1
+    # 送信待ちキュー経由ではハイフンを除いたID表記で送る（Notionはどちらの表記も受け付ける）
+    assert pages[0]["parent"] == {"database_id": "weeklydb"}
+    assert pages[0]["properties"]["日付"] == {"date": {"start": yesterday}}
+    assert pages[0]["properties"]["総売上"] == {"number": 700}
+
+
+def test_batch_opens_one_session_and_one_index(monkeypatch, tmp_path):
+    db_path = tmp_path / "ec.db"
+    monkeypatch.setattr(get_config(), "database_path", str(db_path))
+    ECDatabaseSchemaManager(db_path).migrate()
+
+    today = date.today()
+    conn = connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO sales (date, amount, platform, order_id, sku) VALUES (?, ?, ?, ?, ?)",
+            [((today - timedelta(days=n)).isoformat(), 100 * n, "amazon", f"A-{n}", "S1") for n in range(1, 6)]
+        )
+    conn.close()
+
+    opened = {"sessions": 0, "indexes": 0}
+
+    class CountingSession(aiohttp.ClientSession):
+        def __init__(self, *args, **kwargs):
+            opened["sessions"] += 1
+            super().__init__(*args, **kwargs)
+
+    open_page_index = notion_pages.open_page_index
+
+    def counting_open_page_index():
+        opened["indexes"] += 1
+        return open_page_index()
+
+    async def scenario():
+        async with FakeServicesServer() as server:
+            monkeypatch.setenv("NOTION_TOKEN", "fake-notion-token")
+            monkeypatch.setenv("NOTION_DATABASE_ID", "db")
+            monkeypatch.setattr(get_config(), "notion_api_base_url", server.environment()["NOTION_API_BASE_URL"])
+            monkeypatch.setattr(aiohttp, "ClientSession", CountingSession)
+            monkeypatch.setattr(notion_pages, "open_page_index", counting_open_page_index)
+            success_count = await ECAutomationNotionManager().batch_sync_period(7)
+            return success_count, len(server.notion_pages)
+
+    success_count, page_count = asyncio.run(scenario())
+
+    assert success_count == page_count == 5
+    assert opened == {"sessions": 1, "indexes": 1}
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Notion EC統合（データベース・テンプレート作成）テスト
+作成応答が失われても再送せず、Notion側に重複を作らないことを確認
+"""
+
+import asyncio
+
+from config.settings import get_config
+from src.fake_services import FakeServiceSettings, FakeServicesServer
+from src.notion_enhanced_integration import NotionECIntegration
+
+
+def test_create_requests_are_not_resent_after_lost_response(monkeypatch):
+    monkeypatch.setattr(get_config(), "http_max_retries", 1)
+
+    async def scenario():
+        settings = FakeServiceSettings(lost_responses={"notion.databases": 1, "notion.pages": 1})
+        async with FakeServicesServer(settings) as server:
+            monkeypatch.setattr(get_config(), "notion_api_base_url", server.environment()["NOTION_API_BASE_URL"])
+            integration = NotionECIntegration()
+            database_id = await integration.create_database_if_not_exists("parent-page")
+            page_id = await integration.create_notion_dashboard_template("parent-page")
+            return database_id, page_id, dict(server.stats), server.app["notion_databases"], server.notion_pages
+
+    database_id, page_id, stats, databases, pages = asyncio.run(scenario())
+
+    # 作成は反映済みだが応答は504 → 呼び出し元には失敗として返り、再送はしない
+    assert (database_id, page_id) == (None, None)
+    assert stats["notion.databases"] == 1
+    assert stats["notion.pages"] == 1
+    assert len(databases) == 1
+    assert len(pages) == 1
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Notion送信待ちキュー テスト
+フェイクNotionの障害中に書き込んだ日が失われず、復旧後の再送で反映されることを確認
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+import aiohttp
+import pytest
+
+from config.settings import get_config
+from src.database.notion_outbox import NotionOutbox
+from src.database.schema import ECDatabaseSchemaManager, connect
+from src.ec_notion_integration import ECAutomationNotionManager
+from src.fake_services import FakeServicesServer
+from src.notion_pages import drain_outbox
+
+
+@pytest.fixture
+def db_path(monkeypatch, tmp_path):
+    """マイグレーション済み一時DB（再試行なし・再送間隔なし）"""
+    db_path = tmp_path / "ec.db"
+    config = get_config()
+    monkeypatch.setattr(config, "database_path", str(db_path))
+    monkeypatch.setattr(config, "http_max_retries", 0)
+    monkeypatch.setattr(config, "notion_outbox_retry_base", 0)
+    ECDatabaseSchemaManager(db_path).migrate()
+    return db_path
+
+
+def test_writes_failed_during_outage_are_sent_after_recovery(monkeypatch, db_path):
+    today = date.today()
+    day1, day2 = (today - timedelta(days=1)).isoformat(), (today - timedelta(days=2)).isoformat()
+    conn = connect(db_path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO sales (date, amount, platform, order_id, sku) VALUES (?, ?, ?, ?, ?)",
+            [(day1, 1000, "amazon", "A-1", "S1"), (day2, 2000, "rakuten", "R-1", "S1")]
+        )
+    conn.close()
+
+    async def scenario():
+        async with FakeServicesServer() as server:
+            monkeypatch.setenv("NOTION_TOKEN", "fake-notion-token")
+            monkeypatch.setenv("NOTION_DATABASE_ID", "db")
+            monkeypatch.setattr(get_config(), "notion_api_base_url", server.environment()["NOTION_API_BASE_URL"])
+            manager = ECAutomationNotionManager()
+
+            server.settings.error_rate = 1.0
+            success_count = await manager.batch_sync_period(7)
+            during_outage = await manager.flush_outbox()
+
+            server.settings.error_rate = 0.0
+            after_recovery = await manager.flush_outbox()
+            return success_count, during_outage, after_recovery, list(server.notion_pages.values())
+
+    success_count, during_outage, after_recovery, pages = asyncio.run(scenario())
+
+    assert success_count == 0
+    assert during_outage == {"sent": 0, "unchanged": 0, "failed": 2, "remaining": 2}
+    assert after_recovery == {"sent": 2, "unchanged": 0, "failed": 0, "remaining": 0}
+    by_date = {page["properties"]["日付"]["date"]["start"]: page["properties"] for page in pages}
+    assert by_date[day1]["総売上"] == {"number": 1000}
+    assert by_date[day2]["総売上"] == {"number": 2000}
+
+
+def test_failed_entry_backs_off_and_newer_content_is_not_lost(monkeypatch, db_path):
+    monkeypatch.setattr(get_config(), "notion_outbox_retry_base", 60)
+    conn = connect(db_path)
+    outbox = NotionOutbox(conn)
+    outbox.enqueue("db", "2026-10-01", {"総売上": {"number": 1}})
+
+    async def scenario():
+        async with FakeServicesServer() as server:
+            server.settings.error_rate = 1.0
+            async with aiohttp.ClientSession() as session:
+                return await drain_outbox(session, server.environment()["NOTION_API_BASE_URL"], {}, outbox)
+
+    counts = asyncio.run(scenario())
+
+    assert counts == {"sent": 0, "unchanged": 0, "failed": 1, "remaining": 1}
+    # 再送間隔中は取り出されない
+    assert outbox.due(10) == []
+    assert outbox.stats()["retrying"] == 1
+
+    # 送信中に同じ日付が更新されたら、古い内容の送信完了で消さない
+    outbox.enqueue("db", "2026-10-01", {"総売上": {"number": 2}})
+    entry = outbox.due(10)[0]
+    outbox.enqueue("db", "2026-10-01", {"総売上": {"number": 3}})
+    assert not outbox.mark_sent(entry)
+    assert outbox.due(10)[0]["properties"] == {"総売上": {"number": 3}}
+    conn.close()
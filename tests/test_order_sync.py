@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+注文差分同期 テスト
+ハイウォーターマークが後退しないこと、差分同期の再実行で行が重複しないこと、
+キャンセル注文が削除されること、スキーマが最新なら初期化を省略することを確認
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from config.settings import get_config
+from src.amazon_connector.amazon_api import AmazonSPAPIConnector
+from src.database.schema import SCHEMA_VERSION, ECDatabaseSchemaManager, connect, ensure_database
+from src.database.sync_state import SyncStateStore
+from src.fake_services import FakeServiceSettings, FakeServicesServer
+from src.fake_services.marketplace import OrderCatalog, amazon_order_id
+
+
+def test_high_water_mark_never_moves_backwards(tmp_path):
+    db_path = tmp_path / "ec.db"
+    ECDatabaseSchemaManager(db_path).migrate()
+    conn = connect(db_path)
+    store = SyncStateStore(conn)
+    overlap = timedelta(minutes=10)
+
+    # 初回は initial_days 日前から
+    initial = store.get_sync_start("amazon", "seller", overlap, initial_days=7)
+    assert abs(initial - (datetime.now(timezone.utc) - timedelta(days=7))) < timedelta(seconds=5)
+
+    mark = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    store.set("amazon", "seller", mark, 5)
+    # 遅れて終わった古い同期の到達点では戻さない
+    store.set("amazon", "seller", mark - timedelta(hours=3), 2)
+
+    state = store.get("amazon", "seller")
+    assert state["high_water_mark"] == "2026-10-17T12:00:00Z"
+    assert state["last_order_count"] == 2
+    assert store.get_sync_start("amazon", "seller", overlap, initial_days=7) == mark - overlap
+    assert store.get("amazon", "other-seller") is None
+    conn.close()
+
+
+def test_incremental_sync_is_idempotent_and_deletes_cancelled_orders(monkeypatch, tmp_path):
+    db_path = tmp_path / "ec.db"
+    config = get_config()
+    monkeypatch.setattr(config, "database_path", str(db_path))
+    monkeypatch.setattr(config, "amazon_client_id", "fake-client-id")
+    monkeypatch.setattr(config, "amazon_client_secret", "fake-client-secret")
+    monkeypatch.setattr(config, "amazon_refresh_token", "fake-refresh-token")
+    monkeypatch.setattr(config, "amazon_seller_id", "fake-seller")
+    ECDatabaseSchemaManager(db_path).migrate()
+
+    settings = FakeServiceSettings(order_count=200, order_days=5)
+    catalog = OrderCatalog(settings.order_count, settings.order_days)
+    canceled = [i for i in range(settings.order_count) if catalog.is_canceled(i)]
+
+    conn = connect(db_path)
+    with conn:
+        # 前回までに取り込み済みで、その後キャンセルされた注文
+        conn.execute(
+            "INSERT INTO sales (date, amount, platform, order_id, sku) VALUES (?, ?, ?, ?, ?)",
+            ("2026-10-01", 5000, "amazon", amazon_order_id(canceled[0]), "")
+        )
+
+    def sales_totals():
+        return tuple(conn.execute("SELECT COUNT(*), SUM(amount) FROM sales WHERE platform = 'amazon'").fetchone())
+
+    async def scenario():
+        async with FakeServicesServer(settings) as server:
+            env = server.environment()
+            monkeypatch.setattr(config, "amazon_sp_api_base_url", env["AMAZON_SP_API_BASE_URL"])
+            monkeypatch.setattr(config, "amazon_auth_base_url", env["AMAZON_AUTH_BASE_URL"])
+            connector = AmazonSPAPIConnector()
+            try:
+                first = await connector.sync_orders_incremental()
+                after_first = sales_totals()
+
+                # 2回目は前回の到達点（重複取得分を含む）以降のみ取得
+                calls = server.stats["sp_api.getOrders"]
+                await connector.sync_orders_incremental()
+                incremental_calls = server.stats["sp_api.getOrders"] - calls
+                after_second = sales_totals()
+
+                # 到達点を消して全期間を取り直しても行は増えない
+                with conn:
+                    conn.execute("DELETE FROM sync_state")
+                await connector.sync_orders_incremental()
+                after_full_resync = sales_totals()
+            finally:
+                await connector.close()
+            return first, after_first, incremental_calls, after_second, after_full_resync
+
+    first, after_first, incremental_calls, after_second, after_full_resync = asyncio.run(scenario())
+    state = SyncStateStore(conn).get("A1VC38T7YXB528", "fake-seller")
+    canceled_rows = conn.execute(
+        "SELECT COUNT(*) FROM sales WHERE order_id IN ({})".format(",".join("?" * len(canceled))),
+        [amazon_order_id(i) for i in canceled]
+    ).fetchone()[0]
+    conn.close()
+
+    active = [i for i in range(settings.order_count) if not catalog.is_canceled(i)]
+    assert first == {"pages": 2, "upserted": len(active), "deleted": len(canceled)}
+    assert after_first == (len(active), sum(catalog.total(i) for i in active))
+    assert canceled_rows == 0
+    assert incremental_calls == 1
+    assert after_second == after_first
+    assert after_full_resync == after_first
+    assert state["last_order_count"] == len(active) + len(canceled)
+
+
+def test_ensure_database_migrates_only_when_behind(tmp_path):
+    db_path = tmp_path / "ec.db"
+
+    created = ensure_database(db_path)
+    assert created["version"] == SCHEMA_VERSION
+    # 最新なら何もしない
+    assert ensure_database(db_path) is None
+
+    conn = connect(db_path)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION - 1}")
+    conn.close()
+    upgraded = ensure_database(db_path)
+    assert upgraded["applied"] == [SCHEMA_VERSION]
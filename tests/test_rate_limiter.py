@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SP-APIレートリミッター テスト
+ローカルのフェイクSP-APIサーバーに対して制限追従を確認
+"""
+
+import asyncio
+import time
+
+from aiohttp import web
+
+from src.amazon_connector.sp_api_client import AmazonSPAPIClient
+from src.rate_limiter import AsyncTokenBucket, SPAPIRateLimiter
+
+AMAZON_CONFIG = {
+    "client_id": "test-client",
+    "client_secret": "test-secret",
+    "refresh_token": "test-refresh",
+    "seller_id": "test-seller"
+}
+
+
+class FakeSPAPIServer:
+    """オペレーションごとにレート制限するフェイクSP-API"""
+
+    def __init__(self, rate: float, burst: int):
+        """初期化"""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.accepted = 0
+        self.throttled = 0
+        self.runner = None
+        self.base_url = None
+
+    async def token(self, request):
+        """LWAトークン発行"""
+        return web.json_response({"access_token": "fake-token", "expires_in": 3600})
+
+    async def get_orders(self, request):
+        """getOrders（上限超過時は429）"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        headers = {"x-amzn-RateLimit-Limit": str(self.rate)}
+
+        if self.tokens < 1:
+            self.throttled += 1
+            return web.json_response({"errors": [{"code": "QuotaExceeded"}]}, status=429, headers=headers)
+
+        self.tokens -= 1
+        self.accepted += 1
+        return web.json_response({"payload": {"Orders": []}}, headers=headers)
+
+    async def start(self):
+        """空きポートで起動"""
+        app = web.Application()
+        app.router.add_post("/auth/token", self.token)
+        app.router.add_get("/orders/v0/orders", self.get_orders)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        """停止"""
+        await self.runner.cleanup()
+
+
+def test_token_bucket_allows_burst_then_paces():
+    async def run():
+        bucket = AsyncTokenBucket(rate=20, burst=2)
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    # バースト2件は即時、残り4件は 1/20 秒間隔
+    assert 0.15 <= elapsed < 0.5
+
+
+def test_limiter_uses_documented_defaults():
+    limiter = SPAPIRateLimiter()
+    assert limiter.get_bucket("getOrders").rate == 0.0167
+    assert limiter.get_bucket("getOrders").burst == 20
+    assert limiter.get_bucket("getItemOffers").burst == 1
+
+
+def test_limiter_adapts_to_rate_limit_header():
+    limiter = SPAPIRateLimiter()
+    limiter.on_response("getOrderItems", 200, {"x-amzn-RateLimit-Limit": "2.0"})
+    assert limiter.get_bucket("getOrderItems").rate == 2.0
+
+
+def test_limiter_backs_off_on_429_without_header():
+    limiter = SPAPIRateLimiter({"getOrder": (10.0, 5)})
+    limiter.on_response("getOrder", 429, {})
+    bucket = limiter.get_bucket("getOrder")
+    assert bucket.rate == 5.0
+    assert bucket.tokens == 0
+    assert limiter.throttled_count["getOrder"] == 1
+
+
+def test_client_follows_server_limit_without_throttling_storm(tmp_path):
+    async def run():
+        server = FakeSPAPIServer(rate=20, burst=3)
+        await server.start()
+        # 実際より速い初期値から開始し、ヘッダーと429で追従させる
+        limiter = SPAPIRateLimiter({"getOrders": (100.0, 3)})
+        client = AmazonSPAPIClient(
+            AMAZON_CONFIG,
+            api_base_url=server.base_url,
+            auth_base_url=f"{server.base_url}/auth",
+            token_cache_path=tmp_path / "token.json",
+            rate_limiter=limiter
+        )
+        try:
+            started = time.monotonic()
+            await asyncio.gather(*[
+                client.request("GET", "/orders/v0/orders", "getOrders", params={"MarketplaceIds": "X"})
+                for _ in range(20)
+            ])
+            elapsed = time.monotonic() - started
+        finally:
+            await client.close()
+            await server.stop()
+        return server, limiter, elapsed
+
+    server, limiter, elapsed = asyncio.run(run())
+
+    assert server.accepted == 20
+    # 初回レスポンスでレートを把握した後はほぼスロットリングされない
+    assert server.throttled <= 3
+    assert limiter.get_bucket("getOrders").rate == 20.0
+    # バースト3件＋残り17件を毎秒20件で処理（上限付近の速度）
+    assert elapsed < 2.0
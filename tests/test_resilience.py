@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+外部API耐障害性レイヤー テスト
+ローカルのフェイクサーバーで再試行・Retry-After・サーキットブレーカーを確認
+"""
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.rate_limiter import AsyncTokenBucket
+from src.resilience import (
+    CircuitBreaker, CircuitOpenError, RetryPolicy, get_circuit_breaker,
+    parse_retry_after, request_with_retry
+)
+
+
+class FlakyServer:
+    """指定回数だけエラーを返した後に成功するフェイクサーバー"""
+
+    def __init__(self, failures: int, status: int = 503, retry_after: str = None):
+        """初期化"""
+        self.failures = failures
+        self.status = status
+        self.retry_after = retry_after
+        self.calls = []
+        self.runner = None
+        self.base_url = None
+
+    async def handle(self, request):
+        """failures回まではエラー応答"""
+        self.calls.append(time.monotonic())
+        if len(self.calls) <= self.failures:
+            headers = {"Retry-After": self.retry_after} if self.retry_after else {}
+            return web.json_response({"error": "unavailable"}, status=self.status, headers=headers)
+        return web.json_response({"ok": True})
+
+    async def start(self):
+        """空きポートで起動"""
+        app = web.Application()
+        app.router.add_post("/v1/pages", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        """停止"""
+        await self.runner.cleanup()
+
+
+def call_flaky(server: FlakyServer, policy: RetryPolicy, calls: int = 1, idempotent: bool = True):
+    """フェイクサーバーをcalls回呼び出し、結果（例外含む）を返す"""
+    async def run():
+        await server.start()
+        results = []
+        try:
+            async with aiohttp.ClientSession() as session:
+                for _ in range(calls):
+                    try:
+                        results.append(await request_with_retry(
+                            session, "POST", f"{server.base_url}/v1/pages", "test.pages", policy=policy,
+                            idempotent=idempotent
+                        ))
+                    except CircuitOpenError as e:
+                        results.append(e)
+        finally:
+            await server.stop()
+        return results
+
+    return asyncio.run(run())
+
+
+def test_parse_retry_after_accepts_seconds_and_http_date():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("not-a-date") is None
+
+
+def test_backoff_grows_exponentially_and_prefers_retry_after():
+    policy = RetryPolicy(max_retries=5, base_delay=0.5, max_delay=4.0)
+    assert all(0 <= policy.backoff(0) <= 0.5 for _ in range(50))
+    assert all(0 <= policy.backoff(10) <= 4.0 for _ in range(50))
+    assert 3.0 <= policy.backoff(0, retry_after=3.0) <= 3.5
+
+
+def test_request_retries_until_success_honouring_retry_after():
+    server = FlakyServer(failures=2, status=429, retry_after="0.2")
+    result, = call_flaky(server, RetryPolicy(max_retries=3, base_delay=0.01))
+
+    assert result.status == 200
+    assert result.json() == {"ok": True}
+    assert len(server.calls) == 3
+    # Retry-After（0.2秒）を待ってから再送
+    assert server.calls[1] - server.calls[0] >= 0.2
+
+
+def test_request_returns_last_error_after_retries_exhausted():
+    server = FlakyServer(failures=10, status=503)
+    result, = call_flaky(server, RetryPolicy(max_retries=2, base_delay=0.01))
+
+    assert result.status == 503
+    assert len(server.calls) == 3
+
+
+def test_non_idempotent_request_retries_only_throttling():
+    server = FlakyServer(failures=1, status=503)
+    result, = call_flaky(server, RetryPolicy(max_retries=2, base_delay=0.01), idempotent=False)
+    # 処理済みか不明な5xxは再送しない
+    assert result.status == 503
+    assert len(server.calls) == 1
+
+    server = FlakyServer(failures=1, status=429, retry_after="0")
+    result, = call_flaky(server, RetryPolicy(max_retries=2, base_delay=0.01), idempotent=False)
+    assert result.status == 200
+    assert len(server.calls) == 2
+
+
+def test_circuit_opens_and_fails_fast():
+    server = FlakyServer(failures=100, status=503)
+    breaker = get_circuit_breaker("test.pages")
+    breaker.failure_threshold = 3
+    breaker.reset_timeout = 60
+
+    results = call_flaky(server, RetryPolicy(max_retries=0, base_delay=0.01), calls=5)
+
+    assert [r.status for r in results[:3]] == [503, 503, 503]
+    # 閾値到達後はサーバーに送らず即時失敗
+    assert all(isinstance(r, CircuitOpenError) for r in results[3:])
+    assert len(server.calls) == 3
+
+
+def test_half_open_allows_single_trial_then_closes():
+    breaker = CircuitBreaker("test.half_open", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    # 試行中は他の呼び出しを通さない
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_throttle_pauses_everyone_sharing_the_rate_limiter():
+    server = FlakyServer(failures=1, status=429, retry_after="0.3")
+    bucket = AsyncTokenBucket(rate=100, burst=100)
+
+    async def other_caller():
+        # 429受信後に送信しようとした別処理もRetry-After明けまで待つ
+        await asyncio.sleep(0.1)
+        await bucket.acquire()
+        return time.monotonic()
+
+    async def run():
+        await server.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                result, other_sent_at = await asyncio.gather(
+                    request_with_retry(
+                        session, "POST", f"{server.base_url}/v1/pages", "test.pages",
+                        policy=RetryPolicy(max_retries=2, base_delay=0.01), rate_limiter=bucket
+                    ),
+                    other_caller()
+                )
+        finally:
+            await server.stop()
+        return result, other_sent_at
+
+    result, other_sent_at = asyncio.run(run())
+
+    assert result.status == 200
+    assert other_sent_at - server.calls[0] >= 0.29
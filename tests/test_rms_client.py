@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+楽天RMS 受注APIクライアント テスト
+ローカルのフェイクRMSサーバーで getOrder の並行取得を確認
+"""
+
+import asyncio
+import time
+
+from aiohttp import web
+
+from src.rakuten_connector.rms_client import RMSAPIError, RakutenRMSClient
+
+RAKUTEN_CONFIG = {"service_secret": "test-secret", "license_key": "test-license"}
+
+
+class FakeRMSServer:
+    """getOrder に遅延を入れ、同時実行数を記録するフェイクRMS"""
+
+    def __init__(self, delay: float, fail_order: str = None):
+        """初期化"""
+        self.delay = delay
+        self.fail_order = fail_order
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.runner = None
+        self.base_url = None
+
+    async def get_order(self, request):
+        """getOrder（1回100件まで）"""
+        body = await request.json()
+        order_numbers = body["orderNumberList"]
+        assert len(order_numbers) <= 100
+
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+        if self.fail_order in order_numbers:
+            return web.json_response({"Results": {"errorCode": "ES04-01"}}, status=400)
+        return web.json_response({"OrderModelList": [
+            {"orderNumber": number, "totalPrice": 1000} for number in order_numbers
+        ]})
+
+    async def start(self):
+        """空きポートで起動"""
+        app = web.Application()
+        app.router.add_post("/order/getOrder/", self.get_order)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        """停止"""
+        await self.runner.cleanup()
+
+
+def run_get_orders(order_numbers, delay=0.1, fail_order=None, max_concurrent_requests=4):
+    """フェイクRMSに対して get_orders を実行"""
+    async def run():
+        server = FakeRMSServer(delay, fail_order)
+        await server.start()
+        client = RakutenRMSClient(
+            RAKUTEN_CONFIG, base_url=server.base_url, max_concurrent_requests=max_concurrent_requests
+        )
+        started = time.monotonic()
+        try:
+            orders = await client.get_orders(order_numbers)
+            error = None
+        except RMSAPIError as e:
+            orders, error = None, e
+        finally:
+            elapsed = time.monotonic() - started
+            await client.close()
+            await server.stop()
+        return server, orders, error, elapsed
+
+    return asyncio.run(run())
+
+
+def test_get_orders_runs_batches_concurrently_in_order():
+    order_numbers = [f"R-{i:05d}" for i in range(1000)]
+    server, orders, error, elapsed = run_get_orders(order_numbers)
+
+    assert error is None
+    assert server.calls == 10
+    # 同時実行数は上限を超えない
+    assert server.max_in_flight == 4
+    # 10回×0.1秒を4並列で処理（逐次なら1秒以上）
+    assert elapsed < 0.6
+    assert [order["orderNumber"] for order in orders] == order_numbers
+
+
+def test_get_orders_raises_when_a_batch_fails():
+    order_numbers = [f"R-{i:05d}" for i in range(500)]
+    server, orders, error, _ = run_get_orders(order_numbers, delay=0.01, fail_order="R-00250")
+
+    assert orders is None
+    assert error.status == 400
+    assert error.operation == "getOrder"
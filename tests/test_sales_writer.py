@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+売上一括書き込み・SP-API注文ページ取得 テスト
+executemanyのバッチ境界をまたぐupsert、同一注文の再取り込み、キャンセル注文の削除、
+注文ページの先読み順序と終了を確認
+"""
+
+import asyncio
+
+import pytest
+
+from src.amazon_connector.sp_api_client import AmazonSPAPIClient
+from src.database.sales_writer import SalesWriter
+from src.database.schema import ECDatabaseSchemaManager, connect
+from src.fake_services import FakeServiceSettings, FakeServicesServer
+from src.fake_services.marketplace import SP_API_PAGE_SIZE, amazon_order_id
+from src.rate_limiter import SPAPIRateLimiter
+
+AMAZON_CONFIG = {
+    "client_id": "fake-client-id",
+    "client_secret": "fake-client-secret",
+    "refresh_token": "fake-refresh-token",
+    "seller_id": "fake-seller"
+}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """マイグレーション済み一時DBの接続"""
+    db_path = tmp_path / "ec.db"
+    ECDatabaseSchemaManager(db_path).migrate()
+    conn = connect(db_path)
+    yield conn
+    conn.close()
+
+
+def row(order_id: str, sku: str, amount: int, canceled: bool = False) -> dict:
+    """売上行"""
+    return {
+        "platform": "rakuten", "order_id": order_id, "sku": sku,
+        "date": "2026-10-16", "amount": amount, "canceled": canceled
+    }
+
+
+def sales(conn) -> dict:
+    """(注文番号, SKU) → 金額"""
+    return {(r["order_id"], r["sku"]): r["amount"] for r in conn.execute("SELECT order_id, sku, amount FROM sales")}
+
+
+def test_upsert_across_batches_is_idempotent_and_cancel_deletes_order(conn):
+    writer = SalesWriter(conn, batch_size=2)
+    rows = [row("R-1", "A", 1000), row("R-1", "B", 500), row("R-2", "A", 700), row("R-3", "C", 300)]
+
+    first = writer.write_rows(rows)
+    # 同じ注文の再取り込み（R-2のみ金額変更）
+    second = writer.write_rows(rows[:2] + [row("R-2", "A", 900)] + rows[3:])
+    after_resync = sales(conn)
+    # R-1がキャンセルされた（明細をまとめて削除）
+    third = writer.write_rows([row("R-1", "", 0, canceled=True)])
+
+    assert first == {"upserted": 4, "deleted": 0}
+    assert second == {"upserted": 4, "deleted": 0}
+    assert after_resync == {("R-1", "A"): 1000, ("R-1", "B"): 500, ("R-2", "A"): 900, ("R-3", "C"): 300}
+    assert third == {"upserted": 0, "deleted": 1}
+    assert sales(conn) == {("R-2", "A"): 900, ("R-3", "C"): 300}
+    assert writer.stats == {"pages": 0, "upserted": 8, "deleted": 1}
+    # 日次ロールアップもトリガーで追従する
+    assert tuple(conn.execute("SELECT amount, order_count FROM sales_daily WHERE date = '2026-10-16'").fetchone()) == (1200, 2)
+
+
+def test_consume_writes_one_transaction_per_page(conn):
+    async def pages():
+        yield [{"id": "R-1", "amount": 100}, {"id": "R-2", "amount": 200}]
+        yield [{"id": "R-1", "amount": 150}]
+        yield [{"id": "R-2", "amount": 0, "canceled": True}]
+
+    def mapper(order):
+        return [row(order["id"], "A", order["amount"], order.get("canceled", False))]
+
+    writer = SalesWriter(conn, batch_size=10)
+    stats = asyncio.run(writer.consume(pages(), mapper))
+
+    assert stats == {"pages": 3, "upserted": 3, "deleted": 1}
+    assert sales(conn) == {("R-1", "A"): 150}
+
+
+def run_order_pages(tmp_path, order_count: int, consume):
+    """フェイクSP-APIの注文ページをconsume(pages, server)で読む"""
+    async def run():
+        async with FakeServicesServer(FakeServiceSettings(order_count=order_count, order_days=5)) as server:
+            env = server.environment()
+            client = AmazonSPAPIClient(
+                AMAZON_CONFIG,
+                api_base_url=env["AMAZON_SP_API_BASE_URL"],
+                auth_base_url=env["AMAZON_AUTH_BASE_URL"],
+                token_cache_path=tmp_path / "token.json",
+                rate_limiter=SPAPIRateLimiter({"getOrders": (1000.0, 100)})
+            )
+            try:
+                pages = client.iter_order_pages(created_after="2000-01-01T00:00:00Z")
+                return await consume(pages, server)
+            finally:
+                await client.close()
+
+    return asyncio.run(run())
+
+
+def test_order_pages_prefetch_next_page_and_stop_after_last(tmp_path):
+    async def consume(pages, server):
+        received, calls_while_processing = [], []
+        async for orders in pages:
+            # 呼び出し元が処理している間に次ページの取得が進む
+            await asyncio.sleep(0.1)
+            calls_while_processing.append(server.stats["sp_api.getOrders"])
+            received.append([order["AmazonOrderId"] for order in orders])
+        await asyncio.sleep(0.1)
+        return received, calls_while_processing, server.stats["sp_api.getOrders"]
+
+    received, calls_while_processing, total_calls = run_order_pages(tmp_path, 250, consume)
+
+    assert [len(page) for page in received] == [SP_API_PAGE_SIZE, SP_API_PAGE_SIZE, 50]
+    # ページ順・ページ内順とも注文番号順（先読みしても順序は入れ替わらない）
+    assert [order_id for page in received for order_id in page] == [amazon_order_id(i) for i in range(250)]
+    assert calls_while_processing == [2, 3, 3]
+    # 最終ページ（NextTokenなし）の後は取得しない
+    assert total_calls == 3
+
+
+def test_order_pages_cancel_prefetch_when_consumer_stops(tmp_path):
+    async def consume(pages, server):
+        async for orders in pages:
+            first = orders
+            break
+        await pages.aclose()
+        await asyncio.sleep(0.1)
+        return len(first), server.stats["sp_api.getOrders"]
+
+    first_page, calls = run_order_pages(tmp_path, 1000, consume)
+
+    assert first_page == SP_API_PAGE_SIZE
+    # 先読み中の1ページ分を超えて取得しない
+    assert calls <= 2
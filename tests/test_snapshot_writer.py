@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ダッシュボードデータ出力 テスト
+呼び出し元のデータを変更せず、差分の基準が呼び出し元の変更に影響されないことを確認
+"""
+
+import json
+
+from src.dashboard.snapshot_writer import DashboardSnapshotWriter
+
+
+def test_write_does_not_share_or_modify_callers_data(tmp_path):
+    writer = DashboardSnapshotWriter(tmp_path / "data.json", tmp_path / "delta.json", compact=True)
+    data = {"sales": {"today": 100, "orders": 1}, "last_updated": "2026-10-17 09:00:00"}
+
+    assert writer.write(data) == {"written": True, "version": 1, "path": tmp_path / "data.json"}
+    assert data == {"sales": {"today": 100, "orders": 1}, "last_updated": "2026-10-17 09:00:00"}
+
+    # 呼び出し元が同じdictを書き換えて再利用しても、前回内容との差分が正しく出る
+    data["sales"]["today"] = 200
+    assert writer.write(data)["version"] == 2
+    delta = json.loads((tmp_path / "delta.json").read_text(encoding="utf-8"))
+    assert delta["changed"] == {"sales": {"today": 200}}
+    assert (delta["from_version"], delta["to_version"]) == (1, 2)
+
+    # 時刻だけの変更は内容の変更として扱わない
+    data["last_updated"] = "2026-10-17 09:01:00"
+    assert writer.write(data)["written"] is False